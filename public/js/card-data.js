@@ -4,7 +4,11 @@
 let cardData = [];
 
 // --- CONFIGURATION: Select your data source ---
-const SELECTED_DATA_SOURCE = "TDM_CSV_ONLY"; // Updated to reflect the single CSV source
+// "CARD_BUNDLE" loads the pre-parsed bundle built by scripts/build_card_bundle.py
+// and falls back to the merged CSV if the bundle is missing.
+const SELECTED_DATA_SOURCE = "CARD_BUNDLE";
+const SELECTED_SET_CODE = "tdm";
+const CARD_BUNDLE_FORMAT_VERSION = 1; // Must match BUNDLE_FORMAT_VERSION in build_card_bundle.py
 
 // --- Common Grade Scale (used for reference or UI, not for AH_Pro_Rating conversion directly) ---
 const GRADE_SCALE = ["F", "D-", "D", "D+", "C-", "C", "C+", "B-", "B", "B+", "A-", "A", "A+"];
@@ -69,6 +73,51 @@ function convertProRatingToGrade(ratingString) {
 }
 
 
+// --- Helper: Scryfall image lookup URL for a card name ---
+function scryfallImageUrl(cardName) {
+    return `https://api.scryfall.com/cards/named?format=image&version=normal&fuzzy=${encodeURIComponent(cardName)}`;
+}
+
+
+// =================================================================================
+// --- Card Bundle Logic (<set>_cards.json) ---
+// =================================================================================
+async function initializeCardBundle(setCode) {
+    console.log(`Initializing card data from the ${setCode} card bundle...`);
+    const bundlePath = `./assets/data/${setCode}/${setCode}_cards.json`;
+
+    try {
+        const response = await fetch(bundlePath);
+        if (!response.ok) throw new Error(`HTTP error! status: ${response.status} fetching ${bundlePath}`);
+        const bundle = await response.json();
+        if (bundle.version !== CARD_BUNDLE_FORMAT_VERSION) {
+            throw new Error(`Unsupported card bundle version ${bundle.version} in ${bundlePath}`);
+        }
+
+        // Cards are stored as arrays in the order given by bundle.fields
+        const field = {};
+        bundle.fields.forEach((name, index) => field[name] = index);
+
+        cardData = bundle.cards.map(card => ({
+            name: card[field.name],
+            // Locally stored or direct Scryfall image; older bundles have no image field
+            imageUrl: (field.image !== undefined && card[field.image]) || scryfallImageUrl(card[field.name]),
+            trueGrade: card[field.trueGrade],
+            description: card[field.description],
+            gihWR: card[field.gihWR],
+            aiRatingDisplay: "",
+            proRatingDisplay: ""
+        }));
+        console.log(`Successfully loaded ${cardData.length} cards from ${bundlePath}.`);
+        return true;
+    } catch (error) {
+        console.error("Failed to load card bundle:", error);
+        cardData = [];
+        return false;
+    }
+}
+
+
 // =================================================================================
 // --- TDM_DATA.CSV Specific Logic ---
 // =================================================================================
@@ -96,6 +145,7 @@ async function initializeTdmCsvData() {
         const ahProRatingIndex = header.findIndex(h => h.toLowerCase() === 'ah_pro_rating');
         const ahCommentIndex = header.findIndex(h => h.toLowerCase() === 'ah_comment');
         const gihWrIndex = header.findIndex(h => h.toLowerCase() === '17l_gih wr'); // Note: 17L specific prefix and space
+        const imageUrlIndex = header.findIndex(h => h.toLowerCase() === 'image url'); // Optional; older exports lack it
 
         if (nameIndex === -1) throw new Error("CSV Header missing 'Name'");
         if (ahProRatingIndex === -1) throw new Error("CSV Header missing 'AH_Pro_Rating'");
@@ -133,7 +183,7 @@ async function initializeTdmCsvData() {
 
             processedCardData.push({
                 name: cardName,
-                imageUrl: `https://api.scryfall.com/cards/named?format=image&version=normal&fuzzy=${encodeURIComponent(cardName)}`,
+                imageUrl: (imageUrlIndex !== -1 && values[imageUrlIndex]) || scryfallImageUrl(cardName),
                 trueGrade: trueGrade,
                 description: description,
                 gihWR: gihWR,
@@ -157,7 +207,13 @@ async function initializeTdmCsvData() {
 async function initializeCardData() {
     console.log(`Selected data source: ${SELECTED_DATA_SOURCE}`);
     
-    if (SELECTED_DATA_SOURCE === "TDM_CSV_ONLY") {
+    if (SELECTED_DATA_SOURCE === "CARD_BUNDLE") {
+        const loaded = await initializeCardBundle(SELECTED_SET_CODE);
+        if (!loaded) {
+            console.warn("Falling back to the merged CSV.");
+            await initializeTdmCsvData();
+        }
+    } else if (SELECTED_DATA_SOURCE === "TDM_CSV_ONLY") {
         await initializeTdmCsvData();
     } else {
         console.error("Invalid or unsupported data source selected in card-data.js:", SELECTED_DATA_SOURCE);
@@ -34,7 +34,9 @@ const aboutModalEl = document.getElementById('aboutModal');
 const allPopupModals = document.querySelectorAll('.popup-modal');
 
 let currentCard = null; 
-let evaluatedCardIndices = []; 
+// Indices of the cards not yet dealt this round; a card is drawn by swapping a
+// random entry with the last one and popping it, so every draw is O(1)
+let remainingCardIndices = []; 
 
 function createGradeButtons() {
     gradeButtonsContainerEl.innerHTML = ''; 
@@ -71,22 +73,25 @@ function loadRandomCard() {
         return;
     }
     
-    if (evaluatedCardIndices.length === cardData.length && cardData.length > 0) {
-            evaluatedCardIndices = []; 
-            console.log("All cards seen, reshuffling.");
+    if (remainingCardIndices.length === 0) {
+        if (currentCard) console.log("All cards seen, reshuffling.");
+        remainingCardIndices = Array.from(cardData.keys());
     }
 
-    let randomIndex;
-    let attempts = 0; 
-    do {
-        randomIndex = Math.floor(Math.random() * cardData.length);
-        attempts++;
-    } while (evaluatedCardIndices.includes(randomIndex) && cardData.length > evaluatedCardIndices.length && attempts < cardData.length * 2);
-    
+    const pick = Math.floor(Math.random() * remainingCardIndices.length);
+    const randomIndex = remainingCardIndices[pick];
+    remainingCardIndices[pick] = remainingCardIndices[remainingCardIndices.length - 1];
+    remainingCardIndices.pop();
+
     currentCard = cardData[randomIndex];
-    evaluatedCardIndices.push(randomIndex);
 
+    const fallbackImageUrl = scryfallImageUrl(currentCard.name);
     cardImageEl.onerror = function() { 
+        // A local or direct image that fails gets one retry through Scryfall's name lookup
+        if (currentCard.imageUrl !== fallbackImageUrl && this.src !== fallbackImageUrl) {
+            this.src = fallbackImageUrl;
+            return;
+        }
         this.onerror=null; 
         this.src=`https://placehold.co/300x419/7F8C8D/FFFFFF?text=Image+Not+Found&font=lora`;
         console.warn(`Failed to load image for: ${currentCard.name} from ${currentCard.imageUrl}. Using placeholder.`);
@@ -174,7 +179,7 @@ allPopupModals.forEach(modal => {
             const modalIdToClose = targetLink.dataset.modalId;
             if (action === 'confirm-new-game') {
                 this.classList.remove('visible');
-                evaluatedCardIndices = []; 
+                remainingCardIndices = []; 
                 loadRandomCard(); 
             } else if (action === 'close-modal' && modalIdToClose) {
                 document.getElementById(modalIdToClose).classList.remove('visible');
@@ -1,17 +1,67 @@
-import csv
+import argparse
 import os
 import glob
+import json
+import mmap
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import build_card_bundle
+import card_columns
+import card_database
+import card_metrics
+import card_sources
+import lands_history
+from card_sources import new_join_report
+from name_index import load_aliases
+from pipeline_trace import TRACER, count, span
 
 # --- Configuration ---
-BASE_DATA_PATH = os.path.join("public", "assets", "data")
+BASE_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "data"))
 SCRYFALL_EXPORT_FILENAME_TEMPLATE = "scryfall_export_{set_code}.csv"
 LANDS_FILENAME_TEMPLATE_PATTERN_1 = "17lands-{set_code}-card-ratings-*.csv"
 LANDS_FILENAME_TEMPLATE_PATTERN_2 = "17Lands_export_{set_code}.csv" # Older pattern
 AETHERHUB_FILENAME_TEMPLATE_PATTERN = "aetherhub-comments-{set_code}-*.txt"
-OUTPUT_FILENAME_TEMPLATE = "tdm_data_{set_code}.csv"
+AETHERHUB_FILENAME_TEMPLATE_PATTERN_2 = "aetherhub_export_{set_code}.txt"
+OUTPUT_FILENAME_TEMPLATE = "{set_code}_data.csv" # Read by the front end (public/js/card-data.js)
+# Optional Alias,Name tables for names no normalization can reconcile; one in
+# the data root applies to every set, one in a set directory to that set only
+ALIASES_FILENAME = "name_aliases.csv"
+
+# Columns of the AetherHub export; merged as AH_AI_Rating, AH_Pro_Rating and AH_Comment
+AETHERHUB_COLUMNS = ["AI_Rating", "Pro_Rating", "Comment"]
+
+# Start of an AetherHub record: the card name line, its AI rating and (usually) its pro rating
+AETHERHUB_RECORD_RE = re.compile(
+    rb'^(?P<name>[^\r\n]+)\r?\n'
+    rb'AI Rating:[ \t]*(?P<ai>[^\r\n]*)'
+    # A split card's rating ("1.0 // 2.5") may wrap after the "//"
+    rb'(?:\r?\nPro Rating:[ \t]*(?P<pro>[^\r\n]*//[ \t]*\r?\n[^\r\n]*|[^\r\n]*))?',
+    re.MULTILINE,
+)
+
+# Per-set record of the inputs and output format of the last successful build
+MANIFEST_FILENAME = ".augment_manifest.json"
+# Bump whenever the columns or format of the merged output change, so existing
+# outputs are rebuilt even though their inputs did not change
+OUTPUT_SCHEMA_VERSION = 7
+# Seconds between scans of the data directories in --watch mode
+DEFAULT_WATCH_INTERVAL = 2.0
 
 # --- Helper Functions ---
 
+def discover_set_codes(base_data_path=BASE_DATA_PATH):
+    """Returns the codes of all set directories that contain a Scryfall export, sorted."""
+    set_codes = []
+    for entry in sorted(os.listdir(base_data_path)):
+        scryfall_file = os.path.join(base_data_path, entry, SCRYFALL_EXPORT_FILENAME_TEMPLATE.format(set_code=entry))
+        if os.path.isfile(scryfall_file):
+            set_codes.append(entry)
+    return set_codes
+
 def find_file(directory, pattern):
     """Finds a file matching the pattern in the given directory."""
     search_path = os.path.join(directory, pattern)
@@ -20,231 +70,725 @@ def find_file(directory, pattern):
         return files_found[0] # Return the first match
     return None
 
-def load_csv_to_dict(filepath, key_column="Name"):
-    """Loads a CSV into a list of dictionaries, or a dict keyed by key_column if specified."""
-    data = []
+def find_lands_files(directory, set_code):
+    """
+    Finds every 17Lands export of a set, under the current (dated) and the older
+    naming pattern, oldest snapshot first (see lands_history.snapshot_date).
+    """
+    patterns = (
+        LANDS_FILENAME_TEMPLATE_PATTERN_1.format(set_code=set_code.upper()), # Some patterns use uppercase
+        LANDS_FILENAME_TEMPLATE_PATTERN_2.format(set_code=set_code),
+    )
+    files_found = {path for pattern in patterns for path in glob.glob(os.path.join(directory, pattern))}
+    return sorted(files_found, key=lambda path: (lands_history.snapshot_date(path), path))
+
+def find_lands_file(directory, set_code):
+    """Finds the newest 17Lands export of a set."""
+    lands_filepaths = find_lands_files(directory, set_code)
+    return lands_filepaths[-1] if lands_filepaths else None
+
+def find_aetherhub_file(directory, set_code):
+    """Finds the AetherHub export of a set, trying the dated and the plain naming pattern."""
+    aetherhub_filepath = find_file(directory, AETHERHUB_FILENAME_TEMPLATE_PATTERN.format(set_code=set_code.upper()))
+    if not aetherhub_filepath:
+        aetherhub_filepath = find_file(directory, AETHERHUB_FILENAME_TEMPLATE_PATTERN_2.format(set_code=set_code))
+    return aetherhub_filepath
+
+def find_set_inputs(directory, set_code):
+    """
+    Returns the input files of a set that exist, keyed by source name. The
+    newest 17Lands export is the one merged; older ones are listed too, since
+    they feed the set's 17Lands history.
+    """
+    lands_filepaths = find_lands_files(directory, set_code)
+    inputs = {
+        "Scryfall": os.path.join(directory, SCRYFALL_EXPORT_FILENAME_TEMPLATE.format(set_code=set_code)),
+        "17Lands": lands_filepaths[-1] if lands_filepaths else None,
+        **{f"17Lands history: {os.path.basename(path)}": path for path in lands_filepaths[:-1]},
+        "AetherHub": find_aetherhub_file(directory, set_code),
+        "Aliases": os.path.join(directory, ALIASES_FILENAME),
+        "Shared aliases": os.path.join(os.path.dirname(os.path.normpath(directory)), ALIASES_FILENAME),
+    }
+    return {source: path for source, path in inputs.items() if path and os.path.isfile(path)}
+
+def load_manifest(directory):
+    """Loads a set's build manifest, or returns None if there is no usable one."""
     try:
-        with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            if key_column:
-                keyed_data = {}
-                for row in reader:
-                    # Normalize key for lookup (e.g. lowercase and strip)
-                    # This is important if card names might have slight variations.
-                    # However, for this script, we'll assume names are consistent initially.
-                    key = row.get(key_column)
-                    if key:
-                         # Handle potential duplicate names by storing a list or deciding on a strategy
-                         # For now, let's assume unique names or overwrite with the last entry.
-                        keyed_data[key] = row
-                return keyed_data
-            else:
-                for row in reader:
-                    data.append(row)
-                return data
-    except FileNotFoundError:
-        print(f"Info: CSV file not found: {filepath}")
-    except Exception as e:
-        print(f"Error loading CSV file {filepath}: {e}")
-    return None if key_column else []
-
-
-def load_aetherhub_data(filepath):
-    """Loads AetherHub data (one card name per line) into a set."""
-    card_names = set()
+        with open(os.path.join(directory, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_manifest(directory, manifest):
+    manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def fingerprint_inputs(inputs, previous=None):
+    """
+    Records the size, mtime and content hash of each input file.
+
+    Files whose size and mtime match the `previous` fingerprint reuse its hash,
+    so unchanged inputs are only stat()ed, never re-read.
+
+    Args:
+        inputs (dict): Source name -> file path.
+        previous (dict): The 'inputs' section of an earlier manifest.
+
+    Returns:
+        dict: Source name -> {'file', 'size', 'mtime_ns', 'sha256'}.
+    """
+    previous = previous or {}
+    fingerprint = {}
+    for source, path in inputs.items():
+        stat = os.stat(path)
+        entry = {"file": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        old = previous.get(source)
+        if old and all(old.get(key) == entry[key] for key in ("file", "size", "mtime_ns")):
+            entry["sha256"] = old["sha256"]
+        else:
+            entry["sha256"] = lands_history.hash_file(path)
+        fingerprint[source] = entry
+    return fingerprint
+
+def check_set_freshness(set_code, base_data_path=BASE_DATA_PATH, columns=None):
+    """
+    Compares a set's current inputs and the requested column projection
+    (see parse_columns) against its manifest.
+
+    Returns:
+        tuple: (up_to_date, fingerprint). `fingerprint` is the current input
+               fingerprint, or None if the set directory has no Scryfall export.
+               When only mtimes changed, the manifest is refreshed in place so
+               the next check is stat-only again.
+    """
+    directory = os.path.join(base_data_path, set_code)
+    inputs = find_set_inputs(directory, set_code)
+    if "Scryfall" not in inputs:
+        return False, None
+
+    manifest = load_manifest(directory)
+    previous_inputs = manifest.get("inputs") if manifest else None
+    fingerprint = fingerprint_inputs(inputs, previous_inputs)
+    if not manifest or manifest.get("schema_version") != OUTPUT_SCHEMA_VERSION:
+        return False, fingerprint
+    if manifest.get("columns") != columns:
+        return False, fingerprint
+    if not os.path.isfile(os.path.join(directory, manifest.get("output", ""))):
+        return False, fingerprint
+    if not card_database.has_set(card_database.database_path(base_data_path), set_code):
+        return False, fingerprint
+
+    hashes = {source: entry["sha256"] for source, entry in fingerprint.items()}
+    old_hashes = {source: entry.get("sha256") for source, entry in previous_inputs.items()}
+    if hashes != old_hashes:
+        return False, fingerprint
+    if fingerprint != previous_inputs:
+        manifest["inputs"] = fingerprint
+        save_manifest(directory, manifest)
+    return True, fingerprint
+
+def iter_aetherhub_records(buffer, comments=True):
+    """
+    Parses AetherHub comment exports in a single pass over a bytes-like buffer
+    (typically an mmap). Each record is a card name line followed by
+    "AI Rating:" and "Pro Rating:" lines and then the comment, which runs until
+    the next record; records are separated by blank lines.
+
+    Only the matched slices are decoded, so the buffer is never split into
+    per-line Python strings. Without `comments` the comments are not decoded
+    at all and come back empty.
+
+    Yields:
+        dict: 'name', 'ai_rating', 'pro_ratings' (list; a split rating such as
+              "1.0 // 2.5" gives two entries), 'pro_rating' (as written) and
+              'comment' (paragraphs joined by a space; empty if none).
+    """
+    matches = AETHERHUB_RECORD_RE.finditer(buffer)
+    current = next(matches, None)
+    while current:
+        following = next(matches, None)
+        comment_end = following.start() if following else len(buffer)
+        comment = buffer[current.end():comment_end].decode('utf-8', errors='replace') if comments else ""
+        pro_rating = " ".join((current.group('pro') or b'').decode('utf-8', errors='replace').split())
+        yield {
+            "name": current.group('name').decode('utf-8', errors='replace').strip(),
+            "ai_rating": current.group('ai').decode('utf-8', errors='replace').strip(),
+            "pro_rating": pro_rating,
+            "pro_ratings": [part.strip() for part in pro_rating.split('//') if part.strip()],
+            "comment": " ".join(comment.split()),
+        }
+        current = following
+
+
+def load_aetherhub_data(filepath, columns=AETHERHUB_COLUMNS):
+    """
+    Loads an AetherHub comment export, memory-mapped, into a dict keyed by card
+    name whose values are tuples of the requested AETHERHUB_COLUMNS (in that
+    order). Comments are only decoded when "Comment" is requested.
+    """
+    aetherhub_data = {}
     if not filepath:
-        return card_names
+        return aetherhub_data
+    values = {
+        "AI_Rating": lambda record: record["ai_rating"],
+        "Pro_Rating": lambda record: record["pro_rating"],
+        "Comment": lambda record: record["comment"] or "N/A",
+    }
+    getters = [values[column] for column in columns]
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                card_names.add(line.strip())
-        print(f"Successfully loaded {len(card_names)} card names from {filepath}")
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                print(f"Info: AetherHub file is empty: {filepath}")
+                return aetherhub_data
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for record in iter_aetherhub_records(buffer, comments="Comment" in columns):
+                    aetherhub_data[record["name"]] = tuple(getter(record) for getter in getters)
+        print(f"Successfully loaded {len(aetherhub_data)} AetherHub records from {filepath}")
     except FileNotFoundError:
         print(f"Info: AetherHub file not found: {filepath}")
     except Exception as e:
         print(f"Error loading AetherHub file {filepath}: {e}")
-    return card_names
+    return aetherhub_data
+
+class AetherHubSource(card_sources.Source):
+    """
+    The AetherHub comment export. Its columns are fixed (AETHERHUB_COLUMNS) and
+    listed in the merged output even for sets without an export.
+    """
+
+    always_listed = True
+
+    def columns(self, path):
+        return list(AETHERHUB_COLUMNS)
+
+    def load(self, path, columns):
+        return load_aetherhub_data(path, columns)
+
+
+# Sources joined onto the Scryfall export by card name, in merged column order;
+# each source's flag column, if it has one, follows all the source columns
+SOURCES = [
+    AetherHubSource("AetherHub", find_aetherhub_file, prefix="AH_", flag="In_AetherHub_List"),
+    card_sources.CsvSource("17Lands", find_lands_file, prefix="17L_"),
+]
+
+# The merged columns the front end reads (public/js/card-data.js, build_card_bundle.py)
+FRONT_END_COLUMNS = ["Name", "Image URL", "AH_Pro_Rating", "AH_Comment", "17L_GIH WR"]
+# Named projections for --columns. "analysis" adds what card_metrics derives
+# from and card_database indexes
+COLUMN_PRESETS = {
+    "front-end": FRONT_END_COLUMNS,
+    "analysis": list(dict.fromkeys(
+        FRONT_END_COLUMNS
+        + [column for column, _ in card_database.KEY_COLUMNS.values()]
+        + [card_metrics.GIH_GAMES_COLUMN, card_metrics.IWD_COLUMN, card_metrics.RARITY_COLUMN, card_metrics.COLOR_COLUMN]
+    )),
+}
+
+
+def get_source(name):
+    """The entry of SOURCES called `name` ("17Lands")."""
+    return next(source for source in SOURCES if source.name == name)
+
+
+def parse_columns(value):
+    """
+    Turns a --columns value into a list of merged column names: a preset name
+    from COLUMN_PRESETS or a comma-separated list. "all" (or nothing) gives
+    None, meaning every column of every source.
+    """
+    if not value or value.strip().lower() == "all":
+        return None
+    if value.strip().lower() in COLUMN_PRESETS:
+        return list(COLUMN_PRESETS[value.strip().lower()])
+    columns = [column.strip() for column in value.split(",") if column.strip()]
+    return list(dict.fromkeys(["Name"] + columns)) # The join key is always kept
+
+
+def load_sources(directory, set_code, columns=None):
+    """
+    Finds and loads every registered source of a set, reading only the columns
+    the projection needs from each.
+
+    Returns:
+        list: card_sources.LoadedSource per entry of SOURCES, in order.
+    """
+    loaded_sources = []
+    for source in SOURCES:
+        path = source.find(directory, set_code)
+        if not path:
+            print(f"No {source.name} data file found for set {set_code} in {directory}.")
+            loaded_sources.append(card_sources.load_source(source, None, columns))
+            continue
+        print(f"Loading {source.name} data from: {path}")
+        try:
+            with span(f"load_{source.name.lower()}"):
+                loaded = card_sources.load_source(source, path, columns)
+        except Exception as e:
+            print(f"Error loading {source.name} file {path}: {e}")
+            loaded = card_sources.load_source(source, None, columns)
+        count(f"{source.name.lower()}_records", len(loaded.records))
+        if loaded.records:
+            print(f"Loaded {len(loaded.records)} records from {source.name} ({len(loaded.columns)} column(s)).")
+        else:
+            print(f"Could not effectively load or key {source.name} data from {path}.")
+        loaded_sources.append(loaded)
+    return loaded_sources
+
+
+def ingest_lands_history(directory, lands_filepaths):
+    """
+    Adds every 17Lands export of a set to its snapshot history
+    (lands_history.LandsHistory), read through the 17Lands entry of SOURCES;
+    exports ingested before are skipped by hash, before being read. The
+    history keeps every column, whatever the merge projects.
+
+    Args:
+        directory (str): The set directory.
+        lands_filepaths (list): The exports, oldest first (find_lands_files).
+
+    Returns:
+        int: The number of changed rows stored.
+    """
+    history = lands_history.LandsHistory.open(directory)
+    lands_source = get_source("17Lands")
+    stored = 0
+    for filepath in lands_filepaths:
+        stored += history.ingest(filepath, lands_source)
+    if stored:
+        print(f"Stored {stored} changed 17Lands row(s) in {history.path} ({len(history.dates())} snapshot date(s)).")
+    return stored
 
-# --- Main Logic ---
 
-def main():
-    set_code = input("Enter the three-letter MTG set code (e.g., MKM, WOE): ").strip().lower()
-    if not set_code:
-        print("No set code entered. Exiting.")
-        return
+# --- Main Logic ---
 
-    set_specific_data_path = os.path.join(BASE_DATA_PATH, set_code)
+def augment_set(set_code, base_data_path=BASE_DATA_PATH, fingerprint=None, columns=None):
+    """
+    Merges the Scryfall export of one set directory with every registered
+    source (SOURCES: AetherHub, 17Lands) and writes the combined CSV, then
+    records the build in the set's manifest.
+
+    Runs in a worker process when several sets are built, so instead of
+    printing per-card misses it returns them for the consolidated report.
+
+    Args:
+        set_code (str): The set to build.
+        base_data_path (str): Directory containing the per-set directories.
+        fingerprint (dict): Input fingerprint from check_set_freshness, if the
+            caller already computed it.
+        columns (list): The merged columns to produce (see parse_columns);
+            None for every column of every source.
+
+    Returns:
+        dict: 'set_code', 'ok', 'skipped', 'message', 'output', 'cards',
+              'joins' (source name -> match counts per method, the
+              inexact matches and the Scryfall names not found there) and
+              'timings' (stage -> seconds).
+    """
+    with span("augment_set", set_code=set_code.lower()):
+        return _augment_set(set_code.lower(), base_data_path, fingerprint, columns)
+
+
+def _augment_set_traced(set_code, base_data_path, fingerprint, columns=None):
+    """
+    augment_set for a worker process while tracing: records into the worker's
+    own tracer and returns its spans and counters in report['trace'] for the
+    parent to merge.
+    """
+    TRACER.enable()
+    report = augment_set(set_code, base_data_path, fingerprint, columns)
+    report["trace"] = TRACER.export()
+    TRACER.disable()
+    return report
+
+
+def _augment_set(set_code, base_data_path, fingerprint, columns):
+    started = time.perf_counter()
+    report = {
+        "set_code": set_code,
+        "ok": False,
+        "skipped": False,
+        "message": "",
+        "output": None,
+        "cards": 0,
+        "joins": {},
+        "timings": {},
+    }
+
+    def finish(ok, message):
+        report["ok"] = ok
+        report["message"] = message
+        report["timings"]["total"] = time.perf_counter() - started
+        return report
+
+    set_specific_data_path = os.path.join(base_data_path, set_code)
 
     if not os.path.isdir(set_specific_data_path):
         print(f"Error: Set-specific data directory not found: {set_specific_data_path}")
         print("Please ensure you have run 'fetch_cards_from_scryfall.py' for this set first,")
         print("or that the directory structure is correct.")
-        return
+        return finish(False, f"Set directory not found: {set_specific_data_path}")
 
     print(f"Operating in set directory: {set_specific_data_path}")
 
-    # 1. Load Scryfall Data
+    # 1. Open Scryfall Data (streamed row by row during the merge)
     scryfall_file = os.path.join(set_specific_data_path, SCRYFALL_EXPORT_FILENAME_TEMPLATE.format(set_code=set_code))
     print(f"Looking for Scryfall data: {scryfall_file}")
-    scryfall_cards = load_csv_to_dict(scryfall_file, key_column=None) # Load as list of dicts
-    if not scryfall_cards:
+    with span("read_scryfall_header"):
+        try:
+            scryfall_fields = card_sources.read_header(scryfall_file)
+        except OSError as e:
+            print(f"Error reading {scryfall_file}: {e}")
+            scryfall_fields = []
+    if not scryfall_fields or "Name" not in scryfall_fields:
         print(f"Could not load Scryfall data from {scryfall_file}. Exiting.")
-        return
-    print(f"Loaded {len(scryfall_cards)} cards from Scryfall export.")
-
-    # 2. Load 17Lands Data
-    lands_file_pattern_1 = LANDS_FILENAME_TEMPLATE_PATTERN_1.format(set_code=set_code.upper()) # Some patterns use uppercase
-    lands_file_pattern_2 = LANDS_FILENAME_TEMPLATE_PATTERN_2.format(set_code=set_code)
-
-    lands_filepath = find_file(set_specific_data_path, lands_file_pattern_1)
-    if not lands_filepath:
-        print(f"17Lands file not found with pattern {lands_file_pattern_1}. Trying alternative pattern...")
-        lands_filepath = find_file(set_specific_data_path, lands_file_pattern_2)
-
-    seventeen_lands_data = {}
-    if lands_filepath:
-        print(f"Loading 17Lands data from: {lands_filepath}")
-        # Attempt to identify the correct card name column. Common names are "Name", "Card", "Card Name".
-        # For simplicity, we'll try "Name" first. This might need to be more robust.
-        temp_lands_data_list = load_csv_to_dict(lands_filepath, key_column=None)
-        if temp_lands_data_list and isinstance(temp_lands_data_list, list) and temp_lands_data_list:
-            # Determine the most likely name column
-            header = temp_lands_data_list[0].keys()
-            name_col = "Name" # Default
-            if "Card Name" in header:
-                name_col = "Card Name"
-            elif "Card" in header: # Less specific, but a common fallback
-                name_col = "Card"
-            
-            seventeen_lands_data = {row[name_col]: row for row in temp_lands_data_list if name_col in row}
-            print(f"Loaded {len(seventeen_lands_data)} records from 17Lands, using '{name_col}' as card name column.")
-        elif isinstance(temp_lands_data_list, dict): # if load_csv_to_dict somehow returned a dict
-             seventeen_lands_data = temp_lands_data_list
-             print(f"Loaded {len(seventeen_lands_data)} records from 17Lands (already keyed).")
-        else:
-            print(f"Could not effectively load or key 17Lands data from {lands_filepath}.")
-    else:
-        print(f"No 17Lands data file found for set {set_code} in {set_specific_data_path}.")
+        return finish(False, f"Could not load Scryfall data from {scryfall_file}")
+
+    # 2. Add every 17Lands export to the history (the newest one is merged)
+    lands_filepaths = find_lands_files(set_specific_data_path, set_code)
+    if lands_filepaths:
+        with span("ingest_17lands_history"):
+            stored = ingest_lands_history(set_specific_data_path, lands_filepaths)
+        count("17lands_history_rows", stored)
+
+    # 3. Load the projected columns of every source (17Lands, AetherHub, ...)
+    loaded_sources = load_sources(set_specific_data_path, set_code, columns)
+
+    with span("build_name_indexes"):
+        aliases = load_aliases(
+            os.path.join(base_data_path, ALIASES_FILENAME),
+            os.path.join(set_specific_data_path, ALIASES_FILENAME),
+        )
+        for loaded in loaded_sources:
+            loaded.build_index(aliases)
+
+    report["timings"]["load"] = time.perf_counter() - started
+
+    # 4. Merge and Save Combined Data in a single streaming pass
+    merge_started = time.perf_counter()
+    joins = {loaded.source.name: new_join_report() for loaded in loaded_sources if loaded.records}
+    projected_fields = scryfall_fields if columns is None else [field for field in scryfall_fields if field in columns]
+    fieldnames = card_sources.output_fieldnames(projected_fields, loaded_sources, columns)
+    if columns is not None:
+        unknown = [column for column in columns if column not in fieldnames]
+        if unknown:
+            print(f"Warning: requested column(s) not found in any source for {set_code}: {', '.join(unknown)}")
 
+    output_filepath = os.path.join(set_specific_data_path, OUTPUT_FILENAME_TEMPLATE.format(set_code=set_code))
+    database_filepath = card_database.database_path(base_data_path)
+    print(f"\nLoading combined data into: {database_filepath}")
+    try:
+        conn = card_database.connect(database_filepath)
+        try:
+            with span("merge_and_upsert"), \
+                    open(scryfall_file, 'r', newline='', encoding='utf-8-sig') as scryfall_csv:
+                _, scryfall_rows = card_sources.iter_projected_rows(scryfall_csv, None if columns is None else projected_fields)
+                merged_rows = card_sources.iter_joined_rows(scryfall_rows, loaded_sources, joins)
+                card_count = card_database.replace_set(conn, set_code, fieldnames, merged_rows)
+            if card_count:
+                # The CSV the front end reads is an export of the database
+                print(f"Exporting combined data to: {output_filepath}")
+                with span("export_csv"):
+                    card_database.export_set_csv(conn, set_code, output_filepath)
+        finally:
+            conn.close()
+    except (sqlite3.Error, IOError) as e:
+        print(f"Error writing combined data: {e}")
+        return finish(False, f"Error writing combined data: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred while writing combined data: {e}")
+        return finish(False, f"An unexpected error occurred while writing combined data: {e}")
 
-    # 3. Load AetherHub Data
-    aetherhub_file_pattern = AETHERHUB_FILENAME_TEMPLATE_PATTERN.format(set_code=set_code.upper())
-    aetherhub_filepath = find_file(set_specific_data_path, aetherhub_file_pattern)
-    aetherhub_card_names = set()
-    if aetherhub_filepath:
-        print(f"Loading AetherHub data from: {aetherhub_filepath}")
-        aetherhub_card_names = load_aetherhub_data(aetherhub_filepath)
+    if not card_count:
+        print("\nNo combined data to save.")
+        return finish(False, "No combined data to save")
+
+    print(f"Successfully saved combined data for {card_count} cards.")
+    count("rows_merged", card_count)
+    for source, join_report in joins.items():
+        for method, matched in join_report["matched"].items():
+            count(f"join_{source}_{method}", matched)
+        count(f"join_{source}_missing", len(join_report["missing"]))
+        count(f"join_{source}_suggested", len(join_report["suggestions"]))
+    report["timings"]["merge"] = time.perf_counter() - merge_started
+
+    # 5. Build the typed columnar store from the merged CSV
+    if card_columns.np is not None:
+        columns_started = time.perf_counter()
+        columns_dir = os.path.join(set_specific_data_path, card_columns.COLUMNS_DIRNAME_TEMPLATE.format(set_code=set_code))
+        try:
+            with span("write_columns"):
+                card_columns.write_set_columns(output_filepath, columns_dir, set_code)
+            print(f"Wrote columnar store to: {columns_dir}")
+        except Exception as e:
+            print(f"Error writing columnar store for {set_code}: {e}")
+            return finish(False, f"Error writing columnar store: {e}")
+        report["timings"]["columns"] = time.perf_counter() - columns_started
     else:
-        print(f"No AetherHub data file found for set {set_code} in {set_specific_data_path}.")
-
-
-    # 4. Merge Data
-    combined_data = []
-    scryfall_cards_not_in_17lands = []
-    scryfall_cards_not_in_aetherhub = []
-
-    # Determine all possible fieldnames for the output CSV
-    # Start with Scryfall fields, then add 17Lands fields (if any) and AetherHub flag
-    all_fieldnames = list(scryfall_cards[0].keys()) if scryfall_cards else []
-    
-    if seventeen_lands_data:
-        # Get fieldnames from the first record in 17Lands data, excluding the name column used for merging
-        # This assumes all 17Lands records have the same structure
-        sample_17lands_record = next(iter(seventeen_lands_data.values()), None)
-        if sample_17lands_record:
-            for key in sample_17lands_record.keys():
-                if key not in all_fieldnames: # Add only new columns
-                    all_fieldnames.append(key)
-    
-    if "In_AetherHub_List" not in all_fieldnames:
-         all_fieldnames.append("In_AetherHub_List")
-
-
-    for scryfall_card in scryfall_cards:
-        card_name = scryfall_card.get("Name")
-        if not card_name:
-            continue # Should not happen if Scryfall data is clean
-
-        merged_record = {**scryfall_card} # Start with Scryfall data
-
-        # Augment with 17Lands data
-        if seventeen_lands_data:
-            lands_card_data = seventeen_lands_data.get(card_name)
-            if lands_card_data:
-                for key, value in lands_card_data.items():
-                    if key != "Name": # Avoid duplicating the name column, or use a prefix
-                        merged_record[f"17L_{key}"] = value # Prefix to avoid clashes and identify source
-            else:
-                scryfall_cards_not_in_17lands.append(card_name)
-        
-        # Augment with AetherHub presence
-        if aetherhub_card_names:
-            merged_record["In_AetherHub_List"] = card_name in aetherhub_card_names
-            if not merged_record["In_AetherHub_List"]:
-                scryfall_cards_not_in_aetherhub.append(card_name)
-        else: # If no Aetherhub file was loaded
-            merged_record["In_AetherHub_List"] = False # Default to false
-
-        combined_data.append(merged_record)
-
-    # Adjust all_fieldnames to include prefixed 17L columns if they were added
-    if seventeen_lands_data and combined_data:
-        potential_17l_prefixes = {f"17L_{key}" for key in next(iter(seventeen_lands_data.values()), {}).keys() if key != "Name"}
-        # Remove non-prefixed 17L keys if they were added naively before
-        all_fieldnames = [fn for fn in all_fieldnames if not (fn in potential_17l_prefixes and not fn.startswith("17L_"))]
-        # Add all actual keys from the combined data to ensure all are captured
-        current_keys = set()
-        for record in combined_data:
-            current_keys.update(record.keys())
-        all_fieldnames = list(dict.fromkeys(all_fieldnames + sorted(list(current_keys)))) # Maintain order and add new ones
-
-
-    # 5. Report Missing Cards
-    if seventeen_lands_data: # Only report if we tried to load 17Lands data
-        if scryfall_cards_not_in_17lands:
-            print(f"\n--- {len(scryfall_cards_not_in_17lands)} Scryfall cards NOT found in 17Lands data for {set_code.upper()} ---")
-            for name in scryfall_cards_not_in_17lands:
-                print(name)
-        else:
-            print(f"\nAll Scryfall cards found in 17Lands data for {set_code.upper()} (or no 17Lands data loaded).")
-
-    if aetherhub_card_names: # Only report if we tried to load AetherHub data
-        if scryfall_cards_not_in_aetherhub:
-            print(f"\n--- {len(scryfall_cards_not_in_aetherhub)} Scryfall cards NOT found in AetherHub list for {set_code.upper()} ---")
-            # Only print those that were also not found in 17lands if 17lands was processed
-            # This avoids printing names multiple times if they are missing from both.
-            # However, the current lists are independent.
-            for name in scryfall_cards_not_in_aetherhub:
-                 print(name) # This might duplicate names if also missing from 17Lands
-        else:
-            print(f"\nAll Scryfall cards accounted for in AetherHub list for {set_code.upper()} (or no AetherHub data loaded).")
+        print("NumPy is not installed; skipping the columnar store.")
 
-    # 6. Save Combined Data
-    if not combined_data:
-        print("\nNo combined data to save.")
+    # 6. Collect Join Results (printed in the consolidated report)
+    report["joins"] = joins
+    report["output"] = output_filepath
+    report["cards"] = card_count
+
+    try:
+        if fingerprint is None:
+            fingerprint = fingerprint_inputs(find_set_inputs(set_specific_data_path, set_code))
+        save_manifest(set_specific_data_path, {
+            "schema_version": OUTPUT_SCHEMA_VERSION,
+            "inputs": fingerprint,
+            "columns": columns,
+            "output": os.path.basename(output_filepath),
+            "cards": card_count,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        })
+    except OSError as e:
+        print(f"Warning: could not write build manifest for {set_code}: {e}")
+    return finish(True, f"Saved {card_count} cards")
+
+
+def skipped_report(set_code):
+    """Report for a set whose inputs and output are unchanged since its last build."""
+    return {
+        "set_code": set_code,
+        "ok": True,
+        "skipped": True,
+        "message": "Up to date",
+        "output": None,
+        "cards": 0,
+        "joins": {},
+        "timings": {},
+    }
+
+
+def augment_sets(set_codes, base_data_path=BASE_DATA_PATH, max_workers=None, force=False, columns=None):
+    """
+    Runs augment_set for every set code whose inputs changed since its last
+    build (or every set with `force`), in a process pool when more than one
+    needs building. Freshness is checked here, in the parent process, so a
+    no-op run never starts a worker. Returns the reports in the order of
+    `set_codes`.
+    """
+    reports = {}
+    stale = []
+    for set_code in set_codes:
+        up_to_date, fingerprint = check_set_freshness(set_code, base_data_path, columns)
+        if up_to_date and not force:
+            reports[set_code] = skipped_report(set_code)
+        else:
+            stale.append((set_code, fingerprint))
+
+    if len(stale) == 1 or max_workers == 1:
+        for set_code, fingerprint in stale:
+            reports[set_code] = augment_set(set_code, base_data_path, fingerprint, columns)
+    elif stale:
+        worker = _augment_set_traced if TRACER.enabled else augment_set
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                set_code: executor.submit(worker, set_code, base_data_path, fingerprint, columns)
+                for set_code, fingerprint in stale
+            }
+            for set_code, future in futures.items():
+                reports[set_code] = future.result()
+                TRACER.merge(reports[set_code].pop("trace", None))
+    return [reports[set_code] for set_code in set_codes]
+
+
+def refresh_derived_metrics(base_data_path=BASE_DATA_PATH):
+    """
+    Recomputes the derived metrics of the whole archive after a build. They
+    are computed across all sets at once (grades are calibrated on every
+    set's pro ratings), so one rebuilt set means recomputing them all.
+    """
+    if card_metrics.np is None:
+        return
+    started = time.perf_counter()
+    with span("derive_metrics"):
+        graded = card_metrics.derive_archive(base_data_path)
+    print(f"\nDerived metrics for {len(graded)} set(s) in {time.perf_counter() - started:.3f}s.")
+
+
+def refresh_bundles(set_codes, base_data_path=BASE_DATA_PATH, columns=None):
+    """
+    Rebuilds the front-end bundles (<set>_cards.json, see build_card_bundle.py)
+    of the sets just built, which the site loads instead of the merged CSV.
+    Skipped, with a warning, when the projection leaves out columns the
+    bundle is made from.
+    """
+    if not set_codes:
+        return
+    if columns is not None and not set(FRONT_END_COLUMNS) <= set(columns):
+        print(f"\nNot rebuilding the card bundles of {', '.join(code.upper() for code in set_codes)}: "
+              f"--columns leaves out {', '.join(sorted(set(FRONT_END_COLUMNS) - set(columns)))}. "
+              "Run build_card_bundle.py after a full build.")
         return
+    print()
+    with span("build_bundles"):
+        build_card_bundle.build_bundles(set_codes, base_data_path)
+
+
+def watch(set_codes, base_data_path=BASE_DATA_PATH, max_workers=None, interval=DEFAULT_WATCH_INTERVAL, quiet=False, columns=None):
+    """
+    Polls the data directories every `interval` seconds and rebuilds only the
+    sets whose inputs changed (new 17Lands export, AetherHub file, etc.).
+    New set directories are picked up unless an explicit list was given.
+    Runs until interrupted.
+    """
+    print(f"Watching {base_data_path} every {interval:g}s. Press Ctrl+C to stop.")
+    try:
+        while True:
+            current_codes = set_codes or discover_set_codes(base_data_path)
+            reports = augment_sets(current_codes, base_data_path, max_workers, columns=columns)
+            built = [report for report in reports if not report["skipped"]]
+            if built:
+                print_report(built, quiet)
+                refresh_derived_metrics(base_data_path)
+                refresh_bundles([report["set_code"] for report in built if report["ok"]], base_data_path, columns)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def print_report(reports, quiet=False):
+    """
+    Prints the consolidated join and timing report for all sets. With `quiet`
+    only the number of inexact, missing and suggested cards is printed, not
+    the cards.
+    """
+    print("\n=== Augment report ===")
+    for report in reports:
+        set_label = report["set_code"].upper()
+        for source, join_report in report["joins"].items():
+            if join_report["inexact"]:
+                print(f"\n--- {len(join_report['inexact'])} Scryfall cards matched inexactly in {source} data for {set_label} ---")
+                if not quiet:
+                    for match in join_report["inexact"]:
+                        print(f"{match['name']} -> {match['matched']} ({match['method']})")
+            if join_report["missing"]:
+                print(f"\n--- {len(join_report['missing'])} Scryfall cards NOT found in {source} data for {set_label} ---")
+                if not quiet:
+                    for name in join_report["missing"]:
+                        print(name)
+                suggestions = join_report.get("suggestions", [])
+                if suggestions:
+                    print(f"\n--- {len(suggestions)} of them have a similar name in {source} data; to join one, "
+                          f"add an Alias,Name row to {ALIASES_FILENAME} ---")
+                    if not quiet:
+                        for match in suggestions:
+                            print(f"{match['name']} ~ {match['suggestion']} ({match['similarity']:.2f})")
+            else:
+                print(f"\nAll Scryfall cards found in {source} data for {set_label}.")
+
+    print("\n=== Summary ===")
+    print(f"{'Set':<6} {'Status':<7} {'Cards':>6} {'Load':>8} {'Merge':>8} {'Total':>8}  Missing")
+    for report in reports:
+        timings = report["timings"]
+        columns = [f"{timings[stage]:7.3f}s" if stage in timings else f"{'-':>8}" for stage in ("load", "merge", "total")]
+        missing = ", ".join(f"{source} {len(join_report['missing'])}" for source, join_report in report["joins"].items()) or "-"
+        status = "fresh" if report["skipped"] else "ok" if report["ok"] else "FAILED"
+        print(f"{report['set_code'].upper():<6} {status:<7} {report['cards']:>6} {' '.join(columns)}  {missing}")
+        if not report["ok"]:
+            print(f"       {report['message']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge Scryfall, 17Lands and AetherHub data for one or more set directories."
+    )
+    parser.add_argument(
+        "set_codes", nargs="*",
+        help="Set codes to build (e.g. tdm dft). Defaults to every set directory with a Scryfall export."
+    )
+    parser.add_argument(
+        "--data-dir", default=BASE_DATA_PATH,
+        help="Directory containing the per-set data directories (default: public/assets/data)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Number of worker processes (default: one per CPU)."
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Rebuild every set even if its inputs are unchanged since the last build."
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Keep running and rebuild a set whenever one of its input files changes."
+    )
+    parser.add_argument(
+        "--interval", type=float, default=DEFAULT_WATCH_INTERVAL,
+        help=f"Seconds between scans in --watch mode (default: {DEFAULT_WATCH_INTERVAL:g})."
+    )
+    parser.add_argument(
+        "--columns", default="all",
+        help="Merged columns to produce: \"all\" (default), a preset (" + ", ".join(COLUMN_PRESETS)
+             + ") or a comma-separated list such as \"Name,AH_Pro_Rating,17L_GIH WR\". "
+             "Only the columns needed are read from each source."
+    )
+    parser.add_argument(
+        "--report-json",
+        help="Also write the per-set reports (join matches, misses, timings) to this JSON file."
+    )
+    parser.add_argument(
+        "--trace",
+        help="Record timing spans, counters (rows, join matches and misses per source) and peak memory "
+             "to this file: Chrome trace format, or a JSON summary if the name ends in .summary.json."
+    )
+    parser.add_argument(
+        "--quiet", action="store_true",
+        help="Only count inexact and missing cards in the report instead of listing each one."
+    )
+    return parser.parse_args(argv)
 
-    output_filepath = os.path.join(set_specific_data_path, OUTPUT_FILENAME_TEMPLATE.format(set_code=set_code))
-    print(f"\nSaving combined data for {len(combined_data)} cards to: {output_filepath}")
+
+def main():
+    args = parse_args()
+    if not args.trace:
+        run(args)
+        return
+    TRACER.enable()
     try:
-        with open(output_filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            # Ensure all_fieldnames are robustly generated from the actual data if there were issues
-            if not all_fieldnames and combined_data: # Fallback if pre-generation failed
-                 all_fieldnames = list(combined_data[0].keys())
-                 for record in combined_data[1:]:
-                     for key in record.keys():
-                         if key not in all_fieldnames:
-                             all_fieldnames.append(key)
-
-
-            writer = csv.DictWriter(csvfile, fieldnames=all_fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            writer.writerows(combined_data)
-        print("Successfully saved combined data.")
-    except IOError as e:
-        print(f"Error writing combined data to CSV: {e}")
-    except Exception as e:
-        print(f"An unexpected error occurred while writing combined data: {e}")
+        with span("augment_scryfall_data"):
+            run(args)
+    finally:
+        TRACER.write(args.trace)
+        print(f"Wrote trace to {args.trace}")
+
+
+def run(args):
+    """Runs the build described by the parsed command-line arguments."""
+    set_codes = [code.strip().lower() for code in args.set_codes if code.strip()]
+    columns = parse_columns(args.columns)
+    if args.watch:
+        watch(set_codes, args.data_dir, args.workers, args.interval, args.quiet, columns)
+        return
+    if not set_codes:
+        set_codes = discover_set_codes(args.data_dir)
+        if not set_codes:
+            print(f"No set directories with a Scryfall export found in {args.data_dir}. Exiting.")
+            sys.exit(1)
+        print(f"Discovered {len(set_codes)} set(s): {', '.join(code.upper() for code in set_codes)}")
+
+    started = time.perf_counter()
+    reports = augment_sets(set_codes, args.data_dir, args.workers, args.force, columns)
+    print_report(reports, args.quiet)
+    rebuilt = [report["set_code"] for report in reports if report["ok"] and not report["skipped"]]
+    if rebuilt:
+        refresh_derived_metrics(args.data_dir)
+        refresh_bundles(rebuilt, args.data_dir, columns)
+    if args.report_json:
+        with open(args.report_json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+    built = sum(report["ok"] and not report["skipped"] for report in reports)
+    skipped = sum(report["skipped"] for report in reports)
+    print(f"\nBuilt {built} of {len(reports)} set(s), {skipped} up to date, in {time.perf_counter() - started:.2f}s.")
+
+    if not all(report["ok"] for report in reports):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,748 @@
+import argparse
+import contextlib
+import csv
+import gc
+import http.server
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+
+import augment_scryfall_data as augment
+import card_columns
+import card_database
+import card_metrics
+import card_sources
+import fetch_cards_from_scryfall as fetcher
+
+# --- Configuration ---
+SCRIPTS_PATH = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(SCRIPTS_PATH, "benchmark_baseline.json")
+DEFAULT_OUTPUT_PATH = os.path.abspath(os.path.join(SCRIPTS_PATH, "..", "benchmark_results.json"))
+
+# Bump whenever the synthetic data changes, so old baselines are not compared.
+# New stages need no bump: they are reported as unmeasured until the baseline
+# is re-recorded (in a commit of its own, saying why)
+BENCHMARK_FORMAT_VERSION = 1
+
+# Card counts benchmarked by default; the generators scale to any size, e.g.
+# --sizes 300,3000,30000,100000 (the 100k run takes several minutes)
+DEFAULT_SIZES = [300, 3000, 30000]
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 1234
+BENCHMARK_SET_CODE = "bch"
+
+# Scryfall returns up to 175 cards per search page
+CARDS_PER_PAGE = 175
+
+# Share of the synthetic cards that also appear in the 17Lands / AetherHub exports
+LANDS_COVERAGE = 0.95
+AETHERHUB_COVERAGE = 0.9
+# Share of the cards that are double-faced ("Front // Back")
+DOUBLE_FACED_SHARE = 0.05
+
+# A stage regresses when it is slower than the baseline by more than the
+# tolerance AND by more than the absolute floor (which filters timer noise
+# on the small sizes); peak memory is compared the same way
+DEFAULT_TIME_TOLERANCE = 0.25
+MIN_TIME_REGRESSION = 0.005
+DEFAULT_MEMORY_TOLERANCE = 0.25
+MIN_MEMORY_REGRESSION = 1024 * 1024
+
+# Queries per round of the db_query stage (each round runs three lookups)
+DB_QUERY_ROUNDS = 100
+
+# Stages that must scale linearly with the set size: between the smallest
+# and the largest size benchmarked, their time may grow at most like
+# size ** MAX_SCALING_EXPONENT (a quadratic scan shows up as 2; the slack
+# above 1 absorbs the cache effects of larger dicts)
+SCALING_STAGES = ["join", "merge"]
+MAX_SCALING_EXPONENT = 1.25
+
+# Card names are built from invented words so that large sets keep a realistic
+# spread of character trigrams (a small fixed vocabulary would make every
+# name look alike to the fuzzy name matcher)
+_SYLLABLES = [
+    "ka", "vor", "eth", "ul", "dra", "mir", "zen", "thal", "os", "ri", "gan", "bel", "sha", "kor", "vex",
+    "ian", "lo", "tum", "gra", "fen", "ys", "qua", "nod", "per", "shi", "ar", "wyn", "cal", "dûn", "hex",
+    "bri", "cy", "dor", "el", "fa", "gol", "hy", "ix", "jor", "kle", "lum", "mo", "nyx", "orr", "pyr",
+    "rak", "sel", "tyr", "und", "vi", "wes", "xa", "yor", "zu", "ash", "bro", "cre", "del", "esk", "fro",
+    "gli", "hal", "isk", "jun", "kav", "lir", "mek", "nar", "oth", "pla", "rho", "sky", "tor", "urz", "vol",
+]
+_TITLES = [
+    "Acolyte", "Behemoth", "Champion", "Drake", "Envoy", "Familiar", "Guardian", "Herald", "Invoker", "Juggernaut",
+    "Knight", "Leviathan", "Mystic", "Nomad", "Oracle", "Phoenix", "Ranger", "Sentinel", "Tyrant", "Warden",
+    "Bargain", "Charm", "Decree", "Edict", "Fury", "Glimpse", "Vault", "Spire", "Citadel", "Reach",
+]
+_RARITIES = [("common", "C", 0.55), ("uncommon", "U", 0.3), ("rare", "R", 0.12), ("mythic", "M", 0.03)]
+_COLORS = ["W", "U", "B", "R", "G"]
+_WORDS = (
+    "target creature gets until end of turn draw a card then discard whenever another you control enters "
+    "the battlefield each opponent loses life and you gain that much flying trample haste deathtouch "
+    "return it to its owner's hand create a token with counter on it sacrifice an artifact or enchantment"
+).split()
+
+
+# =================================================================================
+# --- Synthetic data ---
+# =================================================================================
+
+def _invented_word(rng):
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def synthetic_card_names(count, seed=DEFAULT_SEED):
+    """
+    Generates `count` distinct card names in the usual shapes ("Name, the
+    Title", "Title of Name", "Name's Title"), some with accents and
+    apostrophes, and DOUBLE_FACED_SHARE of them "Front // Back".
+    """
+    rng = random.Random(seed)
+    names = []
+    seen = set()
+    while len(names) < count:
+        shape = rng.random()
+        if shape < 0.3:
+            name = f"{_invented_word(rng)}, the {rng.choice(_TITLES)}"
+        elif shape < 0.6:
+            name = f"{rng.choice(_TITLES)} of {_invented_word(rng)}"
+        elif shape < 0.8:
+            name = f"{_invented_word(rng)}'s {rng.choice(_TITLES)}"
+        else:
+            name = f"{_invented_word(rng)} {_invented_word(rng)}"
+        if rng.random() < DOUBLE_FACED_SHARE:
+            name = f"{name} // {_invented_word(rng)} {rng.choice(_TITLES)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _choose_rarity(rng):
+    roll = rng.random()
+    for rarity, short, share in _RARITIES:
+        roll -= share
+        if roll < 0:
+            return rarity, short
+    return _RARITIES[0][:2]
+
+
+def synthetic_scryfall_card(name, rng):
+    """One card object shaped like a Scryfall API card."""
+    rarity, _ = _choose_rarity(rng)
+    colors = sorted(rng.sample(_COLORS, rng.choice([0, 1, 1, 1, 2, 2, 3])))
+    text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 40)))
+    card = {
+        "object": "card",
+        "name": name,
+        "set": BENCHMARK_SET_CODE,
+        "rarity": rarity,
+        "color_identity": colors,
+        "type_line": f"Creature — {rng.choice(_TITLES)}",
+    }
+    slug = urllib.parse.quote(name)
+    faces = name.split(" // ")
+    if len(faces) > 1:
+        card["card_faces"] = [
+            {
+                "name": face,
+                "mana_cost": "{2}" + "".join(f"{{{color}}}" for color in colors),
+                "oracle_text": text,
+                "image_uris": {"normal": f"https://cards.example/normal/{slug}-{i}.jpg"},
+            }
+            for i, face in enumerate(faces)
+        ]
+    else:
+        card["mana_cost"] = "{2}" + "".join(f"{{{color}}}" for color in colors)
+        card["oracle_text"] = text
+        card["image_uris"] = {"normal": f"https://cards.example/normal/{slug}.jpg"}
+    return card
+
+
+def synthetic_scryfall_cards(count, seed=DEFAULT_SEED):
+    rng = random.Random(seed + 1)
+    return [synthetic_scryfall_card(name, rng) for name in synthetic_card_names(count, seed)]
+
+
+def synthetic_pages(count, base_url, seed=DEFAULT_SEED):
+    """
+    Scryfall search result pages for `count` synthetic cards, serialized.
+
+    Returns:
+        dict: Page number -> JSON body (bytes).
+    """
+    cards = synthetic_scryfall_cards(count, seed)
+    page_count = max(1, -(-len(cards) // CARDS_PER_PAGE))
+    pages = {}
+    for page in range(1, page_count + 1):
+        body = {
+            "object": "list",
+            "total_cards": len(cards),
+            "has_more": page < page_count,
+            "data": cards[(page - 1) * CARDS_PER_PAGE:page * CARDS_PER_PAGE],
+        }
+        if page < page_count:
+            body["next_page"] = f"{base_url}/cards/search?q=e%3A{BENCHMARK_SET_CODE}&unique=cards&page={page + 1}"
+        pages[page] = json.dumps(body).encode("utf-8")
+    return pages
+
+
+def _percent(rng, low, high):
+    return f"{rng.uniform(low, high):.1f}%"
+
+
+def write_synthetic_lands_csv(path, names, seed=DEFAULT_SEED):
+    """
+    Writes a 17Lands card-ratings export (same header and value formats as the
+    real one, UTF-8 with BOM) covering LANDS_COVERAGE of `names`. Double-faced
+    cards are listed by their front face only, as 17Lands sometimes does.
+    """
+    rng = random.Random(seed + 2)
+    header = ["Name", "Color", "Rarity", "# Seen", "ALSA", "# Picked", "ATA", "# GP", "% GP", "GP WR",
+              "# OH", "OH WR", "# GD", "GD WR", "# GIH", "GIH WR", "# GNS", "GNS WR", "IWD"]
+    with open(path, "w", newline="", encoding="utf-8-sig") as csvfile:
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
+        writer.writerow(header)
+        for name in names:
+            if rng.random() >= LANDS_COVERAGE:
+                continue
+            listed_name = name.split(" // ")[0] if rng.random() < 0.5 else name
+            writer.writerow([
+                listed_name, "".join(rng.sample(_COLORS, rng.choice([0, 1, 2]))), _choose_rarity(rng)[1],
+                rng.randint(100, 50000), f"{rng.uniform(1, 12):.2f}", rng.randint(50, 20000), f"{rng.uniform(1, 12):.2f}",
+                rng.randint(50, 60000), _percent(rng, 5, 99), _percent(rng, 45, 62),
+                rng.randint(20, 10000), _percent(rng, 45, 65), rng.randint(20, 15000), _percent(rng, 45, 65),
+                rng.randint(20, 25000), _percent(rng, 45, 65), rng.randint(20, 30000), _percent(rng, 45, 60),
+                f"{rng.uniform(-8, 12):.1f}pp",
+            ])
+
+
+def write_synthetic_aetherhub_txt(path, names, seed=DEFAULT_SEED):
+    """
+    Writes an AetherHub comment export covering AETHERHUB_COVERAGE of `names`:
+    name line, AI and pro rating lines (a few split ratings), then a comment
+    of one or two paragraphs.
+    """
+    rng = random.Random(seed + 3)
+    grades = [value / 2 for value in range(11)]
+    with open(path, "w", encoding="utf-8") as f:
+        for name in names:
+            if rng.random() >= AETHERHUB_COVERAGE:
+                continue
+            pro_rating = f"{rng.choice(grades):.1f}"
+            if rng.random() < 0.02:
+                pro_rating = f"{pro_rating} // {rng.choice(grades):.1f}"
+            paragraphs = [
+                " ".join(rng.choice(_WORDS) for _ in range(rng.randint(15, 60))).capitalize() + "."
+                for _ in range(rng.choice([1, 1, 2]))
+            ]
+            f.write(f"{name}\nAI Rating: {rng.choice(grades):.1f}\nPro Rating: {pro_rating}\n")
+            f.write("\n\n".join(paragraphs))
+            f.write("\n\n\n")
+
+
+def write_synthetic_bulk_json(path, cards):
+    """Writes cards as a Scryfall bulk-data style JSON array, one object per line."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i, card in enumerate(cards):
+            f.write(json.dumps(card))
+            f.write(",\n" if i < len(cards) - 1 else "\n")
+        f.write("]\n")
+
+
+# =================================================================================
+# --- Stub Scryfall server ---
+# =================================================================================
+
+class _StubScryfallHandler(http.server.BaseHTTPRequestHandler):
+    pages = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        body = self.pages.get(int(query.get("page", ["1"])[0]))
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve_stub(count, seed, port_queue):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StubScryfallHandler)
+    _StubScryfallHandler.pages = synthetic_pages(count, f"http://127.0.0.1:{server.server_port}", seed)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+@contextlib.contextmanager
+def stub_scryfall_server(count, seed=DEFAULT_SEED):
+    """
+    Serves the synthetic search pages of `count` cards from a separate process,
+    so the server's own time and memory are not charged to the fetch stage.
+
+    Yields:
+        str: The base URL to pass as the fetcher's base_url.
+    """
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_stub, args=(count, seed, port_queue), daemon=True)
+    process.start()
+    try:
+        yield f"http://127.0.0.1:{port_queue.get(timeout=120)}"
+    finally:
+        process.terminate()
+        process.join()
+
+
+# =================================================================================
+# --- Stages ---
+# =================================================================================
+
+def stage_fetch(context):
+    """Fetches every synthetic search page through iter_card_pages."""
+    rate_limiter = fetcher.TokenBucket(rate=1e9) # The stub has no rate limit to respect
+    with fetcher.create_session(pool_size=1) as session:
+        pages = fetcher.iter_card_pages(BENCHMARK_SET_CODE, session, rate_limiter, context["base_url"])
+        return sum(len(page) for page in pages)
+
+
+def stage_write_csv(context):
+    """write_cards_to_csv over the fetched card objects."""
+    return fetcher.write_cards_to_csv(context["cards"], context["scryfall_csv"])
+
+
+def stage_bulk_export(context):
+    """export_sets_from_bulk over a bulk-data file of the same cards."""
+    output_dir = os.path.join(context["workdir"], "bulk")
+    return fetcher.export_sets_from_bulk(context["bulk_json"], [BENCHMARK_SET_CODE], lambda code: output_dir)
+
+
+def stage_load_lands(context):
+    """The 17Lands source with every column, as the snapshot history reads it."""
+    source = augment.get_source("17Lands")
+    return len(source.load(context["lands_csv"], source.columns(context["lands_csv"])))
+
+
+def stage_load_aetherhub(context):
+    return len(augment.load_aetherhub_data(context["aetherhub_txt"]))
+
+
+def stage_load_sources(context):
+    """load_sources for every column of every source."""
+    return sum(len(loaded.records) for loaded in augment.load_sources(context["set_dir"], BENCHMARK_SET_CODE))
+
+
+def stage_load_projected(context):
+    """load_sources projected to the front-end columns: the cost of a load should follow the columns read."""
+    loaded_sources = augment.load_sources(context["set_dir"], BENCHMARK_SET_CODE, augment.COLUMN_PRESETS["front-end"])
+    return sum(len(loaded.records) for loaded in loaded_sources)
+
+
+def merge_sources(context, loaded_sources, columns, output_path):
+    """
+    The join and write of augment_set without the loads: NameIndex builds,
+    iter_joined_rows over the streamed Scryfall export, and the CSV writer.
+    """
+    for loaded in loaded_sources:
+        loaded.build_index()
+    joins = {loaded.source.name: card_sources.new_join_report() for loaded in loaded_sources}
+    count = 0
+    with open(context["scryfall_csv"], "r", newline="", encoding="utf-8-sig") as scryfall_csv, \
+            open(output_path, "w", newline="", encoding="utf-8") as output_csv:
+        scryfall_fields, scryfall_rows = card_sources.iter_projected_rows(scryfall_csv, columns)
+        writer = csv.DictWriter(output_csv, fieldnames=card_sources.output_fieldnames(scryfall_fields, loaded_sources, columns), extrasaction="ignore")
+        writer.writeheader()
+        for row in card_sources.iter_joined_rows(scryfall_rows, loaded_sources, joins):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def stage_join(context):
+    """
+    NameIndex builds and a lookup of every Scryfall name in each source,
+    misses and their suggestion search included: the join without any I/O.
+    """
+    names = [card["name"] for card in context["cards"]]
+    matched = 0
+    for loaded in context["sources"]:
+        index = loaded.build_index()
+        join_report = card_sources.new_join_report()
+        for name in names:
+            matched += card_sources.join_record(index, name, join_report) is not None
+    return matched
+
+
+def stage_merge(context):
+    return merge_sources(context, context["sources"], None, context["merged_csv"])
+
+
+def stage_merge_projected(context):
+    """The merge projected to the front-end columns."""
+    return merge_sources(context, context["front_end_sources"], augment.COLUMN_PRESETS["front-end"], context["front_end_csv"])
+
+
+def stage_augment_set(context):
+    """The whole augment_set build: loads, merge, columnar store and manifest."""
+    report = augment.augment_set(BENCHMARK_SET_CODE, context["data_dir"])
+    if not report["ok"]:
+        raise RuntimeError(report["message"])
+    return report["cards"]
+
+
+def stage_db_upsert(context):
+    """Bulk upsert of the merged CSV into the card database, replacing the set's previous load."""
+    conn = card_database.connect(context["database"])
+    try:
+        return card_database.load_merged_csv(conn, BENCHMARK_SET_CODE, context["merged_csv"])
+    finally:
+        conn.close()
+
+
+def stage_db_export(context):
+    """The <set>_data.csv export from the card database."""
+    conn = card_database.connect(context["database"])
+    try:
+        return card_database.export_set_csv(conn, BENCHMARK_SET_CODE, context["exported_csv"])
+    finally:
+        conn.close()
+
+
+def stage_db_query(context):
+    """Indexed cross-set lookups: by rarity and GIH WR, by color, by name (one connection, as a server would)."""
+    conn = card_database.connect(context["database"])
+    try:
+        found = 0
+        for _ in range(DB_QUERY_ROUNDS):
+            found += len(card_database.query_cards(conn, rarity="Uncommon", min_gih_wr=55.0, limit=50))
+            found += len(card_database.query_cards(conn, color_identity="W", min_games=500, limit=50))
+            found += len(card_database.query_cards(conn, name=context["cards"][0]["name"]))
+        return found
+    finally:
+        conn.close()
+
+
+def stage_columns(context):
+    return card_columns.write_set_columns(context["merged_csv"], context["columns_dir"], BENCHMARK_SET_CODE)
+
+
+def stage_metrics(context):
+    store = card_columns.load_set_columns(context["columns_dir"])
+    return len(card_metrics.compute_metrics([store])[0])
+
+
+# Run in this order: the database and columnar store stages read what merge wrote
+STAGES = [
+    ("fetch", stage_fetch, False),
+    ("write_csv", stage_write_csv, False),
+    ("bulk_export", stage_bulk_export, False),
+    ("load_lands", stage_load_lands, False),
+    ("load_aetherhub", stage_load_aetherhub, False),
+    ("load_sources", stage_load_sources, False),
+    ("load_projected", stage_load_projected, False),
+    ("join", stage_join, False),
+    ("merge", stage_merge, False),
+    ("merge_projected", stage_merge_projected, False),
+    ("augment_set", stage_augment_set, False),
+    ("db_upsert", stage_db_upsert, False),
+    ("db_export", stage_db_export, False),
+    ("db_query", stage_db_query, False),
+    ("columns", stage_columns, True),
+    ("metrics", stage_metrics, True),
+]
+
+
+def measure(stage, context, repeat):
+    """
+    Times `repeat` runs of a stage, then runs it once more under tracemalloc
+    for its peak Python heap use (NumPy reports its buffers to tracemalloc
+    too). Output of the pipeline functions is discarded.
+
+    Returns:
+        dict: 'seconds' (best run), 'median_seconds', 'peak_bytes' and 'result'.
+    """
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(max(1, repeat)):
+            gc.collect()
+            started = time.perf_counter()
+            result = stage(context)
+            timings.append(time.perf_counter() - started)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            stage(context)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {"seconds": min(timings), "median_seconds": statistics.median(timings), "peak_bytes": peak, "result": result}
+
+
+def prepare_inputs(size, workdir, seed=DEFAULT_SEED):
+    """Writes the synthetic inputs of one size and returns the stage context."""
+    data_dir = os.path.join(workdir, "data")
+    set_dir = os.path.join(data_dir, BENCHMARK_SET_CODE)
+    os.makedirs(set_dir, exist_ok=True)
+    cards = synthetic_scryfall_cards(size, seed)
+    names = [card["name"] for card in cards]
+    context = {
+        "workdir": workdir,
+        "data_dir": data_dir,
+        "set_dir": set_dir,
+        "cards": cards,
+        "scryfall_csv": os.path.join(set_dir, augment.SCRYFALL_EXPORT_FILENAME_TEMPLATE.format(set_code=BENCHMARK_SET_CODE)),
+        "lands_csv": os.path.join(set_dir, augment.LANDS_FILENAME_TEMPLATE_PATTERN_2.format(set_code=BENCHMARK_SET_CODE)),
+        "aetherhub_txt": os.path.join(set_dir, augment.AETHERHUB_FILENAME_TEMPLATE_PATTERN_2.format(set_code=BENCHMARK_SET_CODE)),
+        "bulk_json": os.path.join(workdir, "bulk.json"),
+        "merged_csv": os.path.join(workdir, "merged.csv"),
+        "front_end_csv": os.path.join(workdir, "merged_front_end.csv"),
+        "columns_dir": os.path.join(workdir, "columns"),
+        "database": os.path.join(workdir, card_database.DATABASE_FILENAME),
+        "exported_csv": os.path.join(workdir, "exported.csv"),
+    }
+    write_synthetic_lands_csv(context["lands_csv"], names, seed)
+    write_synthetic_aetherhub_txt(context["aetherhub_txt"], names, seed)
+    write_synthetic_bulk_json(context["bulk_json"], cards)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fetcher.write_cards_to_csv(cards, context["scryfall_csv"])
+        context["sources"] = augment.load_sources(set_dir, BENCHMARK_SET_CODE)
+        context["front_end_sources"] = augment.load_sources(set_dir, BENCHMARK_SET_CODE, augment.COLUMN_PRESETS["front-end"])
+    return context
+
+
+def run_benchmarks(sizes, repeat=DEFAULT_REPEAT, stages=None, seed=DEFAULT_SEED):
+    """
+    Runs every stage (or those named in `stages`) for each size.
+
+    Returns:
+        dict: 'meta' (environment) and 'results' (size -> stage -> measurement).
+    """
+    results = {}
+    for size in sizes:
+        workdir = tempfile.mkdtemp(prefix=f"mtg-bench-{size}-")
+        try:
+            print(f"\n{size} cards: generating inputs...")
+            context = prepare_inputs(size, workdir, seed)
+            results[str(size)] = {}
+            with stub_scryfall_server(size, seed) as base_url:
+                context["base_url"] = base_url
+                for name, stage, needs_numpy in STAGES:
+                    if stages and name not in stages:
+                        continue
+                    if needs_numpy and card_columns.np is None:
+                        print(f"  {name:<18} skipped (NumPy not installed)")
+                        continue
+                    measurement = measure(stage, context, repeat)
+                    results[str(size)][name] = measurement
+                    print(f"  {name:<18} {measurement['seconds']:9.4f}s  peak {measurement['peak_bytes'] / 1e6:9.2f} MB")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {"meta": environment_info(repeat, seed), "results": results}
+
+
+def environment_info(repeat, seed):
+    return {
+        "version": BENCHMARK_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": getattr(card_columns.np, "__version__", None),
+        "repeat": repeat,
+        "seed": seed,
+    }
+
+
+def compare_to_baseline(current, baseline, time_tolerance=DEFAULT_TIME_TOLERANCE,
+                        memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    """
+    Compares each size/stage measured in both runs.
+
+    Returns:
+        list: One dict per comparison with 'size', 'stage', the baseline and
+              current 'seconds'/'peak_bytes', their ratios and 'regressed'
+              (the list of metrics that got worse beyond the tolerances).
+    """
+    comparisons = []
+    for size, stages in current["results"].items():
+        for stage, measured in stages.items():
+            before = baseline.get("results", {}).get(size, {}).get(stage)
+            if not before:
+                continue
+            regressed = []
+            if (measured["seconds"] > before["seconds"] * (1 + time_tolerance)
+                    and measured["seconds"] - before["seconds"] > MIN_TIME_REGRESSION):
+                regressed.append("time")
+            if (measured["peak_bytes"] > before["peak_bytes"] * (1 + memory_tolerance)
+                    and measured["peak_bytes"] - before["peak_bytes"] > MIN_MEMORY_REGRESSION):
+                regressed.append("memory")
+            comparisons.append({
+                "size": size,
+                "stage": stage,
+                "baseline_seconds": before["seconds"],
+                "seconds": measured["seconds"],
+                "time_ratio": measured["seconds"] / before["seconds"] if before["seconds"] else None,
+                "baseline_peak_bytes": before["peak_bytes"],
+                "peak_bytes": measured["peak_bytes"],
+                "memory_ratio": measured["peak_bytes"] / before["peak_bytes"] if before["peak_bytes"] else None,
+                "regressed": regressed,
+            })
+    return comparisons
+
+
+def check_scaling(current, stages=SCALING_STAGES, max_exponent=MAX_SCALING_EXPONENT):
+    """
+    Fits time ~ size ** exponent for each scaling stage between the smallest
+    and the largest size of a run.
+
+    Returns:
+        list: (stage, {size: seconds per card}, exponent, linear) per stage
+              measured at two sizes or more.
+    """
+    checks = []
+    for stage in stages:
+        per_card = {
+            int(size): results[stage]["seconds"] / int(size)
+            for size, results in current["results"].items() if stage in results
+        }
+        if len(per_card) < 2:
+            continue
+        smallest, largest = min(per_card), max(per_card)
+        exponent = 1 + math.log(per_card[largest] / per_card[smallest]) / math.log(largest / smallest)
+        checks.append((stage, per_card, exponent, exponent <= max_exponent))
+    return checks
+
+
+def print_scaling(checks):
+    for stage, per_card, exponent, linear in checks:
+        costs = ", ".join(f"{seconds * 1e6:.1f}us at {size}" for size, seconds in sorted(per_card.items()))
+        verdict = "linear" if linear else f"NOT LINEAR (above size^{MAX_SCALING_EXPONENT:g})"
+        print(f"Per card, {stage}: {costs}; time ~ size^{exponent:.2f}, {verdict}")
+
+
+def print_comparison(comparisons, current, baseline):
+    meta, baseline_meta = current["meta"], baseline.get("meta", {})
+    for key in ("python", "platform", "numpy"):
+        if meta.get(key) != baseline_meta.get(key):
+            print(f"Note: baseline was recorded with {key} {baseline_meta.get(key)}, this run uses {meta.get(key)}.")
+
+    print(f"\n{'Size':>7}  {'Stage':<18} {'Baseline':>10} {'Current':>10} {'Time':>7} {'Memory':>7}")
+    for comparison in comparisons:
+        time_ratio = f"{comparison['time_ratio']:.2f}x" if comparison["time_ratio"] else "-"
+        memory_ratio = f"{comparison['memory_ratio']:.2f}x" if comparison["memory_ratio"] else "-"
+        flag = f"  REGRESSED ({', '.join(comparison['regressed'])})" if comparison["regressed"] else ""
+        print(f"{comparison['size']:>7}  {comparison['stage']:<18} {comparison['baseline_seconds']:9.4f}s "
+              f"{comparison['seconds']:9.4f}s {time_ratio:>7} {memory_ratio:>7}{flag}")
+
+    compared = {(comparison["size"], comparison["stage"]) for comparison in comparisons}
+    unmeasured = sorted({
+        stage for size, stages in current["results"].items() for stage in stages if (size, stage) not in compared
+    })
+    if unmeasured:
+        print(f"\nNot in the baseline (not compared): {', '.join(unmeasured)}.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the fetch, merge and write stages of the data pipeline on synthetic sets."
+    )
+    parser.add_argument(
+        "--sizes", type=lambda value: [int(size) for size in value.split(",")], default=DEFAULT_SIZES,
+        help=f"Comma-separated card counts (default: {','.join(map(str, DEFAULT_SIZES))})."
+    )
+    parser.add_argument(
+        "--stages", type=lambda value: value.split(","), default=None,
+        help=f"Comma-separated subset of stages to run: {', '.join(name for name, _, _ in STAGES)}."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help=f"Timed runs per stage; the best is reported (default: {DEFAULT_REPEAT})."
+    )
+    parser.add_argument(
+        "--output", default=DEFAULT_OUTPUT_PATH,
+        help="Where to write the results JSON (default: benchmark_results.json in the repository root)."
+    )
+    parser.add_argument(
+        "--baseline", default=DEFAULT_BASELINE_PATH,
+        help="Baseline results to compare against (default: scripts/benchmark_baseline.json)."
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true",
+        help="Store this run as the new baseline instead of comparing against it."
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TIME_TOLERANCE,
+        help=f"Allowed slowdown before a stage counts as regressed (default: {DEFAULT_TIME_TOLERANCE:g} = 25%%)."
+    )
+    parser.add_argument(
+        "--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE,
+        help=f"Allowed peak-memory growth before a stage counts as regressed (default: {DEFAULT_MEMORY_TOLERANCE:g})."
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    unknown = set(args.stages or []) - {name for name, _, _ in STAGES}
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(sorted(unknown))}. Exiting.")
+        sys.exit(1)
+
+    current = run_benchmarks(args.sizes, args.repeat, args.stages)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nWrote results to {args.output}")
+    scaling = check_scaling(current)
+    if scaling:
+        print()
+        print_scaling(scaling)
+    nonlinear = [stage for stage, _, _, linear in scaling if not linear]
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(f"Stored as the new baseline in {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"No usable baseline at {args.baseline} ({e}); run with --update-baseline to record one.")
+        return
+    if baseline.get("meta", {}).get("version") != BENCHMARK_FORMAT_VERSION:
+        print(f"The baseline in {args.baseline} is from another benchmark version; re-record it with --update-baseline.")
+        return
+
+    comparisons = compare_to_baseline(current, baseline, args.tolerance, args.memory_tolerance)
+    print_comparison(comparisons, current, baseline)
+    regressions = [comparison for comparison in comparisons if comparison["regressed"]]
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) regressed against the baseline.")
+    else:
+        print("\nNo regressions against the baseline.")
+    if nonlinear:
+        print(f"{', '.join(nonlinear)} cost more per card as the set grows.")
+    if regressions or nonlinear:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+
+import card_database
+from card_columns import PRO_RATING_GRADES
+
+# --- Configuration ---
+BASE_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "data"))
+MERGED_FILENAME_TEMPLATE = "{set_code}_data.csv" # Written by augment_scryfall_data.py
+BUNDLE_FILENAME_TEMPLATE = "{set_code}_cards.json"
+SET_INDEX_FILENAME = "sets.json"
+IMAGES_PATH = os.path.abspath(os.path.join(BASE_DATA_PATH, "..", "images")) # Written by download_card_images.py
+IMAGES_MANIFEST_FILENAME = "images.json"
+
+# Bump whenever the bundle layout below changes; checked by public/js/card-data.js
+BUNDLE_FORMAT_VERSION = 1
+
+# Field order of each card array in the bundle
+BUNDLE_FIELDS = ["name", "trueGrade", "description", "gihWR", "image"]
+
+BASIC_LAND_NAMES = ["Plains", "Island", "Swamp", "Mountain", "Forest"]
+
+NO_COMMENT_TEXT = "No comment available for this card."
+
+
+def convert_pro_rating_to_grade(rating_string):
+    """
+    Converts an AH_Pro_Rating value to a letter grade; for a split rating
+    ("1.0 // 2.5") the first value is used. Returns "N/A" if there is none.
+    """
+    rating_string = (rating_string or "").strip()
+    if not rating_string or rating_string.upper() == "N/A":
+        return "N/A"
+    numeric_part = rating_string.replace("/", " ").split()[0]
+    try:
+        return PRO_RATING_GRADES.get(float(numeric_part), "N/A")
+    except ValueError:
+        return "N/A"
+
+
+def load_local_images(set_code, images_dir=IMAGES_PATH):
+    """
+    Maps card names to the URL (relative to public/) of their locally stored
+    front image, from the set's images.json. Empty if no images were downloaded.
+    """
+    set_images_dir = os.path.join(images_dir, set_code)
+    try:
+        with open(os.path.join(set_images_dir, IMAGES_MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {
+        name: f"./assets/images/{set_code}/{faces['front']['file']}"
+        for name, faces in manifest.get("cards", {}).items()
+        if "front" in faces and os.path.isfile(os.path.join(set_images_dir, faces["front"]["file"]))
+    }
+
+
+def iter_bundle_cards(rows, local_images=None):
+    """
+    Projects merged rows (from the card database or a <set>_data.csv) down to
+    the fields the front end shows, with the grade and display strings already
+    computed. Basic lands are skipped.
+
+    The image is the locally stored copy from `local_images` if there is one,
+    else Scryfall's direct image URL from the export, else empty (the front end
+    then falls back to a Scryfall name lookup).
+
+    Yields:
+        list: One value per BUNDLE_FIELDS entry.
+    """
+    for row in rows:
+        name = row.get("Name")
+        if not name or name in BASIC_LAND_NAMES:
+            continue
+
+        description = row.get("AH_Comment") or ""
+        if not description or description.upper() == "N/A":
+            description = NO_COMMENT_TEXT
+
+        gih_wr_raw = (row.get("17L_GIH WR") or "").strip()
+        gih_wr = "Win Rate: N/A"
+        if gih_wr_raw and gih_wr_raw.upper() != "N/A":
+            gih_wr = f"Win Rate: {gih_wr_raw}"
+
+        image = (local_images or {}).get(name) or row.get("Image URL") or ""
+
+        yield [name, convert_pro_rating_to_grade(row.get("AH_Pro_Rating")), description, gih_wr, image]
+
+
+def load_set_rows(set_code, base_data_path=BASE_DATA_PATH):
+    """
+    A set's merged rows: from the card database when it holds the set,
+    otherwise from the merged CSV (sets built before the database existed).
+
+    Returns:
+        tuple: (list of row dicts, source description), or (None, None) if neither exists.
+    """
+    database_path = card_database.database_path(base_data_path)
+    if card_database.has_set(database_path, set_code):
+        conn = card_database.connect(database_path)
+        try:
+            return list(card_database.iter_set_rows(conn, set_code)), database_path
+        finally:
+            conn.close()
+    csv_path = os.path.join(base_data_path, set_code, MERGED_FILENAME_TEMPLATE.format(set_code=set_code))
+    if not os.path.isfile(csv_path):
+        return None, None
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as csvfile:
+        return list(csv.DictReader(csvfile)), csv_path
+
+
+def build_set_bundle(set_code, base_data_path=BASE_DATA_PATH, images_dir=IMAGES_PATH):
+    """
+    Writes <set>/<set>_cards.json (minified). Hosting compresses it on the
+    fly, so no pre-compressed copies are written.
+
+    Returns:
+        dict: The set's entry for the set index, or None if the set has no merged CSV.
+    """
+    set_dir = os.path.join(base_data_path, set_code)
+    rows, source = load_set_rows(set_code, base_data_path)
+    if rows is None:
+        print(f"No merged data found for set {set_code.upper()} in the card database or {set_dir}; "
+              "run augment_scryfall_data.py first.")
+        return None
+
+    cards = list(iter_bundle_cards(rows, load_local_images(set_code, images_dir)))
+    bundle = {"version": BUNDLE_FORMAT_VERSION, "set": set_code, "fields": BUNDLE_FIELDS, "cards": cards}
+    payload = json.dumps(bundle, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    bundle_filename = BUNDLE_FILENAME_TEMPLATE.format(set_code=set_code)
+    bundle_path = os.path.join(set_dir, bundle_filename)
+    with open(bundle_path, "wb") as f:
+        f.write(payload)
+
+    print(f"Wrote {len(cards)} cards for set {set_code.upper()} to {bundle_path} "
+          f"({len(payload)} bytes, from {source}).")
+    return {
+        "code": set_code,
+        "cards": len(cards),
+        "bundle": f"{set_code}/{bundle_filename}",
+        "bytes": len(payload),
+        # Content hash, for cache busting and spotting changed bundles
+        "hash": hashlib.sha256(payload).hexdigest()[:12],
+    }
+
+
+def discover_merged_sets(base_data_path=BASE_DATA_PATH):
+    """Returns the codes of all set directories that contain a merged CSV, sorted."""
+    return [
+        entry for entry in sorted(os.listdir(base_data_path))
+        if os.path.isfile(os.path.join(base_data_path, entry, MERGED_FILENAME_TEMPLATE.format(set_code=entry)))
+    ]
+
+
+def write_set_index(entries, base_data_path=BASE_DATA_PATH):
+    """Writes the sets.json index listing every bundle."""
+    index_path = os.path.join(base_data_path, SET_INDEX_FILENAME)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({"version": BUNDLE_FORMAT_VERSION, "sets": entries}, f, indent=2)
+        f.write("\n")
+    print(f"Wrote set index with {len(entries)} set(s) to {index_path}")
+
+
+def build_bundles(set_codes, base_data_path=BASE_DATA_PATH, images_dir=IMAGES_PATH):
+    """
+    Builds the bundles of `set_codes` and rewrites the set index, keeping the
+    entries of sets that were not rebuilt this time.
+
+    Returns:
+        list: The set codes that had no merged data to bundle.
+    """
+    entries = {}
+    try:
+        with open(os.path.join(base_data_path, SET_INDEX_FILENAME), "r", encoding="utf-8") as f:
+            existing = json.load(f)
+        if existing.get("version") == BUNDLE_FORMAT_VERSION:
+            entries = {entry["code"]: entry for entry in existing.get("sets", [])}
+    except (OSError, ValueError):
+        pass
+
+    failed = []
+    for set_code in set_codes:
+        entry = build_set_bundle(set_code, base_data_path, images_dir)
+        if entry is None:
+            failed.append(set_code)
+        else:
+            entries[set_code] = entry
+
+    write_set_index([entries[code] for code in sorted(entries)], base_data_path)
+    return failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the compact per-set card bundles loaded by the web front end."
+    )
+    parser.add_argument(
+        "set_codes", nargs="*",
+        help="Set codes to bundle. Defaults to every set directory with a merged <set>_data.csv."
+    )
+    parser.add_argument(
+        "--data-dir", default=BASE_DATA_PATH,
+        help="Directory containing the per-set data directories (default: public/assets/data)."
+    )
+    parser.add_argument(
+        "--images-dir", default=IMAGES_PATH,
+        help="Directory containing the per-set images from download_card_images.py (default: public/assets/images)."
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    set_codes = [code.strip().lower() for code in args.set_codes if code.strip()]
+    if not set_codes:
+        set_codes = discover_merged_sets(args.data_dir)
+    if not set_codes:
+        print(f"No merged set data found in {args.data_dir}. Exiting.")
+        sys.exit(1)
+
+    if build_bundles(set_codes, args.data_dir, args.images_dir):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
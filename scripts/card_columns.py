@@ -0,0 +1,292 @@
+import csv
+import json
+import math
+import os
+import shutil
+
+try:
+    import numpy as np
+except ImportError: # The columnar store is optional; the CSV pipeline works without NumPy
+    np = None
+
+# Bump whenever the on-disk layout below changes
+COLUMNS_FORMAT_VERSION = 1
+
+# <set>/<set>_columns/ next to the merged CSV
+COLUMNS_DIRNAME_TEMPLATE = "{set_code}_columns"
+SCHEMA_FILENAME = "schema.json"
+
+# Stored value for a missing integer (counts are never negative)
+MISSING_INT = -1
+
+# Columns stored as small integer codes into a list of categories
+CATEGORICAL_COLUMNS = {"Rarity", "Color Identity", "17L_Color", "17L_Rarity"}
+# Columns stored as booleans
+BOOLEAN_COLUMNS = {"In_AetherHub_List"}
+# AetherHub ratings are numbers; a split pro rating "1.0 // 2.5" is stored as
+# AH_Pro_Rating=1.0 (the value the front end grades by) and AH_Pro_Rating_Alt=2.5
+FLOAT_COLUMNS = {"AH_AI_Rating", "AH_Pro_Rating"}
+SPLIT_RATING_COLUMNS = {"AH_Pro_Rating": "AH_Pro_Rating_Alt"}
+# 17Lands count columns ("# Seen", "# GIH", ...) are integers; every other
+# 17Lands column not listed above is a float metric
+LANDS_PREFIX = "17L_"
+LANDS_COUNT_PREFIX = "17L_#"
+
+# AetherHub pro rating -> letter grade (mirrors convertProRatingToGrade in public/js/card-data.js);
+# shared by the bundle builder and the derived metrics
+PRO_RATING_GRADES = {
+    0.0: "F",
+    0.5: "D",
+    1.0: "C-",
+    1.5: "C",
+    2.0: "C+",
+    2.5: "B-",
+    3.0: "B",
+    3.5: "B+",
+    4.0: "A-",
+    4.5: "A",
+    5.0: "A+",
+}
+
+
+def parse_metric(value):
+    """
+    Parses a 17Lands/AetherHub metric string into a float, keeping its display
+    unit: "52.0%" -> 52.0, "-1.6pp" -> -1.6, "2.44" -> 2.44. Blank or
+    unparseable values become NaN.
+    """
+    value = (value or "").strip()
+    if value.endswith("%"):
+        value = value[:-1]
+    elif value.endswith("pp"):
+        value = value[:-2]
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+def parse_count(value):
+    """Parses a 17Lands count ("120134") into an int; blank values become MISSING_INT."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return MISSING_INT
+
+
+def column_kind(name):
+    """Returns how a merged-CSV column is stored: 'category', 'bool', 'int', 'float' or 'string'."""
+    if name in CATEGORICAL_COLUMNS:
+        return "category"
+    if name in BOOLEAN_COLUMNS:
+        return "bool"
+    if name in FLOAT_COLUMNS:
+        return "float"
+    if name.startswith(LANDS_COUNT_PREFIX):
+        return "int"
+    if name.startswith(LANDS_PREFIX):
+        return "float"
+    return "string"
+
+
+def write_set_columns(csv_path, output_dir, set_code):
+    """
+    Converts a merged <set>_data.csv into the typed columnar store.
+
+    Each column becomes its own .npy file so the loader can memory-map exactly
+    the columns it needs: float64 (NaN for missing) for 17Lands rates and
+    AetherHub ratings, int64 (MISSING_INT for missing) for 17Lands counts,
+    int16 category codes for rarity and color, bool for flags, and a UTF-8
+    byte buffer plus int64 offsets for names, comments and other text.
+    The store is written to a temporary directory and swapped in at the end.
+
+    Returns:
+        int: The number of rows stored.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required to build the columnar store.")
+
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as csvfile:
+        reader = csv.DictReader(csvfile)
+        fieldnames = list(reader.fieldnames or [])
+        kinds = {name: column_kind(name) for name in fieldnames}
+        values = {name: [] for name in fieldnames}
+        split_values = {SPLIT_RATING_COLUMNS[name]: [] for name in fieldnames if name in SPLIT_RATING_COLUMNS}
+        for row in reader:
+            for name in fieldnames:
+                raw = row.get(name) or ""
+                kind = kinds[name]
+                if name in SPLIT_RATING_COLUMNS:
+                    parts = [part.strip() for part in raw.split("//")]
+                    values[name].append(parse_metric(parts[0]))
+                    split_values[SPLIT_RATING_COLUMNS[name]].append(parse_metric(parts[1]) if len(parts) > 1 else math.nan)
+                elif kind == "float":
+                    values[name].append(parse_metric(raw))
+                elif kind == "int":
+                    values[name].append(parse_count(raw))
+                elif kind == "bool":
+                    values[name].append(raw.strip().lower() == "true")
+                else:
+                    values[name].append(raw)
+
+    row_count = len(values[fieldnames[0]]) if fieldnames else 0
+    tmp_dir = f"{output_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    schema = {"version": COLUMNS_FORMAT_VERSION, "set_code": set_code, "rows": row_count, "columns": {}}
+    for name in fieldnames:
+        schema["columns"][name] = _save_column(tmp_dir, name, kinds[name], values[name])
+    for name, column_values in split_values.items():
+        schema["columns"][name] = _save_column(tmp_dir, name, "float", column_values)
+
+    with open(os.path.join(tmp_dir, SCHEMA_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return row_count
+
+
+def add_columns(directory, columns):
+    """
+    Adds (or replaces) columns in an existing columnar store, e.g. metrics
+    derived from the stored ones. Each column is marked "derived" in the
+    schema; the store is rebuilt without them by write_set_columns.
+
+    Args:
+        directory (str): The <set>_columns directory.
+        columns (dict): Column name -> (kind, values), with one value per row
+            and kind as returned by column_kind.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required to update the columnar store.")
+
+    schema_path = os.path.join(directory, SCHEMA_FILENAME)
+    with open(schema_path, "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    for name, (kind, column_values) in columns.items():
+        if len(column_values) != schema["rows"]:
+            raise ValueError(f"Column {name} has {len(column_values)} values for {schema['rows']} rows.")
+        entry = _save_column(directory, name, kind, column_values)
+        entry["derived"] = True
+        schema["columns"][name] = entry
+
+    with open(f"{schema_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+    os.replace(f"{schema_path}.tmp", schema_path)
+
+
+def _save_column(directory, name, kind, column_values):
+    """Writes one column and returns its schema entry."""
+    stem = _file_stem(name)
+    entry = {"kind": kind}
+    if kind == "float":
+        np.save(os.path.join(directory, f"{stem}.npy"), np.asarray(column_values, dtype=np.float64))
+    elif kind == "int":
+        np.save(os.path.join(directory, f"{stem}.npy"), np.asarray(column_values, dtype=np.int64))
+    elif kind == "bool":
+        np.save(os.path.join(directory, f"{stem}.npy"), np.asarray(column_values, dtype=np.bool_))
+    elif kind == "category":
+        categories = sorted({value for value in column_values if value})
+        codes = {category: code for code, category in enumerate(categories)}
+        np.save(
+            os.path.join(directory, f"{stem}.npy"),
+            np.asarray([codes.get(value, MISSING_INT) for value in column_values], dtype=np.int16),
+        )
+        entry["categories"] = categories
+    else:
+        encoded = [value.encode("utf-8") for value in column_values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        np.save(os.path.join(directory, f"{stem}.data.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        np.save(os.path.join(directory, f"{stem}.offsets.npy"), offsets)
+    entry["file"] = stem
+    return entry
+
+
+def _file_stem(name):
+    """Turns a column name such as "17L_# GIH" into a safe file stem ("17L_n_GIH")."""
+    return "".join(char if char.isalnum() or char in "-_" else "_" for char in name.replace("#", "n"))
+
+
+class SetColumns:
+    """
+    Read-only, memory-mapped view of one set's columnar store.
+
+    Columns are opened lazily on first access with np.load(mmap_mode='r'), so
+    loading a set only parses schema.json and touching a column costs one
+    mmap, not a CSV parse.
+
+        columns = load_set_columns("public/assets/data/tdm/tdm_columns")
+        gih = columns["17L_GIH WR"]            # float64 array, NaN where missing
+        rares = columns.mask("Rarity", "Rare")  # bool array
+        columns.text("Name", 0)                 # one decoded string
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, SCHEMA_FILENAME), "r", encoding="utf-8") as f:
+            self.schema = json.load(f)
+        if self.schema.get("version") != COLUMNS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar store version in {directory}: {self.schema.get('version')}")
+        self.set_code = self.schema["set_code"]
+        self.rows = self.schema["rows"]
+        self._arrays = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, name):
+        return name in self.schema["columns"]
+
+    @property
+    def columns(self):
+        return list(self.schema["columns"])
+
+    def kind(self, name):
+        return self.schema["columns"][name]["kind"]
+
+    def __getitem__(self, name):
+        """
+        Returns the column as a NumPy array: the values of numeric and bool
+        columns, the codes of categorical columns, and the UTF-8 byte buffer
+        of string columns (see text()/strings() to decode those).
+        """
+        return self._load(name, "data" if self.kind(name) == "string" else None)
+
+    def categories(self, name):
+        return self.schema["columns"][name]["categories"]
+
+    def mask(self, name, category):
+        """Bool array of the rows whose categorical column equals `category`."""
+        categories = self.categories(name)
+        if category not in categories:
+            return np.zeros(self.rows, dtype=np.bool_)
+        return self[name] == categories.index(category)
+
+    def text(self, name, row):
+        """Decodes one value of a string column."""
+        offsets = self._load(name, "offsets")
+        return bytes(self._load(name, "data")[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def strings(self, name):
+        """Decodes a whole string column into a list."""
+        offsets = self._load(name, "offsets")
+        data = bytes(self._load(name, "data"))
+        return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(self.rows)]
+
+    def _load(self, name, part=None):
+        key = (name, part)
+        if key not in self._arrays:
+            stem = self.schema["columns"][name]["file"]
+            filename = f"{stem}.{part}.npy" if part else f"{stem}.npy"
+            self._arrays[key] = np.load(os.path.join(self.directory, filename), mmap_mode="r")
+        return self._arrays[key]
+
+
+def load_set_columns(directory):
+    """Opens a set's columnar store (the <set>_columns directory)."""
+    if np is None:
+        raise RuntimeError("NumPy is required to load the columnar store.")
+    return SetColumns(directory)
@@ -0,0 +1,384 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+import card_columns
+
+# --- Configuration ---
+BASE_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "data"))
+DATABASE_FILENAME = "cards.sqlite" # In the data root, next to the per-set directories
+MERGED_FILENAME_TEMPLATE = "{set_code}_data.csv" # Exported for the front end (public/js/card-data.js)
+
+# Bump whenever the tables below change; an older database is rebuilt from scratch
+DATABASE_SCHEMA_VERSION = 1
+
+# Seconds a writer waits for another process's transaction (augment_sets
+# builds several sets in parallel, each committing its own)
+BUSY_TIMEOUT_SECONDS = 60
+
+# Merged-CSV columns copied into typed, indexed columns of the cards table:
+# database column -> (merged column, SQL type). Every merged column is also
+# kept verbatim in `data`, so the CSV export reproduces the merge exactly.
+KEY_COLUMNS = {
+    "rarity": ("Rarity", "TEXT"),
+    "color_identity": ("Color Identity", "TEXT"),
+    "gih_wr": ("17L_GIH WR", "REAL"),
+    "gih_games": ("17L_# GIH", "INTEGER"),
+    "iwd": ("17L_IWD", "REAL"),
+    "alsa": ("17L_ALSA", "REAL"),
+    "ata": ("17L_ATA", "REAL"),
+    "pro_rating": ("AH_Pro_Rating", "REAL"),
+    "ai_rating": ("AH_AI_Rating", "REAL"),
+}
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS sets (
+    set_code TEXT PRIMARY KEY,
+    fields TEXT NOT NULL,       -- JSON list of the merged columns, in CSV order
+    cards INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    set_code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,  -- Row order of the merged CSV
+    {", ".join(f"{column} {sql_type}" for column, (_, sql_type) in KEY_COLUMNS.items())},
+    data TEXT NOT NULL,         -- JSON list of every merged value, aligned with sets.fields
+    PRIMARY KEY (set_code, name)
+);
+CREATE INDEX IF NOT EXISTS cards_name ON cards (name);
+CREATE INDEX IF NOT EXISTS cards_set_position ON cards (set_code, position);
+CREATE INDEX IF NOT EXISTS cards_rarity_gih_wr ON cards (rarity, gih_wr);
+CREATE INDEX IF NOT EXISTS cards_color_gih_wr ON cards (color_identity, gih_wr);
+CREATE INDEX IF NOT EXISTS cards_gih_wr ON cards (gih_wr);
+CREATE INDEX IF NOT EXISTS cards_iwd ON cards (iwd);
+CREATE INDEX IF NOT EXISTS cards_pro_rating ON cards (pro_rating);
+"""
+
+UPSERT_SQL = f"""
+INSERT INTO cards (set_code, name, position, {", ".join(KEY_COLUMNS)}, data)
+VALUES ({", ".join("?" * (len(KEY_COLUMNS) + 4))})
+ON CONFLICT (set_code, name) DO UPDATE SET
+    position = excluded.position,
+    {", ".join(f"{column} = excluded.{column}" for column in KEY_COLUMNS)},
+    data = excluded.data
+WHERE data IS NOT excluded.data OR position IS NOT excluded.position
+"""
+
+# Columns returned by query_cards, in order
+QUERY_COLUMNS = ["set_code", "name", "rarity", "color_identity", "gih_wr", "gih_games", "iwd", "pro_rating"]
+
+
+def database_path(base_data_path=BASE_DATA_PATH):
+    return os.path.join(base_data_path, DATABASE_FILENAME)
+
+
+def connect(path):
+    """
+    Opens (creating if needed) the card database. Transactions are managed
+    explicitly (see replace_set), so the connection runs in autocommit mode.
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    # WAL lets readers (exports, queries) run while another process loads a set
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != DATABASE_SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        # Read again under the write lock: a parallel build may have created
+        # the schema (and loaded a set into it) since the check above
+        if conn.execute("PRAGMA user_version").fetchone()[0] != DATABASE_SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS cards")
+            conn.execute("DROP TABLE IF EXISTS sets")
+            conn.execute(f"PRAGMA user_version = {DATABASE_SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+
+def has_set(path, set_code):
+    """True if the database at `path` exists and holds the set. Never creates the file."""
+    if not os.path.isfile(path):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            return conn.execute("SELECT 1 FROM sets WHERE set_code = ?", (set_code,)).fetchone() is not None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def _text(raw):
+    return raw or None
+
+
+def _integer(raw):
+    value = card_columns.parse_count(raw)
+    return None if value == card_columns.MISSING_INT else value
+
+
+def _real(raw):
+    value = card_columns.parse_metric(raw)
+    return None if math.isnan(value) else value
+
+
+def _split_real(raw):
+    return _real(raw.split("//")[0]) if raw else None # "1.0 // 2.5" is graded by its first value
+
+
+def _key_parser(column, sql_type):
+    """The parser of a typed column's merged values; missing or unparseable values become NULL."""
+    if sql_type == "TEXT":
+        return _text
+    if sql_type == "INTEGER":
+        return _integer
+    return _split_real if KEY_COLUMNS[column][0] in card_columns.SPLIT_RATING_COLUMNS else _real
+
+
+def replace_set(conn, set_code, fieldnames, rows):
+    """
+    Loads a set's merged rows in a single transaction.
+
+    Rows are upserted on (set, name) with executemany, skipping rows whose
+    values did not change, then the set's cards that were not part of this load
+    are deleted. Refreshing one set never touches another set's rows, and
+    re-loading unchanged data writes almost nothing. If `rows` is empty
+    nothing is changed.
+
+    Args:
+        conn: A connection from connect().
+        set_code (str): The set.
+        fieldnames (list): The merged columns, in output order.
+        rows (iterable): Merged rows (dicts); consumed as they are written.
+
+    Returns:
+        int: The number of cards the set now has in the database (0 if nothing was loaded).
+    """
+    key_parsers = [(merged, _key_parser(column, sql_type)) for column, (merged, sql_type) in KEY_COLUMNS.items()]
+    loaded_names = []
+
+    def records():
+        for position, row in enumerate(rows):
+            name = row.get("Name")
+            if not name:
+                continue
+            loaded_names.append((name,))
+            yield (
+                set_code, name, position,
+                *[parse(row.get(merged) or "") for merged, parse in key_parsers],
+                json.dumps([row.get(field, "") for field in fieldnames], ensure_ascii=False, separators=(",", ":")),
+            )
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(UPSERT_SQL, records())
+        if not loaded_names:
+            conn.execute("ROLLBACK")
+            return 0
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS loaded_names (name TEXT PRIMARY KEY) WITHOUT ROWID")
+        conn.execute("DELETE FROM temp.loaded_names")
+        conn.executemany("INSERT OR IGNORE INTO temp.loaded_names (name) VALUES (?)", loaded_names)
+        conn.execute(
+            "DELETE FROM cards WHERE set_code = ? AND name NOT IN (SELECT name FROM temp.loaded_names)",
+            (set_code,),
+        )
+        cards = conn.execute("SELECT COUNT(*) FROM cards WHERE set_code = ?", (set_code,)).fetchone()[0]
+        conn.execute(
+            "INSERT INTO sets (set_code, fields, cards, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (set_code) DO UPDATE SET fields = excluded.fields, cards = excluded.cards, "
+            "updated_at = excluded.updated_at",
+            (set_code, json.dumps(fieldnames, ensure_ascii=False), cards, time.strftime("%Y-%m-%dT%H:%M:%S%z")),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return cards
+
+
+def set_fields(conn, set_code):
+    """The merged columns of a set, or None if the set is not in the database."""
+    row = conn.execute("SELECT fields FROM sets WHERE set_code = ?", (set_code,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def list_sets(conn):
+    """Returns (set code, cards, updated at) for every set, sorted by code."""
+    return conn.execute("SELECT set_code, cards, updated_at FROM sets ORDER BY set_code").fetchall()
+
+
+def iter_set_rows(conn, set_code):
+    """Yields a set's merged rows (dicts keyed by merged column) in CSV order."""
+    fieldnames = set_fields(conn, set_code)
+    if fieldnames is None:
+        return
+    for (data,) in conn.execute("SELECT data FROM cards WHERE set_code = ? ORDER BY position", (set_code,)):
+        yield dict(zip(fieldnames, json.loads(data)))
+
+
+def export_set_csv(conn, set_code, output_path):
+    """
+    Writes a set's <set>_data.csv from the database, replacing the file
+    atomically. The result is identical to the CSV the merge used to write.
+
+    Returns:
+        int: The number of rows written (0 if the set is not in the database).
+    """
+    fieldnames = set_fields(conn, set_code)
+    if fieldnames is None:
+        return 0
+    temp_path = f"{output_path}.tmp"
+    written = 0
+    try:
+        with open(temp_path, "w", newline="", encoding="utf-8") as output_csv:
+            writer = csv.writer(output_csv)
+            writer.writerow(fieldnames)
+            for (data,) in conn.execute("SELECT data FROM cards WHERE set_code = ? ORDER BY position", (set_code,)):
+                writer.writerow(json.loads(data))
+                written += 1
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
+
+
+def load_merged_csv(conn, set_code, csv_path):
+    """Loads an existing merged <set>_data.csv (e.g. one built before the database existed)."""
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as csvfile:
+        reader = csv.DictReader(csvfile)
+        return replace_set(conn, set_code, list(reader.fieldnames or []), reader)
+
+
+def query_cards(conn, set_codes=None, rarity=None, color_identity=None, name=None,
+                min_gih_wr=None, max_gih_wr=None, min_games=None, order_by="gih_wr", limit=None):
+    """
+    Finds cards across every set by the indexed columns, best GIH WR first.
+
+        query_cards(conn, rarity="Uncommon", min_gih_wr=58.0)
+
+    Args:
+        set_codes (list): Only these sets.
+        rarity (str), color_identity (str), name (str): Exact matches.
+        min_gih_wr, max_gih_wr (float): GIH WR bounds in percent (58.0 is 58%).
+        min_games (int): Minimum games in hand.
+        order_by (str): A KEY_COLUMNS numeric column, sorted descending.
+        limit (int): Maximum number of cards.
+
+    Returns:
+        list: Tuples of QUERY_COLUMNS values.
+    """
+    if order_by not in KEY_COLUMNS or KEY_COLUMNS[order_by][1] == "TEXT":
+        raise ValueError(f"Cannot order by {order_by!r}")
+    conditions, parameters = [], []
+    if set_codes:
+        conditions.append(f"set_code IN ({', '.join('?' * len(set_codes))})")
+        parameters.extend(set_codes)
+    for column, value in (("rarity", rarity), ("color_identity", color_identity), ("name", name)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+    for condition, value in (("gih_wr >= ?", min_gih_wr), ("gih_wr <= ?", max_gih_wr), ("gih_games >= ?", min_games)):
+        if value is not None:
+            conditions.append(condition)
+            parameters.append(value)
+    sql = f"SELECT {', '.join(QUERY_COLUMNS)} FROM cards"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order_by} DESC, set_code, name"
+    if limit is not None:
+        sql += " LIMIT ?"
+        parameters.append(limit)
+    return conn.execute(sql, parameters).fetchall()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load, export and query the SQLite card database (built by augment_scryfall_data.py)."
+    )
+    parser.add_argument(
+        "--data-dir", default=BASE_DATA_PATH,
+        help="Directory containing the per-set data directories and the database (default: public/assets/data)."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load = subparsers.add_parser("load", help="Load existing merged <set>_data.csv files into the database.")
+    load.add_argument("set_codes", nargs="*", help="Sets to load (default: every set with a merged CSV).")
+
+    export = subparsers.add_parser("export", help="Write <set>_data.csv files from the database.")
+    export.add_argument("set_codes", nargs="*", help="Sets to export (default: every set in the database).")
+
+    subparsers.add_parser("sets", help="List the sets in the database.")
+
+    query = subparsers.add_parser("query", help="Find cards across sets, best GIH WR first.")
+    query.add_argument("--set", dest="set_codes", action="append", help="Only this set (repeatable).")
+    query.add_argument("--rarity", help="e.g. Uncommon")
+    query.add_argument("--color", dest="color_identity", help="Color identity as stored, e.g. BG")
+    query.add_argument("--name", help="Exact card name")
+    query.add_argument("--min-gih-wr", type=float, help="Minimum GIH WR in percent, e.g. 58")
+    query.add_argument("--max-gih-wr", type=float, help="Maximum GIH WR in percent")
+    query.add_argument("--min-games", type=int, help="Minimum games in hand")
+    query.add_argument("--order-by", default="gih_wr", help="Numeric column to sort by, descending (default: gih_wr)")
+    query.add_argument("--limit", type=int, default=50, help="Maximum number of cards (default: 50)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    path = database_path(args.data_dir)
+    conn = connect(path)
+    try:
+        if args.command == "load":
+            set_codes = [code.strip().lower() for code in args.set_codes if code.strip()] or [
+                entry for entry in sorted(os.listdir(args.data_dir))
+                if os.path.isfile(os.path.join(args.data_dir, entry, MERGED_FILENAME_TEMPLATE.format(set_code=entry)))
+            ]
+            for set_code in set_codes:
+                csv_path = os.path.join(args.data_dir, set_code, MERGED_FILENAME_TEMPLATE.format(set_code=set_code))
+                if not os.path.isfile(csv_path):
+                    print(f"No merged data found for set {set_code.upper()} at {csv_path}.")
+                    continue
+                started = time.perf_counter()
+                cards = load_merged_csv(conn, set_code, csv_path)
+                print(f"Set {set_code.upper()}: loaded {cards} card(s) in {time.perf_counter() - started:.3f}s.")
+        elif args.command == "export":
+            set_codes = [code.strip().lower() for code in args.set_codes if code.strip()] or [
+                set_code for set_code, _, _ in list_sets(conn)
+            ]
+            for set_code in set_codes:
+                output_path = os.path.join(args.data_dir, set_code, MERGED_FILENAME_TEMPLATE.format(set_code=set_code))
+                written = export_set_csv(conn, set_code, output_path)
+                if written:
+                    print(f"Set {set_code.upper()}: wrote {written} card(s) to {output_path}.")
+                else:
+                    print(f"Set {set_code.upper()} is not in the database.")
+        elif args.command == "sets":
+            for set_code, cards, updated_at in list_sets(conn):
+                print(f"{set_code.upper():<6} {cards:>6} card(s), updated {updated_at}")
+        elif args.command == "query":
+            started = time.perf_counter()
+            try:
+                rows = query_cards(
+                    conn, args.set_codes, args.rarity, args.color_identity, args.name,
+                    args.min_gih_wr, args.max_gih_wr, args.min_games, args.order_by, args.limit,
+                )
+            except ValueError as e:
+                print(e)
+                sys.exit(1)
+            elapsed = time.perf_counter() - started
+            print("\t".join(QUERY_COLUMNS))
+            for row in rows:
+                print("\t".join("" if value is None else str(value) for value in row))
+            print(f"{len(rows)} card(s) in {elapsed * 1000:.2f} ms.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import argparse
+import os
+import sys
+import time
+
+import card_columns
+from card_columns import MISSING_INT, PRO_RATING_GRADES, np
+
+# --- Configuration ---
+BASE_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "data"))
+
+# Cards drawn in fewer games than this get no derived metrics; their win rates are noise
+MIN_GIH_GAMES = 200
+
+# Source columns of the merged data
+GIH_WR_COLUMN = "17L_GIH WR"
+GIH_GAMES_COLUMN = "17L_# GIH"
+IWD_COLUMN = "17L_IWD"
+PRO_RATING_COLUMN = "AH_Pro_Rating"
+RARITY_COLUMN = "Rarity"
+COLOR_COLUMN = "Color Identity"
+
+# Derived columns added to each set's columnar store, with their storage kind.
+# Z-scores and percentiles (0-100) of GIH WR are taken within the set, within
+# set and rarity, and within set and color identity. Ranks are 1 for the best
+# card of the set. The IWD-adjusted score averages the GIH WR and IWD z-scores.
+DERIVED_COLUMNS = {
+    "Derived_GIH_WR_Z_Set": "float",
+    "Derived_GIH_WR_Pct_Set": "float",
+    "Derived_GIH_WR_Z_Rarity": "float",
+    "Derived_GIH_WR_Pct_Rarity": "float",
+    "Derived_GIH_WR_Z_Color": "float",
+    "Derived_GIH_WR_Pct_Color": "float",
+    "Derived_IWD_Rank_Set": "int",
+    "Derived_IWD_Adj_Score": "float",
+    "Derived_IWD_Adj_Rank_Set": "int",
+    "Derived_Grade": "category",
+}
+
+# Letter grades from worst to best, in the order of the pro rating scale
+GRADE_SCALE = [grade for _, grade in sorted(PRO_RATING_GRADES.items())]
+
+
+def group_codes(set_ids, column_codes, column_categories, categories):
+    """
+    Combines per-set category codes into one archive-wide group id per row.
+
+    Each set's store numbers its categories independently, so the codes are
+    first translated to positions in the archive-wide `categories` list.
+
+    Args:
+        set_ids (ndarray): Set index of each row.
+        column_codes (list): Per-set int16 category code arrays.
+        column_categories (list): Per-set category lists.
+        categories (list): All categories across the archive.
+
+    Returns:
+        ndarray: Group id per row (set index * len(categories) + category), -1 where missing.
+    """
+    position = {category: i for i, category in enumerate(categories)}
+    translated = []
+    for codes, set_categories in zip(column_codes, column_categories):
+        lookup = np.array([position[category] for category in set_categories] + [-1], dtype=np.int64)
+        # Missing codes are MISSING_INT (-1), which indexes the trailing -1
+        translated.append(lookup[np.asarray(codes, dtype=np.int64)])
+    codes = np.concatenate(translated) if translated else np.zeros(0, dtype=np.int64)
+    return np.where(codes >= 0, set_ids * len(categories) + codes, -1)
+
+
+def group_zscores(values, groups, group_count):
+    """
+    Z-score of each value within its group (population standard deviation).
+    NaN values and rows with group -1 get NaN; groups with no spread get 0.
+    """
+    valid = ~np.isnan(values) & (groups >= 0)
+    group = groups[valid]
+    value = values[valid]
+    counts = np.bincount(group, minlength=group_count)
+    sums = np.bincount(group, weights=value, minlength=group_count)
+    squares = np.bincount(group, weights=value * value, minlength=group_count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        stds = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+        z = np.where(stds[group] > 0, (value - means[group]) / stds[group], 0.0)
+    result = np.full(values.shape, np.nan)
+    result[valid] = z
+    return result
+
+
+def group_ranks(values, groups, group_count):
+    """
+    Ranks each value within its group with one sort over the whole archive.
+
+    Returns:
+        tuple: (percentile, rank) arrays. The percentile (0-100) counts ties as
+               half below, half above; the rank is 1 for the highest value,
+               with ties sharing the better rank. NaN / MISSING_INT where the
+               value or group is missing.
+    """
+    percentiles = np.full(values.shape, np.nan)
+    ranks = np.full(values.shape, MISSING_INT, dtype=np.int64)
+    rows = np.flatnonzero(~np.isnan(values) & (groups >= 0))
+    if rows.size == 0:
+        return percentiles, ranks
+
+    order = rows[np.lexsort((values[rows], groups[rows]))]
+    sorted_values = values[order]
+    sorted_groups = groups[order]
+
+    new_group = np.ones(order.size, dtype=np.bool_)
+    new_group[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    new_run = new_group.copy()
+    new_run[1:] |= sorted_values[1:] != sorted_values[:-1]
+
+    group_start = np.flatnonzero(new_group)[np.cumsum(new_group) - 1]
+    run_starts = np.flatnonzero(new_run)
+    run_lengths = np.diff(np.append(run_starts, order.size))
+    run = np.cumsum(new_run) - 1
+
+    below = run_starts[run] - group_start
+    ties = run_lengths[run]
+    sizes = np.bincount(sorted_groups, minlength=group_count)[sorted_groups]
+
+    percentiles[order] = 100.0 * (below + 0.5 * ties) / sizes
+    ranks[order] = sizes - below - ties + 1
+    return percentiles, ranks
+
+
+def grade_cutoffs(pro_ratings):
+    """
+    Calibrates the letter grades to how AetherHub's pro reviewers actually
+    hand them out: the share of each grade among all rated cards of every set
+    becomes that grade's share of the GIH WR percentile range. Without any pro
+    ratings every grade gets an equal share.
+
+    Returns:
+        ndarray: Cumulative fraction (0-1] of cards at or below each GRADE_SCALE entry.
+    """
+    scale = np.array(sorted(PRO_RATING_GRADES))
+    rated = pro_ratings[np.isin(pro_ratings, scale)]
+    if rated.size == 0:
+        return np.arange(1, len(scale) + 1) / len(scale)
+    counts = np.bincount(np.searchsorted(scale, rated), minlength=len(scale))
+    return np.cumsum(counts) / rated.size
+
+
+def compute_metrics(stores):
+    """
+    Computes every DERIVED_COLUMNS metric for all sets at once.
+
+    The sets' columns are concatenated into archive-wide arrays and every
+    metric is a handful of whole-array NumPy operations (bincount for group
+    statistics, one lexsort for all percentiles and ranks), so the cost does
+    not grow with a Python loop over cards.
+
+    Args:
+        stores (list): SetColumns of the sets to compute.
+
+    Returns:
+        list: Per store, a dict of column name -> (kind, values) for card_columns.add_columns.
+    """
+    sizes = [len(store) for store in stores]
+    set_ids = np.repeat(np.arange(len(stores)), sizes)
+
+    def column(name, dtype, missing):
+        parts = [
+            np.asarray(store[name], dtype=dtype) if name in store else np.full(len(store), missing, dtype=dtype)
+            for store in stores
+        ]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+    gih_wr = column(GIH_WR_COLUMN, np.float64, np.nan)
+    gih_games = column(GIH_GAMES_COLUMN, np.int64, MISSING_INT)
+    iwd = column(IWD_COLUMN, np.float64, np.nan)
+    pro_ratings = column(PRO_RATING_COLUMN, np.float64, np.nan)
+
+    # Too few games: leave the card out of every statistic
+    reliable = gih_games >= MIN_GIH_GAMES
+    gih_wr = np.where(reliable, gih_wr, np.nan)
+    iwd = np.where(reliable, iwd, np.nan)
+
+    groupings = {"Set": (set_ids, len(stores))}
+    for label, name in (("Rarity", RARITY_COLUMN), ("Color", COLOR_COLUMN)):
+        present = [store for store in stores if name in store]
+        categories = sorted({category for store in present for category in store.categories(name)})
+        codes = [store[name] if name in store else np.full(len(store), MISSING_INT, dtype=np.int16) for store in stores]
+        set_categories = [store.categories(name) if name in store else [] for store in stores]
+        groupings[label] = (group_codes(set_ids, codes, set_categories, categories), len(stores) * max(len(categories), 1))
+
+    derived = {}
+    for label, (groups, group_count) in groupings.items():
+        derived[f"Derived_GIH_WR_Z_{label}"] = group_zscores(gih_wr, groups, group_count)
+        derived[f"Derived_GIH_WR_Pct_{label}"] = group_ranks(gih_wr, groups, group_count)[0]
+
+    set_groups, set_count = groupings["Set"]
+    derived["Derived_IWD_Rank_Set"] = group_ranks(iwd, set_groups, set_count)[1]
+    adjusted = (derived["Derived_GIH_WR_Z_Set"] + group_zscores(iwd, set_groups, set_count)) / 2
+    derived["Derived_IWD_Adj_Score"] = adjusted
+    derived["Derived_IWD_Adj_Rank_Set"] = group_ranks(adjusted, set_groups, set_count)[1]
+
+    percentile = derived["Derived_GIH_WR_Pct_Set"]
+    grade_index = np.searchsorted(grade_cutoffs(pro_ratings), percentile / 100.0, side="left")
+    grades = np.array(GRADE_SCALE + [""], dtype=object)
+    derived["Derived_Grade"] = np.where(np.isnan(percentile), "", grades[np.minimum(grade_index, len(GRADE_SCALE) - 1)])
+
+    offsets = np.cumsum([0] + sizes)
+    return [
+        {
+            name: (kind, derived[name][offsets[i]:offsets[i + 1]].tolist() if kind == "category" else derived[name][offsets[i]:offsets[i + 1]])
+            for name, kind in DERIVED_COLUMNS.items()
+        }
+        for i in range(len(stores))
+    ]
+
+
+def discover_column_stores(base_data_path=BASE_DATA_PATH):
+    """Returns (set code, columns directory) for every set with a columnar store, sorted."""
+    stores = []
+    for entry in sorted(os.listdir(base_data_path)):
+        directory = os.path.join(base_data_path, entry, card_columns.COLUMNS_DIRNAME_TEMPLATE.format(set_code=entry))
+        if os.path.isfile(os.path.join(directory, card_columns.SCHEMA_FILENAME)):
+            stores.append((entry, directory))
+    return stores
+
+
+def derive_archive(base_data_path=BASE_DATA_PATH):
+    """
+    Recomputes the derived metrics of every set in the archive and writes them
+    into each set's columnar store.
+
+    Returns:
+        dict: Set code -> number of cards with a derived grade.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required to compute derived metrics.")
+    locations = discover_column_stores(base_data_path)
+    stores = [card_columns.load_set_columns(directory) for _, directory in locations]
+    results = compute_metrics(stores)
+    graded = {}
+    for (set_code, directory), columns in zip(locations, results):
+        card_columns.add_columns(directory, columns)
+        graded[set_code] = sum(1 for grade in columns["Derived_Grade"][1] if grade)
+    return graded
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recompute derived card metrics (z-scores, percentiles, ranks, calibrated grade) for every set."
+    )
+    parser.add_argument(
+        "--data-dir", default=BASE_DATA_PATH,
+        help="Directory containing the per-set data directories (default: public/assets/data)."
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if np is None:
+        print("NumPy is not installed; derived metrics need it. Exiting.")
+        sys.exit(1)
+    started = time.perf_counter()
+    graded = derive_archive(args.data_dir)
+    if not graded:
+        print(f"No columnar stores found in {args.data_dir}; run augment_scryfall_data.py first.")
+        sys.exit(1)
+    for set_code, count in graded.items():
+        print(f"Set {set_code.upper()}: derived grades for {count} card(s).")
+    print(f"Derived metrics for {len(graded)} set(s) in {time.perf_counter() - started:.3f}s.")
+
+if __name__ == "__main__":
+    main()
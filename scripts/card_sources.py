@@ -0,0 +1,228 @@
+import csv
+from abc import ABC, abstractmethod
+from operator import itemgetter
+
+from name_index import MATCH_METHODS, NameIndex
+
+
+class Source(ABC):
+    """
+    A ratings source joined onto the Scryfall export by card name.
+
+    A source declares where its export is found, which columns it offers and
+    how its merged columns are named; the merge (iter_joined_rows) treats all
+    sources alike. Subclasses implement the abstract columns() and load().
+
+    Attributes:
+        name (str): Label in reports and fingerprints ("17Lands").
+        find (callable): (set directory, set code) -> path of the export, or None.
+        prefix (str): Prepended to the source's columns in the merged output ("17L_").
+        flag (str): Optional boolean output column, True when the card was found in the source.
+        always_listed (bool): List the source's columns in the output even when
+            the source has no data for a set (otherwise they are left out).
+    """
+
+    always_listed = False
+
+    def __init__(self, name, find, prefix="", flag=None):
+        self.name = name
+        self.find = find
+        self.prefix = prefix
+        self.flag = flag
+
+    @abstractmethod
+    def columns(self, path):
+        """The columns the export offers, without the prefix, in output order."""
+
+    @abstractmethod
+    def load(self, path, columns):
+        """
+        Reads the export, keeping only `columns` (a subset of columns(path)).
+
+        Returns:
+            dict: Card name -> tuple of values aligned with `columns`.
+        """
+
+    def project(self, path, output_columns=None):
+        """
+        The source columns needed for the requested merged columns: all of them
+        if `output_columns` is None, else those named with this source's prefix.
+        """
+        available = self.columns(path)
+        if output_columns is None:
+            return available
+        wanted = {column[len(self.prefix):] for column in output_columns if column.startswith(self.prefix)}
+        return [column for column in available if column in wanted]
+
+
+class CsvSource(Source):
+    """
+    A source exported as CSV with one row per card. The card name column is
+    the first of `key_columns` the header has.
+
+    Only the projected columns are picked out of each row (by position, with
+    csv.reader), so the cost of loading follows the columns used, not the
+    width of the export.
+    """
+
+    def __init__(self, name, find, prefix="", flag=None, key_columns=("Card Name", "Name", "Card")):
+        super().__init__(name, find, prefix, flag)
+        self.key_columns = key_columns
+
+    def key_column(self, header):
+        return next((column for column in self.key_columns if column in header), self.key_columns[0])
+
+    def columns(self, path):
+        header = read_header(path)
+        key = self.key_column(header)
+        return [column for column in header if column != key]
+
+    def load(self, path, columns):
+        with open(path, "r", newline="", encoding="utf-8-sig") as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            key = self.key_column(header)
+            if key not in header:
+                return {}
+            key_position = header.index(key)
+            positions = [header.index(column) for column in columns]
+            # itemgetter returns a bare value for one position; keep it a tuple
+            pick = itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],)) if positions else (lambda row: ())
+            width = max(positions + [key_position]) + 1
+            records = {}
+            for row in reader:
+                if len(row) < width:
+                    if not row:
+                        continue
+                    row = row + [""] * (width - len(row)) # Short rows: missing values are blank
+                name = row[key_position]
+                if name:
+                    records[name] = pick(row)
+            return records
+
+
+class LoadedSource:
+    """A source's data for one set: its projected columns, records and (once built) name index."""
+
+    def __init__(self, source, path, columns, records):
+        self.source = source
+        self.path = path
+        self.columns = columns
+        self.records = records
+        self.index = None
+
+    def build_index(self, aliases=None):
+        self.index = NameIndex(self.records, aliases) if self.records else None
+        return self.index
+
+    def output_columns(self):
+        """The merged columns this source fills: none if it has no data, unless it is always listed."""
+        if not self.records and not self.source.always_listed:
+            return []
+        return [f"{self.source.prefix}{column}" for column in self.columns]
+
+
+def read_header(path):
+    """The column names of a CSV file (empty if it has none)."""
+    with open(path, "r", newline="", encoding="utf-8-sig") as csvfile:
+        return next(csv.reader(csvfile), [])
+
+
+def load_source(source, path, output_columns=None):
+    """Loads a source's export for the requested merged columns (None: all)."""
+    if not path:
+        columns = source.project(None, output_columns) if source.always_listed else []
+        return LoadedSource(source, None, columns, {})
+    columns = source.project(path, output_columns)
+    return LoadedSource(source, path, columns, source.load(path, columns))
+
+
+def output_fieldnames(scryfall_fields, loaded_sources, output_columns=None):
+    """
+    The merged CSV's columns: the Scryfall columns, then each source's
+    prefixed columns in registry order, then the sources' flags.
+    """
+    fieldnames = list(scryfall_fields)
+    for loaded in loaded_sources:
+        fieldnames.extend(loaded.output_columns())
+    for loaded in loaded_sources:
+        if loaded.source.flag and (output_columns is None or loaded.source.flag in output_columns):
+            fieldnames.append(loaded.source.flag)
+    return fieldnames
+
+
+def new_join_report():
+    """Empty per-source join statistics, filled in by join_record."""
+    return {"matched": {method: 0 for method in MATCH_METHODS}, "inexact": [], "missing": [], "suggestions": []}
+
+
+def join_record(index, card_name, join_report):
+    """
+    Looks a Scryfall name up in a source's NameIndex and records how it
+    matched in `join_report`; for a name that did not match, the closest
+    name in the source (if any) is recorded as a suggestion, to be
+    confirmed in the alias table. Returns the source record, or None.
+    """
+    matched_name, method = index.lookup(card_name)
+    if matched_name is None:
+        join_report["missing"].append(card_name)
+        suggestion, similarity = index.suggest(card_name)
+        if suggestion is not None:
+            join_report["suggestions"].append({"name": card_name, "suggestion": suggestion, "similarity": round(similarity, 3)})
+        return None
+    join_report["matched"][method] += 1
+    if method != "exact":
+        join_report["inexact"].append({"name": card_name, "matched": matched_name, "method": method})
+    return index.records[matched_name]
+
+
+def iter_joined_rows(scryfall_rows, loaded_sources, joins):
+    """
+    Hash-joins each Scryfall row with every source in one pass and yields the
+    merged row. Each source is a NameIndex lookup (dict probes; only names
+    that do not join are searched for a suggestion); how each name matched
+    is recorded in joins[<source name>] for the sources present in `joins`.
+    """
+    plans = [
+        (loaded.index, loaded.output_columns(), loaded.source.flag, joins.get(loaded.source.name))
+        for loaded in loaded_sources
+    ]
+    for row in scryfall_rows:
+        card_name = row.get("Name")
+        if not card_name:
+            continue # Should not happen if Scryfall data is clean
+        for index, columns, flag, join_report in plans:
+            record = join_record(index, card_name, join_report) if index is not None else None
+            if flag:
+                row[flag] = record is not None
+            if record is not None:
+                row.update(zip(columns, record))
+        yield row
+
+
+def iter_projected_rows(csvfile, columns=None):
+    """
+    Reads CSV rows as dicts holding only `columns` (None: every column).
+
+    Returns:
+        tuple: (the columns present, in file order; iterator of row dicts).
+    """
+    reader = csv.reader(csvfile)
+    header = next(reader, [])
+    if columns is None:
+        kept = header
+    else:
+        wanted = set(columns)
+        kept = [column for column in header if column in wanted]
+    positions = [header.index(column) for column in kept]
+    width = max(positions, default=-1) + 1
+
+    def rows():
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            yield dict(zip(kept, [row[position] for position in positions]))
+
+    return kept, rows()
@@ -0,0 +1,301 @@
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from fetch_cards_from_scryfall import TokenBucket, create_session, get_with_backoff
+
+try:
+    from PIL import Image
+except ImportError: # Without Pillow the original images are stored as downloaded, not resized
+    Image = None
+
+# --- Configuration ---
+BASE_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "data"))
+IMAGES_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "images"))
+SCRYFALL_EXPORT_FILENAME_TEMPLATE = "scryfall_export_{set_code}.csv" # Written by fetch_cards_from_scryfall.py
+MANIFEST_FILENAME = "images.json" # Read by build_card_bundle.py
+
+# Bump whenever the manifest layout below changes
+IMAGES_MANIFEST_VERSION = 1
+
+# Size of the card image box in public/css/main.css (.card-image-container)
+DISPLAY_WIDTH = 300
+DISPLAY_HEIGHT = 419
+WEBP_QUALITY = 80
+
+# Images come from Scryfall's CDN (cards.scryfall.io), which is not subject to
+# the API's 10 requests per second, but there is no reason to hammer it either
+IMAGE_REQUESTS_PER_SECOND = 20
+DEFAULT_MAX_WORKERS = 8
+
+# How much of an image is read from the network at a time (bytes)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# The manifest is rewritten after this many finished images, so an
+# interrupted run loses at most this much bookkeeping
+MANIFEST_SAVE_EVERY = 25
+
+# Image columns of the Scryfall export, by face
+IMAGE_COLUMNS = {"front": "Image URL", "back": "Back Image URL"}
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+class ImageDownloadError(Exception):
+    """Raised when an image cannot be downloaded."""
+
+
+def card_slug(card_name):
+    """Turns a card name into a file-name stem: "Lim-Dûl's Vault" -> "lim-dul-s-vault"."""
+    ascii_name = unicodedata.normalize("NFKD", card_name).encode("ascii", "ignore").decode("ascii")
+    return _SLUG_RE.sub("-", ascii_name.lower()).strip("-") or "card"
+
+
+def iter_image_jobs(export_path):
+    """
+    Yields (card name, face, URL) for every image listed in a Scryfall export.
+    Exports written before the image columns existed yield nothing.
+    """
+    with open(export_path, "r", newline="", encoding="utf-8-sig") as csvfile:
+        for row in csv.DictReader(csvfile):
+            name = row.get("Name")
+            if not name:
+                continue
+            for face, column in IMAGE_COLUMNS.items():
+                url = (row.get(column) or "").strip()
+                if url:
+                    yield name, face, url
+
+
+def download_file(session, rate_limiter, url, part_path):
+    """
+    Downloads `url` into `part_path`, resuming a partial download left there by
+    an earlier run with a Range request. The server may ignore the range, in
+    which case the file is downloaded again from the start.
+
+    Returns:
+        bytes: The complete file.
+
+    Raises:
+        ImageDownloadError: On a network error or an unexpected status code.
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else None
+    try:
+        response = get_with_backoff(session, url, rate_limiter, headers=headers, stream=True)
+        with response:
+            if response.status_code == 416:
+                # The partial file is already complete (or no longer matches); start over
+                os.remove(part_path)
+                return download_file(session, rate_limiter, url, part_path)
+            if response.status_code not in (200, 206):
+                raise ImageDownloadError(f"HTTP {response.status_code} for {url}")
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+    except (OSError, ValueError) as e: # requests' exceptions derive from OSError
+        raise ImageDownloadError(f"{url}: {e}") from e
+
+    with open(part_path, "rb") as f:
+        return f.read()
+
+
+def convert_image(data, output_stem, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT, quality=WEBP_QUALITY, source_url=""):
+    """
+    Writes a downloaded image to `output_stem` plus an extension: resized to fit
+    width x height and encoded as WebP when Pillow is available, otherwise
+    unchanged with the extension of the source URL.
+
+    Returns:
+        str: The path written.
+    """
+    if Image is None:
+        extension = os.path.splitext(urllib.parse.urlparse(source_url).path)[1] or ".jpg"
+        output_path = f"{output_stem}{extension}"
+        with open(f"{output_path}.tmp", "wb") as f:
+            f.write(data)
+    else:
+        output_path = f"{output_stem}.webp"
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            image.thumbnail((width, height), Image.LANCZOS)
+            image.save(f"{output_path}.tmp", format="WEBP", quality=quality, method=6)
+    os.replace(f"{output_path}.tmp", output_path)
+    return output_path
+
+
+def load_manifest(set_images_dir):
+    """Loads a set's image manifest, or returns None if it is missing or unreadable."""
+    try:
+        with open(os.path.join(set_images_dir, MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == IMAGES_MANIFEST_VERSION else None
+
+
+def save_manifest(set_images_dir, manifest):
+    manifest_path = os.path.join(set_images_dir, MANIFEST_FILENAME)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, manifest_path)
+
+
+def is_current(manifest, set_images_dir, card_name, face, url):
+    """True if the manifest already has this exact image on disk."""
+    entry = manifest["cards"].get(card_name, {}).get(face)
+    return bool(entry) and entry["source"] == url and os.path.isfile(os.path.join(set_images_dir, entry["file"]))
+
+
+def download_set_images(set_code, session, rate_limiter, data_dir=BASE_DATA_PATH, images_dir=IMAGES_PATH,
+                        max_workers=DEFAULT_MAX_WORKERS, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT,
+                        quality=WEBP_QUALITY, force=False):
+    """
+    Downloads, resizes and stores every image listed in a set's Scryfall export
+    under <images_dir>/<set>/, recording them in the set's images.json.
+
+    Images already in the manifest with the same source URL and output settings
+    are skipped, and downloads interrupted part way are resumed, so re-running
+    after a failure or an updated export only fetches what is missing.
+
+    Returns:
+        dict: Counts of downloaded, skipped and failed images, plus the failures.
+    """
+    report = {"set_code": set_code, "downloaded": 0, "skipped": 0, "failed": []}
+    export_path = os.path.join(data_dir, set_code, SCRYFALL_EXPORT_FILENAME_TEMPLATE.format(set_code=set_code))
+    if not os.path.isfile(export_path):
+        report["failed"].append({"name": None, "error": f"No Scryfall export at {export_path}"})
+        return report
+    jobs = list(iter_image_jobs(export_path))
+    if not jobs:
+        print(f"Set {set_code.upper()}: the Scryfall export has no image URLs; re-run fetch_cards_from_scryfall.py.")
+        return report
+
+    set_images_dir = os.path.join(images_dir, set_code)
+    os.makedirs(set_images_dir, exist_ok=True)
+    settings = {"resized": Image is not None, "width": width, "height": height, "quality": quality}
+    manifest = load_manifest(set_images_dir)
+    if manifest is None or force or {key: manifest.get(key) for key in settings} != settings:
+        manifest = {"version": IMAGES_MANIFEST_VERSION, "set_code": set_code, **settings, "cards": {}}
+
+    lock = threading.Lock()
+    finished_since_save = 0
+
+    def fetch_one(job):
+        nonlocal finished_since_save
+        card_name, face, url = job
+        stem = card_slug(card_name) + ("-back" if face == "back" else "")
+        part_path = os.path.join(set_images_dir, f"{stem}.part")
+        try:
+            data = download_file(session, rate_limiter, url, part_path)
+            output_path = convert_image(data, os.path.join(set_images_dir, stem), width, height, quality, url)
+        except (ImageDownloadError, OSError) as e: # Pillow raises OSError subclasses for bad images
+            with lock:
+                report["failed"].append({"name": card_name, "face": face, "error": str(e)})
+            return
+        os.remove(part_path)
+        with lock:
+            manifest["cards"].setdefault(card_name, {})[face] = {
+                "file": os.path.basename(output_path),
+                "source": url,
+                "bytes": os.path.getsize(output_path),
+            }
+            report["downloaded"] += 1
+            finished_since_save += 1
+            if finished_since_save >= MANIFEST_SAVE_EVERY:
+                save_manifest(set_images_dir, manifest)
+                finished_since_save = 0
+
+    pending = []
+    for job in jobs:
+        if is_current(manifest, set_images_dir, *job):
+            report["skipped"] += 1
+        else:
+            pending.append(job)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            list(executor.map(fetch_one, pending))
+    finally:
+        save_manifest(set_images_dir, manifest)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Download the card images listed in Scryfall exports and store display-sized copies under public/assets/images."
+    )
+    parser.add_argument("set_codes", nargs="+", help="Set codes whose images to download (e.g. tdm dft).")
+    parser.add_argument(
+        "--data-dir", default=BASE_DATA_PATH,
+        help="Directory containing the per-set data directories (default: public/assets/data)."
+    )
+    parser.add_argument(
+        "--images-dir", default=IMAGES_PATH,
+        help="Directory the per-set image directories are written to (default: public/assets/images)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_MAX_WORKERS,
+        help=f"Number of concurrent downloads (default: {DEFAULT_MAX_WORKERS})."
+    )
+    parser.add_argument(
+        "--width", type=int, default=DISPLAY_WIDTH,
+        help=f"Maximum width of the stored images in pixels (default: {DISPLAY_WIDTH})."
+    )
+    parser.add_argument(
+        "--height", type=int, default=DISPLAY_HEIGHT,
+        help=f"Maximum height of the stored images in pixels (default: {DISPLAY_HEIGHT})."
+    )
+    parser.add_argument(
+        "--quality", type=int, default=WEBP_QUALITY,
+        help=f"WebP quality, 0-100 (default: {WEBP_QUALITY})."
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Download every image again, even those already in the manifest."
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    set_codes = [code.strip().lower() for code in args.set_codes if code.strip()]
+    if Image is None:
+        print("Pillow is not installed; storing the original images without resizing or WebP conversion.")
+
+    rate_limiter = TokenBucket(rate=IMAGE_REQUESTS_PER_SECOND)
+    failed_sets = []
+    with create_session(pool_size=args.workers) as session:
+        for set_code in set_codes:
+            started = time.monotonic()
+            report = download_set_images(
+                set_code, session, rate_limiter, args.data_dir, args.images_dir,
+                args.workers, args.width, args.height, args.quality, args.force,
+            )
+            print(f"Set {set_code.upper()}: downloaded {report['downloaded']}, "
+                  f"already present {report['skipped']}, failed {len(report['failed'])} "
+                  f"({time.monotonic() - started:.1f}s).")
+            for failure in report["failed"]:
+                label = f"{failure['name']} ({failure['face']})" if failure["name"] else set_code.upper()
+                print(f"  - {label}: {failure['error']}")
+            if report["failed"]:
+                failed_sets.append(set_code)
+
+    if failed_sets:
+        print("Re-run the same command to retry; finished images are kept and partial downloads resumed.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,195 @@
 import requests
+import argparse
 import csv
+import email.utils
+import json
+import queue
+import re
+import threading
 import time
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from pipeline_trace import TRACER, count, span
+from scryfall_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DEFAULT_TTL, ResponseCache
 
 # Scryfall API base URL
 SCRYFALL_API_BASE_URL = "https://api.scryfall.com"
 
+# Scryfall asks clients to stay under 10 requests per second (50-100 ms between requests)
+SCRYFALL_REQUESTS_PER_SECOND = 10
+
+# Scryfall rejects requests without a descriptive User-Agent and Accept header
+SCRYFALL_REQUEST_HEADERS = {
+    "User-Agent": "mtg-card-evaluator/1.0",
+    "Accept": "application/json;q=0.9,*/*;q=0.8",
+}
+
+# Concurrent set fetches in batch mode (they all share one rate limit)
+DEFAULT_MAX_WORKERS = 4
+
+# How many times a rate-limited (429) or unavailable (503) request is retried
+MAX_RETRIES = 5
+
+# Backoff used when a 429/503 response carries no usable Retry-After header (seconds)
+DEFAULT_RETRY_BACKOFF = 1.0
+
 # Define basic land names to filter out
 BASIC_LAND_NAMES = ["Plains", "Island", "Swamp", "Mountain", "Forest"]
 
-def fetch_cards_for_set(set_code):
+# Columns written to scryfall_export_<set>.csv
+CSV_FIELDNAMES = ['Name', 'Rarity', 'Color Identity', 'Mana Cost', 'Type Line', 'Card Text', 'Image URL', 'Back Image URL']
+
+# Scryfall image size recorded in the export ("normal" is 488x680 JPG)
+IMAGE_VERSION = "normal"
+
+# Pages fetched ahead of the page currently being written
+PREFETCH_PAGES = 1
+
+# How much of a bulk-data dump is read into memory at a time (characters)
+BULK_READ_CHUNK_SIZE = 1 << 20
+
+# Whitespace and commas between the objects of a JSON array
+_BULK_SEPARATOR_RE = re.compile(r'[\s,]*')
+
+
+class ScryfallFetchError(Exception):
+    """Raised by iter_card_pages after a fatal API/network error has been reported."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter shared by every request to one host.
+
+    `rate` tokens are added per second up to `capacity`; acquire() blocks until a
+    token is available. penalize() pauses all callers, which is how a 429 from
+    one worker slows down every other worker too.
+    """
+
+    def __init__(self, rate=SCRYFALL_REQUESTS_PER_SECOND, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._blocked_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._blocked_until - now
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """Stops handing out tokens to anyone for the next `seconds` seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(self._updated, self._blocked_until)
+
+
+def create_session(pool_size=DEFAULT_MAX_WORKERS):
+    """
+    Creates a keep-alive requests.Session sized for `pool_size` concurrent workers.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(SCRYFALL_REQUEST_HEADERS)
+    return session
+
+
+def parse_retry_after(value):
+    """
+    Converts a Retry-After header (delta-seconds or HTTP-date) into seconds.
+    Returns None if the header is missing or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def get_with_backoff(session, url, rate_limiter, headers=None, stream=False):
+    """
+    Sends a rate-limited GET, retrying 429/503 responses.
+
+    The wait honours Retry-After when present and otherwise doubles from
+    DEFAULT_RETRY_BACKOFF. The wait is applied to the shared rate limiter so
+    every worker backs off, not just the one that was throttled.
+
+    With `stream` set the body is not read up front (see requests' stream
+    argument), which lets large downloads be written out in chunks.
+
+    Returns:
+        requests.Response: The final response (which may still be a 429/503
+        once MAX_RETRIES is exhausted).
     """
-    Fetches all card data for a given set code from the Scryfall API.
+    backoff = DEFAULT_RETRY_BACKOFF
+    for attempt in range(MAX_RETRIES + 1):
+        with span("rate_limit_wait"):
+            rate_limiter.acquire()
+        with span("http_get", attempt=attempt):
+            response = session.get(url, headers=headers, stream=stream)
+        count("http_requests")
+        if response.status_code not in (429, 503) or attempt == MAX_RETRIES:
+            return response
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = backoff
+            backoff *= 2
+        print(f"Scryfall returned {response.status_code}; backing off {delay:.1f}s (retry {attempt + 1}/{MAX_RETRIES}).")
+        count("http_retries")
+        response.close()
+        rate_limiter.penalize(delay)
+    return response
+
+
+def iter_card_pages(set_code, session=None, rate_limiter=None, base_url=SCRYFALL_API_BASE_URL, cache=None):
+    """
+    Yields the card objects of a set one Scryfall search page at a time.
     Handles API pagination and respects Scryfall's requested delay.
 
     Args:
         set_code (str): The three-letter (or sometimes longer) code for the MTG set.
+        session (requests.Session): Session to reuse; a new pooled session is created if omitted.
+        rate_limiter (TokenBucket): Limiter shared with other concurrent fetches; a
+            private one at Scryfall's published rate is created if omitted.
+        base_url (str): API root, overridable to point at a local stub server.
+        cache (ResponseCache): Optional on-disk cache; fresh pages are served from
+            disk and stale ones are revalidated with conditional requests.
 
-    Returns:
-        list: A list of card objects (dictionaries) if successful,
-              None if a critical API/network error occurs,
-              or an empty list if the set is found but contains no cards.
+    Yields:
+        list: The card objects (dictionaries) on each page. Nothing is yielded
+              if the set is found but contains no cards.
+
+    Raises:
+        ScryfallFetchError: On a critical API/network error (already reported).
     """
-    all_cards_data = []
-    next_page_url = f"{SCRYFALL_API_BASE_URL}/cards/search?q=e%3A{set_code.lower()}&unique=cards"
+    session = session or create_session(pool_size=1)
+    rate_limiter = rate_limiter or TokenBucket()
+    fetched_count = 0
+    next_page_url = f"{base_url}/cards/search?q=e%3A{set_code.lower()}&unique=cards"
 
     print(f"Fetching data from Scryfall for set: {set_code.upper()}")
     print(f"Initial API call: {next_page_url}")
@@ -32,9 +197,16 @@ def fetch_cards_for_set(set_code):
     page_num = 1
     while next_page_url:
         try:
-            response = requests.get(next_page_url)
+            fetch = partial(get_with_backoff, session, next_page_url, rate_limiter)
+            with span("fetch_page", set_code=set_code, page=page_num):
+                response = cache.get(next_page_url, fetch) if cache else fetch()
             response.raise_for_status()
-            data = response.json()
+            with span("decode_json", set_code=set_code, page=page_num):
+                data = response.json()
+            count("pages")
+            count("page_bytes", len(response.content))
+            if getattr(response, "from_cache", False):
+                count("cache_hits")
         except requests.exceptions.HTTPError as e:
             error_details = {}
             try:
@@ -57,148 +229,407 @@ def fetch_cards_for_set(set_code):
                 print(f"URL: {next_page_url}")
                 if error_details:
                     print(f"Scryfall error details: {error_details}")
-            return None
+            raise ScryfallFetchError(next_page_url)
         except requests.exceptions.RequestException as e:
             print(f"A network error occurred: {e}")
             print(f"URL: {next_page_url}")
-            return None
+            raise ScryfallFetchError(next_page_url)
         except ValueError as e:
             print(f"Error decoding JSON response from Scryfall: {e}")
             print(f"Response text: {response.text if response else 'No response object'}")
-            return None
+            raise ScryfallFetchError(next_page_url)
 
         fetched_cards_on_page = data.get('data', [])
         if not fetched_cards_on_page and page_num == 1 and not data.get('has_more'):
             print(f"No cards found for set '{set_code.upper()}'. The set might be empty or the code incorrect.")
-            return []
+            return
 
-        all_cards_data.extend(fetched_cards_on_page)
-        print(f"Page {page_num}: Fetched {len(fetched_cards_on_page)} cards. (Total fetched so far: {len(all_cards_data)})")
+        fetched_count += len(fetched_cards_on_page)
+        count("cards_fetched", len(fetched_cards_on_page))
+        print(f"{set_code.upper()} page {page_num}: Fetched {len(fetched_cards_on_page)} cards. (Total fetched so far: {fetched_count})")
 
         if data.get('has_more') and data.get('next_page'):
             next_page_url = data['next_page']
             page_num += 1
-            time.sleep(0.1)
         else:
             next_page_url = None
-    return all_cards_data
+        # Drop the decoded page before handing out its cards so only one page is held.
+        del data
+        yield fetched_cards_on_page
+
+
+def prefetch(iterable, max_pending=PREFETCH_PAGES):
+    """
+    Runs `iterable` in a background thread, keeping at most `max_pending` items
+    queued ahead of the consumer. Exceptions raised by the producer are re-raised
+    in the consumer. If the consumer stops early, the producer is abandoned at
+    its next hand-off.
+    """
+    items = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def hand_off(message):
+        while not stop.is_set():
+            try:
+                items.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not hand_off((True, item)):
+                    return
+        except BaseException as e:
+            hand_off((False, e))
+        else:
+            hand_off((False, None))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            is_item, value = items.get()
+            if not is_item:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stop.set()
+
+
+def iter_exportable_cards(pages, stats):
+    """
+    Flattens pages of cards and drops basic lands, counting both in `stats`
+    ('fetched' and 'basic_lands').
+    """
+    for page in pages:
+        for card in page:
+            stats['fetched'] += 1
+            if card.get('name') in BASIC_LAND_NAMES:
+                stats['basic_lands'] += 1
+                continue
+            yield card
+
+
+def card_to_csv_row(card):
+    """
+    Extracts the exported columns from a single Scryfall card object.
+
+    Args:
+        card (dict): A card object as returned by the Scryfall API or bulk data.
+
+    Returns:
+        dict: A row keyed by CSV_FIELDNAMES.
+    """
+    card_name = card.get('name', 'N/A')
+    rarity = card.get('rarity', 'N/A').capitalize()
+
+    color_identity_list = card.get('color_identity', [])
+    if color_identity_list:
+        color_identity_str = "".join(sorted(color_identity_list))
+    else:
+        color_identity_str = "Colorless"
+
+    # Handle Mana Cost
+    mana_cost = card.get('mana_cost', '')
+    if not mana_cost and 'card_faces' in card:
+        # For dual-faced cards, mana cost might be on the faces
+        costs = [face.get('mana_cost', '') for face in card['card_faces'] if 'mana_cost' in face]
+        mana_cost = " // ".join(costs)
+
+    # Handle Type Line
+    type_line = card.get('type_line', '')
+
+    # Handle Oracle Text (Card Text)
+    oracle_text = card.get('oracle_text', '')
+    if not oracle_text and 'card_faces' in card:
+         # For dual-faced cards, text is on the faces
+         texts = [face.get('oracle_text', '') for face in card['card_faces']]
+         oracle_text = " // ".join(texts)
+
+    # Clean up newlines in text fields for cleaner CSVs (optional but recommended)
+    oracle_text = oracle_text.replace('\n', ' ')
+
+    image_url, back_image_url = get_image_urls(card)
+
+    return {
+        'Name': card_name,
+        'Rarity': rarity,
+        'Color Identity': color_identity_str,
+        'Mana Cost': mana_cost,
+        'Type Line': type_line,
+        'Card Text': oracle_text,
+        'Image URL': image_url,
+        'Back Image URL': back_image_url
+    }
+
+
+def get_image_urls(card, version=IMAGE_VERSION):
+    """
+    Returns the (front, back) image URLs of a card. Single-faced cards and
+    cards whose faces share one image (split, adventure, flip) carry top-level
+    image_uris and have no back image; double-faced cards carry one per face.
+    Missing images are returned as empty strings.
+    """
+    if card.get('image_uris'):
+        return card['image_uris'].get(version, ''), ''
+    face_urls = [face.get('image_uris', {}).get(version, '') for face in card.get('card_faces', [])]
+    face_urls += ['', '']
+    return face_urls[0], face_urls[1]
 
 def write_cards_to_csv(cards_data, filename):
     """
     Writes extracted card data to a CSV file.
-    Includes: Name, Rarity, Color Identity, Mana Cost, Type Line, Card Text.
+    Includes: Name, Rarity, Color Identity, Mana Cost, Type Line, Card Text,
+    Image URL, Back Image URL.
 
     Args:
-        cards_data (list): A list of card objects (dictionaries) from Scryfall.
+        cards_data (iterable): Card objects (dictionaries) from Scryfall; may be a generator.
         filename (str): The name of the CSV file to write to.
+
+    Returns:
+        int: The number of cards written.
     """
-    fieldnames = ['Name', 'Rarity', 'Color Identity', 'Mana Cost', 'Type Line', 'Card Text']
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    # When cards_data is fed by a page fetcher this span includes waiting for pages
+    with span("write_csv", filename=os.path.basename(filename)), \
+            open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
         writer.writeheader()
         
         processed_count = 0
         for card in cards_data:
-            card_name = card.get('name', 'N/A')
-            rarity = card.get('rarity', 'N/A').capitalize()
-            
-            color_identity_list = card.get('color_identity', [])
-            if color_identity_list:
-                color_identity_str = "".join(sorted(color_identity_list))
-            else:
-                color_identity_str = "Colorless"
-            
-            # Handle Mana Cost
-            mana_cost = card.get('mana_cost', '')
-            if not mana_cost and 'card_faces' in card:
-                # For dual-faced cards, mana cost might be on the faces
-                costs = [face.get('mana_cost', '') for face in card['card_faces'] if 'mana_cost' in face]
-                mana_cost = " // ".join(costs)
-
-            # Handle Type Line
-            type_line = card.get('type_line', '')
-            
-            # Handle Oracle Text (Card Text)
-            oracle_text = card.get('oracle_text', '')
-            if not oracle_text and 'card_faces' in card:
-                 # For dual-faced cards, text is on the faces
-                 texts = [face.get('oracle_text', '') for face in card['card_faces']]
-                 oracle_text = " // ".join(texts)
-            
-            # Clean up newlines in text fields for cleaner CSVs (optional but recommended)
-            oracle_text = oracle_text.replace('\n', ' ')
-
-            writer.writerow({
-                'Name': card_name,
-                'Rarity': rarity,
-                'Color Identity': color_identity_str,
-                'Mana Cost': mana_cost,
-                'Type Line': type_line,
-                'Card Text': oracle_text
-            })
+            writer.writerow(card_to_csv_row(card))
             processed_count += 1
         print(f"Successfully prepared and wrote {processed_count} cards to the CSV.")
+    count("rows_written", processed_count)
+    return processed_count
 
 
-def main():
+def iter_bulk_cards(filepath, chunk_size=BULK_READ_CHUNK_SIZE):
     """
-    Main function to drive the script: gets user input, fetches data, filters, and writes to CSV.
+    Incrementally parses a Scryfall bulk-data file (a single JSON array of card
+    objects, e.g. default-cards.json) and yields one card at a time.
+
+    Only the current chunk and the object being decoded are held in memory, so
+    memory use does not depend on the size of the dump.
+
+    Args:
+        filepath (str): Path to the downloaded bulk-data JSON file.
+        chunk_size (int): Number of characters to read from disk at a time.
+
+    Yields:
+        dict: Card objects in file order.
+
+    Raises:
+        ValueError: If the file is not a JSON array or is truncated.
     """
-    set_code = input("Enter the MTG set code (e.g., 'MKM', 'WOE', 'MH3'): ").strip()
+    decoder = json.JSONDecoder()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"Bulk file {filepath} does not contain a JSON array.")
+        pos = 1
+        eof = False
+        while True:
+            pos = _BULK_SEPARATOR_RE.match(buffer, pos).end()
+            if pos == len(buffer):
+                if eof:
+                    raise ValueError(f"Bulk file {filepath} ended before the closing ']'.")
+                buffer = f.read(chunk_size)
+                eof = not buffer
+                pos = 0
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                card, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The object straddles the chunk boundary; pull in more text and retry.
+                more = f.read(chunk_size)
+                if not more:
+                    raise ValueError(f"Bulk file {filepath} contains a truncated or invalid card object.")
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            yield card
+            pos = end
 
-    if not set_code:
-        print("No set code entered. Exiting.")
-        sys.exit(1)
-    
-    if len(set_code) < 2: # Scryfall usually uses 3-letter codes, but some are longer (e.g., "pip"). A minimum of 2 seems a safe generic check.
-        print(f"The entered set code '{set_code}' seems too short. Please enter a valid set code.")
-        sys.exit(1)
 
-    print(f"Attempting to fetch cards for set code: '{set_code.upper()}'...")
-    cards = fetch_cards_for_set(set_code)
+def export_sets_from_bulk(bulk_filepath, set_codes, output_dir_for=None):
+    """
+    Writes scryfall_export_<set>.csv for every requested set in a single pass
+    over a Scryfall bulk-data file.
 
-    if cards is None:
-        print("Failed to retrieve card data due to an API or network error.")
-        sys.exit(1)
-    
-    if not cards:
-        print(f"No cards were found for set '{set_code.upper()}'.")
-        sys.exit(0)
-
-    print(f"Fetched a total of {len(cards)} cards for set '{set_code.upper()}'.")
-
-    # (1) Filter out basic lands
-    original_card_count = len(cards)
-    cards = [card for card in cards if card.get('name') not in BASIC_LAND_NAMES]
-    filtered_land_count = original_card_count - len(cards)
-    
-    if filtered_land_count > 0:
-        print(f"Filtered out {filtered_land_count} basic land(s) ({', '.join(BASIC_LAND_NAMES)}).")
-        print(f"{len(cards)} cards remaining to be written.")
-    else:
-        print("No basic lands matching the specified names found to filter.")
+    Bulk files contain every printing, so only the first printing of each card
+    name per set is exported (matching the API's `unique=cards` search), and
+    basic lands are filtered out as in the paginated path.
+
+    Rows go to a temporary file per set, created when the set's first card
+    is found. The exports are only replaced once the whole dump has been
+    scanned, so a truncated or invalid dump leaves every existing export
+    untouched, and a set without cards in the dump gets no file (nor
+    directory), as in export_set.
+
+    Args:
+        bulk_filepath (str): Path to the downloaded bulk-data JSON file.
+        set_codes (list): Set codes to export (case-insensitive).
+        output_dir_for (callable): Maps a lowercase set code to its output
+            directory. Defaults to get_set_output_dir.
+
+    Returns:
+        dict: Number of cards written per lowercase set code.
+
+    Raises:
+        ValueError: If the dump is not a JSON array or is truncated (nothing is written).
+    """
+    output_dir_for = output_dir_for or get_set_output_dir
+    wanted = [code.lower() for code in set_codes]
+    files = {}
+    writers = {}
+    temp_filenames = {}
+    created_dirs = []
+    seen_names = {code: set() for code in wanted}
+    counts = {code: 0 for code in wanted}
+    scanned = 0
+
+    def open_export(code):
+        output_dir = output_dir_for(code)
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+            created_dirs.append(output_dir)
+        temp_filenames[code] = os.path.join(output_dir, f"scryfall_export_{code}.csv.tmp")
+        files[code] = open(temp_filenames[code], 'w', newline='', encoding='utf-8')
+        writers[code] = csv.DictWriter(files[code], fieldnames=CSV_FIELDNAMES)
+        writers[code].writeheader()
+        return writers[code]
+
+    completed = False
+    try:
+        with span("bulk_scan", filename=os.path.basename(bulk_filepath)):
+            for card in iter_bulk_cards(bulk_filepath):
+                scanned += 1
+                code = card.get('set')
+                if code not in seen_names:
+                    continue
+                name = card.get('name')
+                if name in BASIC_LAND_NAMES or name in seen_names[code]:
+                    continue
+                seen_names[code].add(name)
+                writer = writers.get(code) or open_export(code)
+                writer.writerow(card_to_csv_row(card))
+                counts[code] += 1
+        completed = True
+    finally:
+        for csvfile in files.values():
+            csvfile.close()
+        if not completed:
+            for temp_filename in temp_filenames.values():
+                _remove_quietly(temp_filename)
+            for output_dir in created_dirs:
+                try:
+                    os.rmdir(output_dir)
+                except OSError:
+                    pass
+
+    for code, temp_filename in temp_filenames.items():
+        output_filename = temp_filename[:-len(".tmp")]
+        os.replace(temp_filename, output_filename)
+        print(f"Wrote set '{code.upper()}' to '{output_filename}'")
+
+    count("bulk_cards_scanned", scanned)
+    count("rows_written", sum(counts.values()))
+    print(f"Scanned {scanned} card objects from '{bulk_filepath}'.")
+    for code in wanted:
+        if counts[code]:
+            print(f"Set '{code.upper()}': wrote {counts[code]} cards.")
+        else:
+            print(f"Set '{code.upper()}': no cards in the bulk file; no CSV written.")
+    return counts
 
-    if not cards:
-        print(f"No cards remaining after filtering basic lands for set '{set_code.upper()}'.")
-        print("The CSV file will not be created as there is no data to write.")
-        sys.exit(0)
 
-    # (2) Define and create the output directory structure
+def get_set_output_dir(set_code):
+    """
+    Returns the public/assets/data/<set> directory for a set code, relative to
+    this script's location.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base_data_dir_relative = os.path.join("..", "public", "assets", "data")
+    base_data_dir_absolute = os.path.abspath(os.path.join(script_dir, base_data_dir_relative))
+    return os.path.join(base_data_dir_absolute, set_code.lower())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export Scryfall card data to public/assets/data/<set>/scryfall_export_<set>.csv."
+    )
+    parser.add_argument(
+        "set_codes", nargs="*",
+        help="Set codes to export (e.g. TDM DFT). Prompts for one if omitted."
+    )
+    parser.add_argument(
+        "--bulk-file",
+        help="Path to a downloaded Scryfall bulk-data file (e.g. default-cards.json). "
+             "All requested sets are exported in one pass over the file instead of "
+             "querying the search API."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_MAX_WORKERS,
+        help=f"Sets fetched concurrently from the search API (default: {DEFAULT_MAX_WORKERS})."
+    )
+    parser.add_argument(
+        "--base-url", default=SCRYFALL_API_BASE_URL,
+        help="Scryfall API root; point this at a local stub server for testing."
+    )
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="Directory of the on-disk response cache (default: .scryfall_cache at the repository root)."
+    )
+    parser.add_argument(
+        "--cache-ttl", type=float, default=DEFAULT_TTL,
+        help="Seconds a cached page is served without revalidation (default: one day). "
+             "Use 0 to revalidate every page."
+    )
+    parser.add_argument(
+        "--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+        help="Size cap of the cache; least recently used pages are evicted beyond it."
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Always fetch from the network and leave the cache untouched."
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Serve pages only from the cache and never touch the network."
+    )
+    parser.add_argument(
+        "--trace",
+        help="Record timing spans, counters (pages, bytes, retries, rows) and peak memory to this file: "
+             "Chrome trace format, or a JSON summary if the name ends in .summary.json."
+    )
+    return parser.parse_args(argv)
+
+
+def get_output_dir_or_fallback(set_code):
+    """
+    Creates the set's output directory, falling back to ./output_data/<set>.
+
+    Returns:
+        str: The directory, or None if it could not be created.
+    """
     set_specific_output_dir = "" # Initialize for use in error messages if path creation fails early
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        base_data_dir_relative = os.path.join("..", "public", "assets", "data")
-        base_data_dir_absolute = os.path.abspath(os.path.join(script_dir, base_data_dir_relative))
-        
         # Create the set-specific subdirectory
-        set_specific_output_dir = os.path.join(base_data_dir_absolute, set_code.lower())
+        set_specific_output_dir = get_set_output_dir(set_code)
 
         print(f"Output directory will be: {set_specific_output_dir}")
         os.makedirs(set_specific_output_dir, exist_ok=True)
     except OSError as e:
         print(f"Error creating output directory '{set_specific_output_dir}': {e}")
-        sys.exit(1)
+        return None
     except Exception as e:
         print(f"Error determining script path or creating output directory: {e}")
         print("Defaulting to saving in current working directory's 'output_data/SET_CODE' folder.")
@@ -207,19 +638,177 @@ def main():
             os.makedirs(set_specific_output_dir, exist_ok=True)
         except OSError as fallback_e:
             print(f"Error creating fallback output directory '{set_specific_output_dir}': {fallback_e}")
-            sys.exit(1)
+            return None
+    return set_specific_output_dir
+
+
+def export_set(set_code, session=None, rate_limiter=None, base_url=SCRYFALL_API_BASE_URL, cache=None):
+    """
+    Streams a set from the Scryfall API into scryfall_export_<set>.csv.
+
+    Pages are fetched in a background thread (at most PREFETCH_PAGES ahead)
+    while the current page is normalized and written, so peak memory is about
+    one page and network time overlaps with CSV writing. Rows go to a temporary
+    file that only replaces the export once the whole set was written.
+
+    Returns:
+        bool: False if the set could not be fetched or written, True otherwise
+              (including when there was nothing to write).
+    """
+    with span("export_set", set_code=set_code.lower()):
+        return _export_set(set_code, session, rate_limiter, base_url, cache)
+
+
+def _export_set(set_code, session, rate_limiter, base_url, cache):
+    set_specific_output_dir = get_output_dir_or_fallback(set_code)
+    if set_specific_output_dir is None:
+        return False
 
     output_filename = os.path.join(set_specific_output_dir, f"scryfall_export_{set_code.lower()}.csv")
+    temp_filename = f"{output_filename}.tmp"
+    stats = {'fetched': 0, 'basic_lands': 0}
 
-    print(f"Writing data for {len(cards)} cards to '{output_filename}'...")
+    print(f"Streaming card data for set '{set_code.upper()}' to '{output_filename}'...")
 
     try:
-        write_cards_to_csv(cards, output_filename)
-        print(f"Successfully wrote card data to '{output_filename}'.")
+        pages = prefetch(iter_card_pages(set_code, session, rate_limiter, base_url, cache))
+        written = write_cards_to_csv(iter_exportable_cards(pages, stats), temp_filename)
+    except ScryfallFetchError:
+        print(f"Failed to retrieve card data for set '{set_code.upper()}' due to an API or network error.")
+        _remove_quietly(temp_filename)
+        return False
     except IOError as e:
         print(f"Error writing to file '{output_filename}': {e}")
+        _remove_quietly(temp_filename)
+        return False
     except Exception as e:
         print(f"An unexpected error occurred during CSV writing: {e}")
+        _remove_quietly(temp_filename)
+        return False
+
+    if stats['basic_lands'] > 0:
+        print(f"Filtered out {stats['basic_lands']} basic land(s) ({', '.join(BASIC_LAND_NAMES)}) from set '{set_code.upper()}'.")
+
+    if not written:
+        if stats['fetched']:
+            print(f"No cards remaining after filtering basic lands for set '{set_code.upper()}'.")
+        else:
+            print(f"No cards were found for set '{set_code.upper()}'.")
+        print("The CSV file will not be created as there is no data to write.")
+        _remove_quietly(temp_filename)
+        return True
+
+    os.replace(temp_filename, output_filename)
+    print(f"Successfully wrote {written} of {stats['fetched']} fetched cards to '{output_filename}'.")
+    return True
+
+
+def export_sets(set_codes, max_workers=DEFAULT_MAX_WORKERS, base_url=SCRYFALL_API_BASE_URL,
+                requests_per_second=SCRYFALL_REQUESTS_PER_SECOND, cache=None):
+    """
+    Runs export_set for several sets concurrently over one pooled keep-alive
+    session.
+
+    All workers draw from a single TokenBucket, so the combined request rate
+    stays at `requests_per_second` no matter how many sets are in flight.
+
+    Args:
+        set_codes (list): Set codes to export.
+        max_workers (int): Number of sets fetched at the same time.
+        base_url (str): API root, overridable to point at a local stub server.
+        requests_per_second (float): Total request rate across all workers.
+        cache (ResponseCache): Optional on-disk cache shared by all workers.
+
+    Returns:
+        list: The set codes that failed.
+    """
+    rate_limiter = TokenBucket(rate=requests_per_second)
+    max_workers = max(1, min(max_workers, len(set_codes)))
+    with create_session(pool_size=max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                code: executor.submit(export_set, code, session, rate_limiter, base_url, cache)
+                for code in set_codes
+            }
+            return [code for code, future in futures.items() if not future.result()]
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def main():
+    """
+    Main function to drive the script: gets user input, fetches data, filters, and writes to CSV.
+    """
+    args = parse_args()
+    if not args.trace:
+        run(args)
+        return
+    TRACER.enable()
+    try:
+        with span("fetch_cards_from_scryfall"):
+            run(args)
+    finally:
+        TRACER.write(args.trace)
+        print(f"Wrote trace to {args.trace}")
+
+
+def run(args):
+    """Runs the export described by the parsed command-line arguments."""
+    if args.bulk_file:
+        if not args.set_codes:
+            print("Bulk mode needs at least one set code. Exiting.")
+            sys.exit(1)
+        try:
+            export_sets_from_bulk(args.bulk_file, args.set_codes)
+        except (OSError, ValueError) as e:
+            print(f"Error exporting from bulk file '{args.bulk_file}': {e}")
+            sys.exit(1)
+        return
+
+    if args.set_codes:
+        set_codes = [code.strip() for code in args.set_codes]
+    else:
+        set_codes = [input("Enter the MTG set code (e.g., 'MKM', 'WOE', 'MH3'): ").strip()]
+
+    for set_code in set_codes:
+        if not set_code:
+            print("No set code entered. Exiting.")
+            sys.exit(1)
+
+        if len(set_code) < 2: # Scryfall usually uses 3-letter codes, but some are longer (e.g., "pip"). A minimum of 2 seems a safe generic check.
+            print(f"The entered set code '{set_code}' seems too short. Please enter a valid set code.")
+            sys.exit(1)
+
+    if args.offline and args.no_cache:
+        print("--offline needs the cache; it cannot be combined with --no-cache. Exiting.")
+        sys.exit(1)
+
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(
+            args.cache_dir,
+            ttl=args.cache_ttl,
+            max_bytes=int(args.cache_max_mb * 1024 * 1024),
+            offline=args.offline,
+        )
+
+    print(f"Attempting to fetch cards for set code(s): {', '.join(code.upper() for code in set_codes)}...")
+    started = time.monotonic()
+    try:
+        failed = export_sets(set_codes, max_workers=args.workers, base_url=args.base_url, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    print(f"Exported {len(set_codes) - len(failed)} of {len(set_codes)} set(s) in {time.monotonic() - started:.1f}s.")
+
+    if failed:
+        print(f"Failed set(s): {', '.join(code.upper() for code in failed)}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
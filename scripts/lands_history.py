@@ -0,0 +1,326 @@
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+import card_columns
+import card_sources
+
+# --- Configuration ---
+BASE_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "data"))
+
+# Per-set history of every ingested 17Lands export, next to the exports
+HISTORY_FILENAME = "17lands_history.jsonl.gz"
+
+# Date stamped into 17Lands export names, e.g. 17lands-TDM-card-ratings-2025-04-28.csv
+EXPORT_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+# Snapshot date of undated exports (17Lands_export_<set>.csv). Their file
+# times say when they were checked out, not when they were taken, and they
+# predate the dated naming, so they sort before every dated export
+UNDATED_SNAPSHOT_DATE = "0001-01-01"
+
+
+def snapshot_date(filepath):
+    """
+    The date a 17Lands export was taken: the date in its file name, or
+    UNDATED_SNAPSHOT_DATE for undated exports (17Lands_export_<set>.csv).
+    """
+    match = EXPORT_DATE_RE.search(os.path.basename(filepath))
+    return match.group(1) if match else UNDATED_SNAPSHOT_DATE
+
+
+def hash_file(filepath, chunk_size=1 << 20):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LandsHistory:
+    """
+    Append-only store of a set's 17Lands snapshots.
+
+    The store is one gzip'd JSON-lines file. Each ingested export adds a
+    snapshot record (date, file, hash, columns) followed by a row record for
+    every card whose values differ from what the store already holds for that
+    date, so re-ingesting an export or adding one where few cards moved costs
+    almost nothing. Each batch is written as its own gzip member, so existing
+    data is never rewritten.
+
+    The rows are indexed per card by date on first use, which makes latest(),
+    as_of() and delta() a binary search per card instead of a CSV parse;
+    checking whether an export is already stored never parses them.
+
+        history = LandsHistory.open("public/assets/data/tdm")
+        history.ingest("17lands-TDM-card-ratings-2025-05-12.csv", get_source("17Lands"))
+        drift = history.delta("2025-04-28", "2025-05-12", fields=["GIH WR"])
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshots = [] # Snapshot records in ingestion order
+        self._versions = {} # Card name -> (sorted dates, values per date)
+        self._unindexed = [] # Row lines not parsed yet; see _index()
+        self._load()
+
+    @classmethod
+    def open(cls, directory):
+        """Opens (or starts) the history stored in a set directory."""
+        return cls(os.path.join(directory, HISTORY_FILENAME))
+
+    # --- Queries ---
+
+    def dates(self):
+        """The distinct snapshot dates, oldest first."""
+        return sorted({snapshot["date"] for snapshot in self.snapshots})
+
+    def fields(self):
+        """The 17Lands columns of the newest snapshot."""
+        if not self.snapshots:
+            return []
+        return max(self.snapshots, key=lambda snapshot: snapshot["date"])["fields"]
+
+    def as_of(self, date):
+        """
+        The 17Lands data as it stood on `date` (YYYY-MM-DD): every card's
+        values from the newest snapshot taken on or before that date.
+
+        Returns:
+            dict: Card name -> {column: value}.
+        """
+        self._index()
+        result = {}
+        for name, (dates, values) in self._versions.items():
+            position = bisect.bisect_right(dates, date)
+            if position:
+                result[name] = values[position - 1]
+        return result
+
+    def latest(self):
+        """The data as of the newest snapshot."""
+        dates = self.dates()
+        return self.as_of(dates[-1]) if dates else {}
+
+    def delta(self, from_date, to_date, fields=None):
+        """
+        What changed between two dates.
+
+        Args:
+            from_date (str), to_date (str): YYYY-MM-DD.
+            fields (list): Columns to compare (default: all).
+
+        Returns:
+            dict: Card name -> {column: {'from', 'to', 'change'}} for the cards
+                  and columns whose value differs. 'change' is the numeric
+                  difference for rates and counts ("52.0%" -> "53.5%" is 1.5),
+                  None for text or missing values.
+        """
+        before = self.as_of(from_date)
+        after = self.as_of(to_date)
+        changes = {}
+        for name in sorted(set(before) | set(after)):
+            old = before.get(name, {})
+            new = after.get(name, {})
+            columns = fields or sorted(set(old) | set(new))
+            changed = {}
+            for column in columns:
+                old_value, new_value = old.get(column), new.get(column)
+                if old_value == new_value:
+                    continue
+                difference = card_columns.parse_metric(new_value) - card_columns.parse_metric(old_value)
+                changed[column] = {
+                    "from": old_value,
+                    "to": new_value,
+                    "change": None if difference != difference else round(difference, 4), # NaN check
+                }
+            if changed:
+                changes[name] = changed
+        return changes
+
+    def history(self, name, field=None):
+        """
+        The stored versions of one card, oldest first.
+
+        Returns:
+            list: (date, values) tuples, or (date, value) when `field` is given.
+        """
+        self._index()
+        dates, values = self._versions.get(name, ([], []))
+        if field is None:
+            return list(zip(dates, values))
+        return [(date, value.get(field)) for date, value in zip(dates, values)]
+
+    # --- Ingestion ---
+
+    def ingest(self, filepath, source, date=None):
+        """
+        Adds a 17Lands export to the store, unless an identical file was
+        ingested before.
+
+        Args:
+            filepath (str): The export.
+            source (card_sources.CsvSource): Reads the export; the 17Lands
+                entry of augment_scryfall_data.SOURCES. Every column is kept.
+            date (str): Snapshot date; defaults to snapshot_date(filepath).
+
+        Returns:
+            int: The number of row records written (0 if already ingested).
+        """
+        digest = hash_file(filepath)
+        if any(snapshot["sha256"] == digest for snapshot in self.snapshots):
+            return 0
+        date = date or snapshot_date(filepath)
+        name_column = source.key_column(card_sources.read_header(filepath))
+        fields = source.columns(filepath)
+        rows = source.load(filepath, fields)
+        self._index()
+
+        later_dates = [stored_date for stored_date in self.dates() if stored_date > date]
+        next_date = later_dates[0] if later_dates else None
+
+        records = []
+        for name, row in rows.items():
+            values = dict(zip(fields, row))
+            if self._value_at(name, date) == values:
+                continue
+            if next_date and self._last_date_at(name, next_date) is not None and self._last_date_at(name, next_date) < date:
+                # This export is older than one already stored, and that newer
+                # one was deduplicated against what will now no longer be the
+                # card's previous version: pin the newer snapshot's value first
+                records.append({"date": next_date, "name": name, "values": self._value_at(name, next_date)})
+            records.append({"date": date, "name": name, "values": values})
+
+        snapshot = {
+            "date": date,
+            "file": os.path.basename(filepath),
+            "sha256": digest,
+            "fields": fields,
+            "name_column": name_column,
+            "cards": len(rows),
+            "rows_stored": len(records),
+        }
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write(json.dumps({"snapshot": snapshot}, ensure_ascii=False) + "\n")
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._add_snapshot(snapshot)
+        for record in records:
+            self._add_row(record)
+        return len(records)
+
+    # --- Internals ---
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith('{"snapshot"'):
+                    self._add_snapshot(json.loads(line)["snapshot"])
+                else:
+                    self._unindexed.append(line)
+
+    def _index(self):
+        for line in self._unindexed:
+            self._add_row(json.loads(line))
+        self._unindexed = []
+
+    def _add_snapshot(self, snapshot):
+        self.snapshots.append(snapshot)
+
+    def _add_row(self, record):
+        dates, values = self._versions.setdefault(record["name"], ([], []))
+        position = bisect.bisect_right(dates, record["date"])
+        if position and dates[position - 1] == record["date"]:
+            values[position - 1] = record["values"] # A later record for the same date wins
+            return
+        dates.insert(position, record["date"])
+        values.insert(position, record["values"])
+
+    def _last_date_at(self, name, date):
+        dates, _ = self._versions.get(name, ([], []))
+        position = bisect.bisect_right(dates, date)
+        return dates[position - 1] if position else None
+
+    def _value_at(self, name, date):
+        dates, values = self._versions.get(name, ([], []))
+        position = bisect.bisect_right(dates, date)
+        return values[position - 1] if position else None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Query the 17Lands snapshot history of a set (built by augment_scryfall_data.py)."
+    )
+    parser.add_argument("set_code", help="Set code (e.g. tdm).")
+    parser.add_argument(
+        "--data-dir", default=BASE_DATA_PATH,
+        help="Directory containing the per-set data directories (default: public/assets/data)."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("ingest", help="Ingest every 17Lands export in the set directory.")
+    subparsers.add_parser("dates", help="List the snapshot dates.")
+    subparsers.add_parser("latest", help="Print the newest data of every card as JSON.")
+    as_of = subparsers.add_parser("as-of", help="Print every card's data as of a date as JSON.")
+    as_of.add_argument("date", help="YYYY-MM-DD")
+    delta = subparsers.add_parser("delta", help="Print what changed between two dates.")
+    delta.add_argument("from_date", help="YYYY-MM-DD")
+    delta.add_argument("to_date", help="YYYY-MM-DD")
+    delta.add_argument("--field", action="append", help="Only compare this column (repeatable), e.g. \"GIH WR\".")
+    history = subparsers.add_parser("history", help="Print the stored versions of one card.")
+    history.add_argument("name", help="Card name as 17Lands lists it.")
+    history.add_argument("--field", help="Only print this column.")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    set_code = args.set_code.strip().lower()
+    directory = os.path.join(args.data_dir, set_code)
+    if not os.path.isdir(directory):
+        print(f"Set directory not found: {directory}")
+        sys.exit(1)
+    history = LandsHistory.open(directory)
+
+    if args.command == "ingest":
+        # Imported here: augment_scryfall_data itself uses this module
+        from augment_scryfall_data import find_lands_files, get_source
+        exports = find_lands_files(directory, set_code)
+        lands_source = get_source("17Lands")
+        if not exports:
+            print(f"No 17Lands exports found in {directory}.")
+            sys.exit(1)
+        for filepath in exports:
+            written = history.ingest(filepath, lands_source)
+            print(f"{os.path.basename(filepath)} ({snapshot_date(filepath)}): {written} row(s) stored.")
+    elif args.command == "dates":
+        for date in history.dates():
+            print(date)
+    elif args.command == "latest":
+        json.dump(history.latest(), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.command == "as-of":
+        json.dump(history.as_of(args.date), sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.command == "delta":
+        changes = history.delta(args.from_date, args.to_date, args.field)
+        for name, columns in changes.items():
+            described = ", ".join(
+                f"{column} {change['from']} -> {change['to']}"
+                + (f" ({change['change']:+g})" if change["change"] is not None else "")
+                for column, change in columns.items()
+            )
+            print(f"{name}: {described}")
+        print(f"{len(changes)} card(s) changed between {args.from_date} and {args.to_date}.")
+    elif args.command == "history":
+        for date, value in history.history(args.name, args.field):
+            print(f"{date}  {value if args.field else json.dumps(value, ensure_ascii=False)}")
+
+if __name__ == "__main__":
+    main()
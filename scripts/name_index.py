@@ -0,0 +1,240 @@
+import csv
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+# Minimum Dice similarity of character trigrams for a name to be suggested
+# as the likely match of a name that did not join (see NameIndex.suggest)
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+# Length of the character n-grams used for suggestions
+NGRAM_SIZE = 3
+
+# Trigrams probed beyond the minimum the fuzzy search needs to be exact; more
+# probes cost more posting-list reads but let it skip more candidates
+FUZZY_EXTRA_PROBES = 4
+
+# Trigrams shared by more names than this are never probed, which bounds the
+# work per suggestion whatever the size of the source. A name made only of
+# such common trigrams gets no suggestion
+FUZZY_MAX_POSTINGS = 256
+
+# Candidates scored per suggestion, those sharing the most probed trigrams
+# with the name first
+FUZZY_MAX_CANDIDATES = 32
+
+# Separator between the faces of double-faced, split and adventure cards
+FACE_SEPARATOR = "//"
+
+# How a name was resolved, from most to least trustworthy. Trigram similarity
+# never joins on its own: it only suggests an alias (see NameIndex.suggest)
+MATCH_METHODS = ["exact", "alias", "normalized", "face"]
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s/]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_name(name):
+    """
+    Folds a card name to a join key: accents removed, case folded, punctuation
+    dropped and whitespace collapsed. "Lim-Dûl's Vault" -> "limduls vault".
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    folded = _PUNCTUATION_RE.sub("", without_accents.casefold())
+    return _WHITESPACE_RE.sub(" ", folded).strip()
+
+
+def split_faces(name):
+    """Returns the faces of a "Front // Back" name; a single-faced name is its own only face."""
+    return [face.strip() for face in name.split(FACE_SEPARATOR) if face.strip()]
+
+
+def load_aliases(*filepaths):
+    """
+    Loads alias tables (CSV with Alias,Name columns) mapping an alternative
+    spelling to the canonical card name. Missing files are ignored; later
+    files override earlier ones.
+    """
+    aliases = {}
+    for filepath in filepaths:
+        if not filepath or not os.path.isfile(filepath):
+            continue
+        with open(filepath, "r", newline="", encoding="utf-8-sig") as csvfile:
+            for row in csv.DictReader(csvfile):
+                alias = (row.get("Alias") or "").strip()
+                name = (row.get("Name") or "").strip()
+                if alias and name:
+                    aliases[alias] = name
+    return aliases
+
+
+class NameIndex:
+    """
+    Join index over the card names of one source.
+
+    All keys are built once up front: the exact names, their normalized form,
+    the normalized form of each face of multi-faced names, and an optional
+    alias table. lookup() tries them from most to least exact, so a join
+    stays a dictionary lookup per row.
+
+    Names that none of them resolve are not joined: a similar name is often
+    a different card ("A-Vivi Ornitier", the Alchemy rebalance, is not
+    "Vivi Ornitier"). suggest() finds the closest name through a
+    character-trigram index (built on first use) for the report, and a
+    suggestion becomes a join once it is confirmed in the alias table.
+    """
+
+    def __init__(self, records, aliases=None, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+        self.records = records
+        self.fuzzy_threshold = fuzzy_threshold
+        self._normalized = {}
+        self._faces = {}
+        ambiguous_faces = set()
+        for name in records:
+            self._normalized.setdefault(normalize_name(name), name)
+            faces = split_faces(name)
+            if len(faces) < 2:
+                continue
+            for face in faces:
+                key = normalize_name(face)
+                if key in self._faces and self._faces[key] != name:
+                    ambiguous_faces.add(key)
+                self._faces.setdefault(key, name)
+        for key in ambiguous_faces:
+            del self._faces[key]
+
+        self._aliases = {}
+        for alias, target in (aliases or {}).items():
+            resolved = target if target in records else self._normalized.get(normalize_name(target))
+            if resolved:
+                self._aliases[normalize_name(alias)] = resolved
+
+        self._ngrams = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return self.lookup(name)[0] is not None
+
+    def get(self, name):
+        """Returns the record `name` resolves to, or None."""
+        matched_name, _ = self.lookup(name)
+        return self.records[matched_name] if matched_name is not None else None
+
+    def lookup(self, name):
+        """
+        Resolves a card name from another source to a name in this index.
+
+        Returns:
+            tuple: (matched name, method) where method is one of MATCH_METHODS,
+                   or (None, None) if nothing matched.
+        """
+        if name in self.records:
+            return name, "exact"
+
+        key = normalize_name(name)
+        if key in self._aliases:
+            return self._aliases[key], "alias"
+        if key in self._normalized:
+            return self._normalized[key], "normalized"
+
+        # "Front // Back" looked up in a source that lists only one face, or
+        # a single face looked up in a source that lists "Front // Back"
+        if key in self._faces:
+            return self._faces[key], "face"
+        faces = split_faces(name)
+        if len(faces) > 1:
+            front_key = normalize_name(faces[0])
+            matched_name = self._normalized.get(front_key) or self._aliases.get(front_key) or self._faces.get(front_key)
+            if matched_name:
+                return matched_name, "face"
+
+        return None, None
+
+    def suggest(self, name):
+        """
+        The name in this index most similar to `name` (Dice similarity of
+        character trigrams of the normalized names, at least the fuzzy
+        threshold), for reporting a name lookup() did not resolve.
+
+        Returns:
+            tuple: (suggested name, similarity), or (None, None).
+        """
+        key = normalize_name(name)
+        if not key or self.fuzzy_threshold is None:
+            return None, None
+        if self._ngrams is None:
+            self._build_ngram_index()
+        best_key, best_score = self._closest_key(key)
+        if best_key is None:
+            return None, None
+        return self._normalized[best_key], best_score
+
+    def _closest_key(self, key):
+        # A candidate scoring at least the threshold shares at least
+        # `min_shared` trigrams with the query, so it must contain one of the
+        # query's (len - min_shared + 1) rarest trigrams. Probing only those
+        # (plus FUZZY_EXTRA_PROBES more) keeps common trigrams ("the", "of ")
+        # from turning every lookup into a scan of the whole index, and
+        # trigrams listed by more than FUZZY_MAX_POSTINGS names are skipped
+        # altogether, so a lookup reads a bounded number of postings and a
+        # batch of lookups stays linear in the source size. Only the
+        # FUZZY_MAX_CANDIDATES candidates with the most hits are scored, and
+        # those whose trigram count rules out the threshold are dropped
+        # before scoring. The hits among the probed trigrams bound each
+        # candidate's score, so candidates are visited most hits first and
+        # the scan stops at the first one that could not reach the threshold.
+        query_grams = _ngrams(key)
+        query_size = len(query_grams)
+        threshold = self.fuzzy_threshold
+        min_candidate_size = math.ceil(threshold * query_size / (2.0 - threshold) - 1e-9)
+        max_candidate_size = math.floor(query_size * (2.0 - threshold) / threshold + 1e-9)
+        min_shared = max(1, min_candidate_size)
+        probe_count = min(query_size, query_size - min_shared + 1 + FUZZY_EXTRA_PROBES)
+        postings = sorted(
+            (self._ngrams.get(gram, ()) for gram in query_grams),
+            key=len,
+        )[:probe_count]
+        hits = Counter()
+        probed = 0
+        for posting in postings:
+            if len(posting) > FUZZY_MAX_POSTINGS:
+                break # Sorted by length: every later posting is longer
+            hits.update(posting)
+            probed += 1
+        unprobed = query_size - probed
+
+        best_key, best_score = None, threshold
+        for candidate, candidate_hits in hits.most_common(FUZZY_MAX_CANDIDATES):
+            if 2.0 * (candidate_hits + unprobed) < best_score * (query_size + min_candidate_size) - 1e-9:
+                break
+            candidate_size = self._gram_counts[candidate]
+            if not min_candidate_size <= candidate_size <= max_candidate_size:
+                continue
+            if 2.0 * (candidate_hits + unprobed) < best_score * (query_size + candidate_size) - 1e-9:
+                continue
+            score = 2.0 * len(query_grams & _ngrams(candidate)) / (query_size + candidate_size)
+            if score > best_score or (score == best_score and (best_key is None or candidate < best_key)):
+                best_key, best_score = candidate, score
+        return (best_key, best_score) if best_key is not None else (None, None)
+
+    def _build_ngram_index(self):
+        # Only the trigram counts are kept per name; the few candidates scored
+        # per suggestion get their trigrams recomputed
+        self._ngrams = {}
+        self._gram_counts = {}
+        for key in self._normalized:
+            grams = _ngrams(key)
+            self._gram_counts[key] = len(grams)
+            for gram in grams:
+                self._ngrams.setdefault(gram, []).append(key)
+
+
+def _ngrams(key, size=NGRAM_SIZE):
+    """Distinct character n-grams of a padded key."""
+    padded = f"  {key} "
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
@@ -0,0 +1,214 @@
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak memory is then left out
+    resource = None
+
+# Trace files ending in this are written as a flat JSON summary; anything
+# else is written in the Chrome trace event format (chrome://tracing, Perfetto)
+SUMMARY_SUFFIX = ".summary.json"
+
+
+class Tracer:
+    """
+    Collects nested timing spans and counters for one pipeline run.
+
+    Disabled by default: span() then hands back a shared no-op context manager
+    and count() returns straight away, so instrumented code pays one attribute
+    check per call. Once enabled, spans record their start, duration, thread
+    and process; nesting follows from the timestamps, as in Chrome traces.
+    Safe to use from several threads.
+
+        with span("augment_set", set_code="tdm"):
+            with span("load_17lands"):
+                ...
+            count("rows", 271)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._events = []
+        self._counters = {}
+        self._worker_peak_rss = None
+        self._started = time.perf_counter()
+
+    def enable(self):
+        """Starts recording, discarding anything recorded before."""
+        with self._lock:
+            self._events = []
+            self._counters = {}
+            self._worker_peak_rss = None
+            self._started = time.perf_counter()
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def _record(self, name, start, end, args):
+        event = {
+            "name": name,
+            "start": start - self._started,
+            "duration": end - start,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def export(self):
+        """Returns the recorded spans and counters, e.g. to send them back from a worker process."""
+        with self._lock:
+            return {
+                "started": self._started,
+                "events": list(self._events),
+                "counters": dict(self._counters),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "worker_peak_rss_bytes": self._worker_peak_rss,
+            }
+
+    def merge(self, exported):
+        """Adds spans and counters exported by another process (see export())."""
+        if not self.enabled or not exported:
+            return
+        # perf_counter is system-wide on the platforms we run on, so shifting
+        # by the difference in start times lines the processes up
+        offset = exported["started"] - self._started
+        with self._lock:
+            for event in exported["events"]:
+                self._events.append(dict(event, start=event["start"] + offset))
+            for name, value in exported["counters"].items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            if exported.get("peak_rss_bytes"):
+                self._worker_peak_rss = max(self._worker_peak_rss or 0, exported["peak_rss_bytes"])
+
+    def write(self, path):
+        """
+        Writes the trace to `path`: a JSON summary (spans, per-name totals,
+        counters, peak memory) if it ends in SUMMARY_SUFFIX, otherwise a
+        Chrome trace event file.
+        """
+        data = self.export()
+        if path.endswith(SUMMARY_SUFFIX):
+            payload = summarize(data)
+        else:
+            payload = to_chrome_trace(data)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=1)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process so far, or None where the platform does not report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024 # Linux reports KiB, macOS bytes
+
+
+def summarize(data):
+    """Per-span-name call counts and total seconds plus the raw spans and counters."""
+    totals = {}
+    for event in data["events"]:
+        total = totals.setdefault(event["name"], {"calls": 0, "seconds": 0.0})
+        total["calls"] += 1
+        total["seconds"] += event["duration"]
+    return {
+        "totals": dict(sorted(totals.items(), key=lambda item: -item[1]["seconds"])),
+        "counters": dict(sorted(data["counters"].items())),
+        "peak_rss_bytes": data["peak_rss_bytes"],
+        "worker_peak_rss_bytes": data["worker_peak_rss_bytes"],
+        "spans": sorted(data["events"], key=lambda event: event["start"]),
+    }
+
+
+def to_chrome_trace(data):
+    """Converts recorded spans and counters to the Chrome trace event format."""
+    events = [
+        {
+            "name": event["name"],
+            "ph": "X",
+            "ts": event["start"] * 1e6,
+            "dur": event["duration"] * 1e6,
+            "pid": event["pid"],
+            "tid": event["tid"],
+            "args": event["args"],
+        }
+        for event in sorted(data["events"], key=lambda event: event["start"])
+    ]
+    end = max((event["ts"] + event["dur"] for event in events), default=0)
+    events.extend(
+        {"name": name, "ph": "C", "ts": end, "pid": os.getpid(), "tid": 0, "args": {"value": value}}
+        for name, value in sorted(data["counters"].items())
+    )
+    return {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": {
+            "peak_rss_bytes": data["peak_rss_bytes"],
+            "worker_peak_rss_bytes": data["worker_peak_rss_bytes"],
+            "counters": data["counters"],
+        },
+    }
+
+
+# Shared by every instrumented module in a process
+TRACER = Tracer()
+
+
+def span(name, **args):
+    """A timing span on the shared tracer; a no-op while tracing is disabled."""
+    return TRACER.span(name, **args)
+
+
+def count(name, value=1):
+    """Adds to a counter on the shared tracer; a no-op while tracing is disabled."""
+    TRACER.count(name, value)
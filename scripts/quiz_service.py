@@ -0,0 +1,548 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import secrets
+import signal
+import sqlite3
+import sys
+import time
+import urllib.parse
+
+import card_database
+from build_card_bundle import (
+    BUNDLE_FIELDS, IMAGES_PATH, discover_merged_sets, iter_bundle_cards, load_local_images, load_set_rows,
+)
+
+# --- Configuration ---
+BASE_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "public", "assets", "data"))
+SCORES_FILENAME = "quiz_scores.sqlite" # In the data root, next to the card database
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Grade scale of the quiz, worst to best (mirrors `grades` in public/js/ui.js).
+# The error of an answer is its distance from the true grade on this scale.
+QUIZ_GRADES = ["F", "D-", "D", "D+", "C-", "C", "C+", "B-", "B", "B+", "A-", "A", "A+"]
+GRADE_INDEX = {grade: index for index, grade in enumerate(QUIZ_GRADES)}
+
+# Spaced repetition for "weighted" sessions: each card's running error is an
+# exponential moving average of the user's errors on it (in grade steps), and a
+# card is dealt with weight 1 + ERROR_WEIGHT * running error. Cards the user
+# has not graded yet count as UNSEEN_ERROR, so new cards are not starved by
+# a few badly known ones.
+ERROR_DECAY = 0.5 # Share of the newest error in the running error
+ERROR_WEIGHT = 1.0
+UNSEEN_ERROR = 2.0
+
+SAMPLING_MODES = ("shuffle", "weighted")
+
+# Card fields served by GET /sets/<set>/cards: the bundle fields without the
+# grade, which a quiz only reveals once the card is answered
+PUBLIC_CARD_FIELDS = [field for field in BUNDLE_FIELDS if field != "trueGrade"]
+
+# Sessions not used for this long are dropped (their scores are already stored)
+SESSION_IDLE_SECONDS = 60 * 60
+# Answers are written to the score store in batches, at most this often
+SCORE_FLUSH_SECONDS = 0.5
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_USER_LENGTH = 64
+
+_SET_CODE_RE = re.compile(r"^[a-z0-9]{2,10}$")
+
+SCORES_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS answers (
+    user TEXT NOT NULL,
+    set_code TEXT NOT NULL,
+    card TEXT NOT NULL,
+    true_grade TEXT NOT NULL,
+    user_grade TEXT NOT NULL,
+    error INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_user ON answers (user, true_grade);
+CREATE TABLE IF NOT EXISTS card_scores (
+    user TEXT NOT NULL,
+    set_code TEXT NOT NULL,
+    card TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    exact INTEGER NOT NULL,
+    running_error REAL NOT NULL,
+    last_answered_at REAL NOT NULL,
+    PRIMARY KEY (user, set_code, card)
+);
+"""
+
+
+class QuizError(Exception):
+    """Raised for a request the service cannot serve; carries the HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Sampling ---
+
+class ShuffleSampler:
+    """
+    Uniform sampling without replacement: a Fisher-Yates shuffle carried out one
+    draw at a time, so each draw is O(1) and no card repeats until every card
+    has been dealt. Then the next round starts.
+    """
+
+    def __init__(self, size, rng):
+        self._order = list(range(size))
+        self._remaining = size
+        self._rng = rng
+
+    def draw(self):
+        if self._remaining == 0:
+            self._remaining = len(self._order)
+        last = self._remaining - 1
+        pick = self._rng.randrange(self._remaining)
+        self._order[pick], self._order[last] = self._order[last], self._order[pick]
+        self._remaining = last
+        return self._order[last]
+
+
+class WeightedSampler:
+    """
+    Weighted sampling without replacement (Efraimidis-Spirakis): at the start of
+    each round every card gets the key Exp(1) / weight, and the round deals the
+    cards in ascending key order. That is one O(n log n) sort per round of n
+    draws, so O(log n) amortized per draw (the draws themselves are list pops);
+    heavier cards come up earlier, and no card repeats within a round.
+
+    `weights` is called at the start of every round, so errors made during a
+    round shape the next one.
+    """
+
+    def __init__(self, weights, rng):
+        self._weights = weights
+        self._order = []
+        self._rng = rng
+
+    def draw(self):
+        if not self._order:
+            keyed = [(self._rng.expovariate(1.0) / weight, index) for index, weight in enumerate(self._weights())]
+            keyed.sort(reverse=True) # Popped from the end: smallest key first
+            self._order = [index for _, index in keyed]
+        return self._order.pop()
+
+
+# --- Scores ---
+
+class ScoreStore:
+    """
+    Per-user quiz results in SQLite: every answer (for accuracy per true grade)
+    and a running error per user, set and card (for spaced repetition).
+
+    Not thread-safe; QuizService serializes access and runs it off the event loop.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=card_database.BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCORES_SCHEMA_SQL)
+
+    def running_errors(self, user, set_code):
+        """Card name -> running error, for the cards the user has graded in the set."""
+        return dict(self.conn.execute(
+            "SELECT card, running_error FROM card_scores WHERE user = ? AND set_code = ?", (user, set_code)
+        ))
+
+    def record(self, answers):
+        """
+        Stores a batch of answers in one transaction.
+
+        Args:
+            answers (list): Dicts with user, set_code, card, true_grade, user_grade,
+                            error, running_error and answered_at.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO answers (user, set_code, card, true_grade, user_grade, error, answered_at) "
+                "VALUES (:user, :set_code, :card, :true_grade, :user_grade, :error, :answered_at)",
+                answers,
+            )
+            self.conn.executemany(
+                "INSERT INTO card_scores (user, set_code, card, attempts, exact, running_error, last_answered_at) "
+                "VALUES (:user, :set_code, :card, 1, :error = 0, :running_error, :answered_at) "
+                "ON CONFLICT (user, set_code, card) DO UPDATE SET attempts = attempts + 1, "
+                "exact = exact + excluded.exact, running_error = excluded.running_error, "
+                "last_answered_at = excluded.last_answered_at",
+                answers,
+            )
+
+    def grade_accuracy(self, user):
+        """
+        The user's results per true grade.
+
+        Returns:
+            dict: True grade -> {'attempts', 'exact', 'accuracy', 'mean_error'}, in QUIZ_GRADES order.
+        """
+        rows = self.conn.execute(
+            "SELECT true_grade, COUNT(*), SUM(error = 0), AVG(error) FROM answers WHERE user = ? GROUP BY true_grade",
+            (user,),
+        ).fetchall()
+        rows.sort(key=lambda row: GRADE_INDEX.get(row[0], len(QUIZ_GRADES)))
+        return {
+            grade: {"attempts": attempts, "exact": exact, "accuracy": exact / attempts, "mean_error": mean_error}
+            for grade, attempts, exact, mean_error in rows
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+# --- Sessions ---
+
+class QuizSession:
+    """One user's run through one set: the sampler and the card being graded."""
+
+    def __init__(self, session_id, user, set_code, mode, cards, running_errors, rng):
+        self.id = session_id
+        self.user = user
+        self.set_code = set_code
+        self.mode = mode
+        self.cards = cards
+        # The user's running error per card of this set, shared with the sampler
+        self.running_errors = running_errors
+        self.current = None
+        self.last_used = time.monotonic()
+        if mode == "weighted":
+            self.sampler = WeightedSampler(self.weights, rng)
+        else:
+            self.sampler = ShuffleSampler(len(cards), rng)
+
+    def weights(self):
+        return [
+            1.0 + ERROR_WEIGHT * self.running_errors.get(card["name"], UNSEEN_ERROR)
+            for card in self.cards
+        ]
+
+
+class QuizService:
+    """
+    Serves set data and quiz sessions over HTTP from a single asyncio event loop.
+
+    Sessions live in memory and cost one sampler each, so one process handles
+    many concurrent quizzes. Card data is loaded once per set (from the card
+    database, or the merged CSV) and shared by every session on that set.
+    Answers update the in-memory running errors at once and are written to the
+    score store in batches by a background task.
+    """
+
+    def __init__(self, data_dir=BASE_DATA_PATH, images_dir=IMAGES_PATH, scores_path=None, seed=None):
+        self.data_dir = data_dir
+        self.images_dir = images_dir
+        self.scores = ScoreStore(scores_path or os.path.join(data_dir, SCORES_FILENAME))
+        self.rng = random.Random(seed)
+        self.sessions = {}
+        self._set_cards = {}
+        self._set_locks = {}
+        self._running_errors = {} # (user, set code) -> {card name: running error}
+        self._pending_answers = []
+        self._store_lock = asyncio.Lock()
+
+    # --- Data ---
+
+    def available_sets(self):
+        return [set_code for set_code in discover_merged_sets(self.data_dir) if _SET_CODE_RE.match(set_code)]
+
+    async def set_cards(self, set_code):
+        """A set's cards as bundle dicts (see build_card_bundle.BUNDLE_FIELDS), loaded once."""
+        if set_code in self._set_cards:
+            return self._set_cards[set_code]
+        if not _SET_CODE_RE.match(set_code):
+            raise QuizError(404, f"Unknown set: {set_code}")
+        lock = self._set_locks.setdefault(set_code, asyncio.Lock())
+        async with lock:
+            if set_code not in self._set_cards:
+                cards = await asyncio.to_thread(self._load_set_cards, set_code)
+                if not cards:
+                    raise QuizError(404, f"No card data for set: {set_code}")
+                self._set_cards[set_code] = cards
+        return self._set_cards[set_code]
+
+    def _load_set_cards(self, set_code):
+        rows, _ = load_set_rows(set_code, self.data_dir)
+        if rows is None:
+            return []
+        local_images = load_local_images(set_code, self.images_dir)
+        return [dict(zip(BUNDLE_FIELDS, card)) for card in iter_bundle_cards(rows, local_images)]
+
+    async def running_errors(self, user, set_code):
+        key = (user, set_code)
+        if key not in self._running_errors:
+            async with self._store_lock:
+                errors = await asyncio.to_thread(self.scores.running_errors, user, set_code)
+            self._running_errors.setdefault(key, errors)
+        return self._running_errors[key]
+
+    # --- Quiz ---
+
+    async def start_session(self, user, set_code, mode="shuffle"):
+        if not isinstance(user, str) or not user.strip() or len(user) > MAX_USER_LENGTH:
+            raise QuizError(400, f"'user' must be a non-empty string of at most {MAX_USER_LENGTH} characters")
+        if not isinstance(mode, str) or mode not in SAMPLING_MODES:
+            raise QuizError(400, f"'mode' must be one of: {', '.join(SAMPLING_MODES)}")
+        if not isinstance(set_code, str):
+            raise QuizError(400, "'set' must be a set code string")
+        set_code = set_code.strip().lower()
+        cards = await self.set_cards(set_code)
+        errors = await self.running_errors(user, set_code)
+        session_id = secrets.token_urlsafe(12)
+        self.sessions[session_id] = QuizSession(session_id, user, set_code, mode, cards, errors, self.rng)
+        return {"session": session_id, "set": set_code, "mode": mode, "cards": len(cards)}
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise QuizError(404, "Unknown or expired session")
+        session.last_used = time.monotonic()
+        return session
+
+    def next_card(self, session_id):
+        """Deals the next card; its grade and details stay hidden until it is answered."""
+        session = self.session(session_id)
+        index = session.sampler.draw()
+        session.current = index
+        card = session.cards[index]
+        return {"index": index, "name": card["name"], "image": card["image"]}
+
+    def answer(self, session_id, grade):
+        """Grades the user's answer for the current card and queues it for the score store."""
+        session = self.session(session_id)
+        if session.current is None:
+            raise QuizError(409, "No card has been dealt in this session")
+        if not isinstance(grade, str) or grade not in GRADE_INDEX:
+            raise QuizError(400, f"'grade' must be one of: {', '.join(QUIZ_GRADES)}")
+        card = session.cards[session.current]
+        session.current = None
+        result = dict(card, userGrade=grade, error=None, correct=None)
+        if card["trueGrade"] not in GRADE_INDEX: # "N/A": nothing to score against
+            return result
+
+        error = abs(GRADE_INDEX[grade] - GRADE_INDEX[card["trueGrade"]])
+        previous = session.running_errors.get(card["name"])
+        running_error = error if previous is None else ERROR_DECAY * error + (1 - ERROR_DECAY) * previous
+        session.running_errors[card["name"]] = running_error
+        self._pending_answers.append({
+            "user": session.user,
+            "set_code": session.set_code,
+            "card": card["name"],
+            "true_grade": card["trueGrade"],
+            "user_grade": grade,
+            "error": error,
+            "running_error": running_error,
+            "answered_at": time.time(),
+        })
+        result.update(error=error, correct=error == 0)
+        return result
+
+    async def user_stats(self, user):
+        await self.flush_scores()
+        async with self._store_lock:
+            grades = await asyncio.to_thread(self.scores.grade_accuracy, user)
+        attempts = sum(entry["attempts"] for entry in grades.values())
+        exact = sum(entry["exact"] for entry in grades.values())
+        return {
+            "user": user,
+            "attempts": attempts,
+            "accuracy": exact / attempts if attempts else None,
+            "grades": grades,
+        }
+
+    # --- Background work ---
+
+    async def flush_scores(self):
+        """Writes the pending answers; if that fails they stay pending and the error is raised."""
+        if not self._pending_answers:
+            return
+        batch, self._pending_answers = self._pending_answers, []
+        try:
+            async with self._store_lock:
+                await asyncio.to_thread(self.scores.record, batch)
+        except Exception:
+            self._pending_answers = batch + self._pending_answers
+            raise
+
+    async def maintain(self):
+        """
+        Flushes answers and drops idle sessions until cancelled. A failed flush
+        is reported and retried on the next pass; answers still pending at
+        shutdown are flushed by close(), which raises if that fails too.
+        """
+        while True:
+            await asyncio.sleep(SCORE_FLUSH_SECONDS)
+            try:
+                await self.flush_scores()
+            except Exception as e:
+                print(f"Could not store {len(self._pending_answers)} answer(s), will retry: {e}")
+            cutoff = time.monotonic() - SESSION_IDLE_SECONDS
+            for session_id in [sid for sid, session in self.sessions.items() if session.last_used < cutoff]:
+                del self.sessions[session_id]
+
+    # --- HTTP ---
+
+    async def dispatch(self, method, target, body):
+        """Routes a request; returns (status, JSON-serializable payload)."""
+        path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+        parts = [part for part in path.split("/") if part]
+        payload = {}
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise QuizError(400, "The request body is not valid JSON")
+            if not isinstance(payload, dict):
+                raise QuizError(400, "The request body must be a JSON object")
+
+        if method == "GET" and parts == ["sets"]:
+            return 200, {"sets": self.available_sets()}
+        if method == "GET" and len(parts) == 3 and parts[0] == "sets" and parts[2] == "cards":
+            cards = await self.set_cards(parts[1].lower())
+            return 200, {
+                "set": parts[1],
+                "fields": PUBLIC_CARD_FIELDS,
+                "cards": [{field: card[field] for field in PUBLIC_CARD_FIELDS} for card in cards],
+            }
+        if method == "POST" and parts == ["sessions"]:
+            return 201, await self.start_session(payload.get("user"), payload.get("set"), payload.get("mode", "shuffle"))
+        if len(parts) == 3 and parts[0] == "sessions":
+            if method == "POST" and parts[2] == "next":
+                return 200, self.next_card(parts[1])
+            if method == "POST" and parts[2] == "answer":
+                return 200, self.answer(parts[1], payload.get("grade"))
+        if method == "DELETE" and len(parts) == 2 and parts[0] == "sessions":
+            self.session(parts[1])
+            del self.sessions[parts[1]]
+            return 200, {"deleted": parts[1]}
+        if method == "GET" and len(parts) == 3 and parts[0] == "users" and parts[2] == "stats":
+            return 200, await self.user_stats(parts[1])
+        raise QuizError(404, f"No route for {method} {path}")
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests on one connection, keeping it open between requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                if method == "OPTIONS":
+                    status, payload = 204, None
+                else:
+                    try:
+                        status, payload = await self.dispatch(method, target, body)
+                    except QuizError as e:
+                        status, payload = e.status, {"error": str(e)}
+                    except Exception as e:
+                        print(f"Error serving {method} {target}: {e!r}")
+                        status, payload = 500, {"error": "Internal server error"}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        reason = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+                  409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}.get(status, "Error")
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            # The front end is served from another origin (Firebase hosting or a local server)
+            "Access-Control-Allow-Origin: *\r\n"
+            "Access-Control-Allow-Methods: GET, POST, DELETE, OPTIONS\r\n"
+            "Access-Control-Allow-Headers: Content-Type\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def close(self):
+        await self.flush_scores()
+        self.scores.close()
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Runs the service until cancelled, flushing pending answers on the way out."""
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    maintenance = asyncio.create_task(service.maintain())
+    try:
+        # Stop as on Ctrl-C, so the last batch of answers is stored
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError: # Windows event loops do not support signal handlers
+        pass
+    addresses = ", ".join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+    print(f"Quiz service listening on {addresses} (sets: {', '.join(service.available_sets()) or 'none'}).")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        maintenance.cancel()
+        await service.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve merged set data and card-grading quiz sessions with per-user scores over HTTP."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument(
+        "--data-dir", default=BASE_DATA_PATH,
+        help="Directory containing the per-set data directories (default: public/assets/data)."
+    )
+    parser.add_argument(
+        "--images-dir", default=IMAGES_PATH,
+        help="Directory containing the per-set images from download_card_images.py (default: public/assets/images)."
+    )
+    parser.add_argument(
+        "--scores", default=None,
+        help=f"SQLite file for the per-user scores (default: {SCORES_FILENAME} in the data directory)."
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if not os.path.isdir(args.data_dir):
+        print(f"Data directory not found: {args.data_dir}")
+        sys.exit(1)
+    service = QuizService(args.data_dir, args.images_dir, args.scores)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("Stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+# Default location of the cache, relative to the repository root
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".scryfall_cache"))
+
+# Responses younger than this are served without contacting Scryfall (seconds)
+DEFAULT_TTL = 24 * 60 * 60
+
+# Total size of cached bodies before least-recently-used entries are evicted (bytes)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+INDEX_FILENAME = "index.json"
+
+
+class ResponseCache:
+    """
+    Persistent, URL-keyed cache of HTTP GET response bodies.
+
+    Each entry stores the body on disk together with its ETag and Last-Modified
+    validators. Entries younger than `ttl` are served straight from disk; older
+    ones are revalidated with a conditional request and a 304 reuses the stored
+    body. When the bodies exceed `max_bytes` the least recently used entries are
+    evicted. In offline mode the network is never touched: cached entries are
+    served regardless of age and misses raise a ConnectionError.
+
+    Access times and new entries are recorded in memory; the index is written
+    when entries are evicted and on close(), so a fully cached run writes it
+    once. Use the cache as a context manager (or call close()) to keep them.
+
+    The cache is safe to share between the fetcher's worker threads.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+        self._dirty = False # The index has changes not yet written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, url, fetch):
+        """
+        Returns the response for `url`, from disk when possible.
+
+        Args:
+            url (str): The URL being requested; used as the cache key.
+            fetch (callable): Called as fetch(headers=...) with any conditional
+                request headers when the network has to be consulted. Must
+                return a requests.Response.
+
+        Returns:
+            requests.Response: A live response, or a synthesized 200 response
+            carrying the cached body (with `from_cache` set to True).
+
+        Raises:
+            requests.exceptions.ConnectionError: In offline mode, if `url` is not cached.
+        """
+        key = self._key(url)
+        with self._lock:
+            entry = self._index.get(key)
+            body = self._read_body(key) if entry else None
+            if body is None:
+                entry = None
+
+        if entry and (self.offline or time.time() - entry["stored_at"] < self.ttl):
+            return self._hit(key, entry, body)
+
+        if self.offline:
+            raise requests.exceptions.ConnectionError(f"Offline mode: no cached response for {url}")
+
+        conditional_headers = {}
+        if entry and entry.get("etag"):
+            conditional_headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            conditional_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = fetch(headers=conditional_headers or None)
+
+        if response.status_code == 304 and entry:
+            with self._lock:
+                entry["stored_at"] = time.time()
+                self._dirty = True
+            return self._hit(key, entry, body)
+
+        if response.status_code == 200:
+            self._store(key, url, response)
+        return response
+
+    def clear(self):
+        """Removes every cached entry."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def close(self):
+        """Writes the index if it changed since it was last written."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    # --- Internals ---
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.directory, f"{key}.body")
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILENAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable cache index in {self.directory}: {e}")
+            return {}
+
+    def _save_index(self):
+        index_path = os.path.join(self.directory, INDEX_FILENAME)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, index_path)
+        self._dirty = False
+
+    def _read_body(self, key):
+        try:
+            with open(self._body_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _hit(self, key, entry, body):
+        with self._lock:
+            entry["last_access"] = time.time()
+            self._dirty = True
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry["url"]
+        response._content = body
+        response.encoding = entry.get("encoding") or "utf-8"
+        response.headers = requests.structures.CaseInsensitiveDict(
+            {"Content-Type": entry.get("content_type") or "application/json"}
+        )
+        response.from_cache = True
+        return response
+
+    def _store(self, key, url, response):
+        body = response.content
+        now = time.time()
+        with self._lock:
+            tmp_path = f"{self._body_path(key)}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, self._body_path(key))
+            self._index[key] = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_type": response.headers.get("Content-Type"),
+                "encoding": response.encoding,
+                "size": len(body),
+                "stored_at": now,
+                "last_access": now,
+            }
+            self._dirty = True
+            if self._evict():
+                self._save_index()
+
+    def _evict(self):
+        """Removes least recently used entries beyond max_bytes; returns whether any were."""
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return False
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            self._remove(key)
+        return True
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._body_path(key))
+        except FileNotFoundError:
+            pass
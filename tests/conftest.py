@@ -0,0 +1,110 @@
+import http.server
+import json
+import os
+import sys
+import threading
+import urllib.parse
+
+import pytest
+
+# The pipeline is a set of flat scripts; make them importable as modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+
+class StubScryfall:
+    """
+    Local stand-in for the Scryfall search API and image CDN.
+
+    Serves paginated /cards/search results for the sets in `sets` (set code ->
+    list of pages, each a list of card objects) with an ETag per page, and the
+    files in `files` (path -> bytes) with optional Range support. Every request
+    is recorded, and the next `throttle` API requests are answered 429.
+    """
+
+    def __init__(self):
+        self.sets = {}
+        self.files = {}
+        self.ranges = True
+        self.throttle = 0
+        self.retry_after = "1"
+        self.requests = [] # (path, headers) in arrival order
+        self.statuses = [] # Status of each response, aligned with `requests`
+        self.base_url = None
+        self._lock = threading.Lock()
+
+    def page_url(self, set_code, page):
+        url = f"{self.base_url}/cards/search?q=e%3A{set_code}&unique=cards"
+        return url if page == 1 else f"{url}&page={page}"
+
+    def respond(self, path, headers):
+        with self._lock:
+            self.requests.append((path, dict(headers)))
+            if self.throttle and path.startswith("/cards/"):
+                self.throttle -= 1
+                return 429, {"Retry-After": self.retry_after}, b""
+        parsed = urllib.parse.urlparse(path)
+        if parsed.path == "/cards/search":
+            return self._search(urllib.parse.parse_qs(parsed.query), headers)
+        if parsed.path in self.files:
+            return self._file(self.files[parsed.path], headers)
+        return 404, {}, b"{}"
+
+    def _search(self, query, headers):
+        set_code = query["q"][0].split(":", 1)[1]
+        page = int(query.get("page", ["1"])[0])
+        pages = self.sets.get(set_code)
+        if pages is None:
+            return 404, {"Content-Type": "application/json"}, json.dumps({"code": "no_set", "details": f"No set found for {set_code}"}).encode()
+        etag = f'"{set_code}-{page}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        body = {"data": pages[page - 1], "has_more": page < len(pages)}
+        if page < len(pages):
+            body["next_page"] = self.page_url(set_code, page + 1)
+        return 200, {"Content-Type": "application/json", "ETag": etag}, json.dumps(body).encode()
+
+    def _file(self, data, headers):
+        requested = headers.get("Range")
+        if requested and self.ranges:
+            start = int(requested.split("=", 1)[1].rstrip("-"))
+            if start >= len(data):
+                return 416, {}, b""
+            return 206, {"Content-Range": f"bytes {start}-{len(data) - 1}/{len(data)}"}, data[start:]
+        return 200, {"Content-Type": "application/octet-stream"}, data
+
+
+def _handler_for(stub):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            status, headers, body = stub.respond(self.path, self.headers)
+            with stub._lock:
+                stub.statuses.append(status)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def scryfall_stub():
+    """A StubScryfall served on a free local port for the duration of a test."""
+    stub = StubScryfall()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(stub))
+    server.daemon_threads = True
+    stub.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield stub
+    finally:
+        server.shutdown()
+        server.server_close()
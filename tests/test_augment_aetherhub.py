@@ -0,0 +1,92 @@
+import pytest
+
+import augment_scryfall_data as augment
+
+EXPORT = """Air Response Unit
+AI Rating: 2.2
+Pro Rating: 2.5
+This is easy to crew and quite good on offense and defense.
+
+
+Alacrian Armory
+AI Rating: 2.4
+Pro Rating: 1.0 //
+2.5
+Too all in on Mounts and Vehicles to be consistently good.
+
+
+Basri, Tomorrow's Champion
+AI Rating: 4.3
+Pro Rating: 4
+He's great on turn one.
+
+The cycling mode won't come up a ton in Limited.
+
+
+Bay Bridge
+AI Rating: 1.1
+Only playable in the right deck.
+
+
+Windcrag Siege
+AI Rating: 3.0
+Pro Rating:
+
+
+Last Card
+AI Rating: 2
+Pro Rating: 1.5 // 3
+"""
+
+
+@pytest.fixture(params=["\n", "\r\n"], ids=["lf", "crlf"])
+def records(request):
+    buffer = EXPORT.replace("\n", request.param).encode("utf-8")
+    return {record["name"]: record for record in augment.iter_aetherhub_records(buffer)}
+
+
+def test_every_record_is_found(records):
+    assert list(records) == ["Air Response Unit", "Alacrian Armory", "Basri, Tomorrow's Champion", "Bay Bridge", "Windcrag Siege", "Last Card"]
+    assert records["Air Response Unit"] == {
+        "name": "Air Response Unit",
+        "ai_rating": "2.2",
+        "pro_rating": "2.5",
+        "pro_ratings": ["2.5"],
+        "comment": "This is easy to crew and quite good on offense and defense.",
+    }
+
+
+def test_split_ratings(records):
+    assert records["Last Card"]["pro_ratings"] == ["1.5", "3"]
+    # Wrapped after the "//": the second half is part of the rating, not the comment
+    assert records["Alacrian Armory"]["pro_rating"] == "1.0 // 2.5"
+    assert records["Alacrian Armory"]["pro_ratings"] == ["1.0", "2.5"]
+    assert records["Alacrian Armory"]["comment"] == "Too all in on Mounts and Vehicles to be consistently good."
+
+
+def test_multi_paragraph_comments_are_joined(records):
+    assert records["Basri, Tomorrow's Champion"]["comment"] == "He's great on turn one. The cycling mode won't come up a ton in Limited."
+
+
+def test_records_without_a_pro_rating(records):
+    assert records["Bay Bridge"]["pro_rating"] == ""
+    assert records["Bay Bridge"]["pro_ratings"] == []
+    assert records["Bay Bridge"]["comment"] == "Only playable in the right deck."
+    assert (records["Windcrag Siege"]["pro_rating"], records["Windcrag Siege"]["comment"]) == ("", "")
+
+
+def test_comments_are_skipped_on_request():
+    records = list(augment.iter_aetherhub_records(EXPORT.encode("utf-8"), comments=False))
+
+    assert [record["comment"] for record in records] == [""] * 6
+    assert records[1]["pro_ratings"] == ["1.0", "2.5"]
+
+
+def test_load_aetherhub_data_projects_columns(tmp_path):
+    path = tmp_path / "aetherhub_export_aaa.txt"
+    path.write_bytes(EXPORT.replace("\n", "\r\n").encode("utf-8"))
+
+    data = augment.load_aetherhub_data(str(path), ["Pro_Rating", "Comment"])
+
+    assert data["Alacrian Armory"] == ("1.0 // 2.5", "Too all in on Mounts and Vehicles to be consistently good.")
+    assert data["Windcrag Siege"] == ("", "N/A")
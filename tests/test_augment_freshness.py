@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+import augment_scryfall_data as augment
+import benchmark_pipeline
+import card_database
+import fetch_cards_from_scryfall as fetcher
+
+SET_CODES = ["aaa", "bbb", "ccc"]
+CARDS_PER_SET = 40
+
+
+def write_set_inputs(data_dir, set_code, seed):
+    """A small synthetic set: Scryfall export, 17Lands export and AetherHub export."""
+    set_dir = os.path.join(data_dir, set_code)
+    os.makedirs(set_dir)
+    cards = benchmark_pipeline.synthetic_scryfall_cards(CARDS_PER_SET, seed)
+    names = [card["name"] for card in cards]
+    fetcher.write_cards_to_csv(cards, os.path.join(set_dir, augment.SCRYFALL_EXPORT_FILENAME_TEMPLATE.format(set_code=set_code)))
+    benchmark_pipeline.write_synthetic_lands_csv(
+        os.path.join(set_dir, augment.LANDS_FILENAME_TEMPLATE_PATTERN_2.format(set_code=set_code)), names, seed)
+    benchmark_pipeline.write_synthetic_aetherhub_txt(
+        os.path.join(set_dir, augment.AETHERHUB_FILENAME_TEMPLATE_PATTERN_2.format(set_code=set_code)), names, seed)
+
+
+@pytest.mark.parametrize("attempt", range(3)) # The lost-set race was intermittent
+def test_parallel_build_then_noop(tmp_path, attempt):
+    data_dir = str(tmp_path)
+    for seed, set_code in enumerate(SET_CODES):
+        write_set_inputs(data_dir, set_code, seed)
+
+    reports = augment.augment_sets(SET_CODES, data_dir, max_workers=len(SET_CODES))
+    assert [report["ok"] for report in reports] == [True] * len(SET_CODES)
+    assert not any(report["skipped"] for report in reports)
+
+    conn = card_database.connect(card_database.database_path(data_dir))
+    try:
+        assert [set_code for set_code, _, _ in card_database.list_sets(conn)] == SET_CODES
+    finally:
+        conn.close()
+
+    reports = augment.augment_sets(SET_CODES, data_dir, max_workers=len(SET_CODES))
+    assert [report["skipped"] for report in reports] == [True] * len(SET_CODES)
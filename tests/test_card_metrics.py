@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+import card_metrics
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def archive():
+    # Group 0 has a tie and a missing value; group 1 a single card; -1 is no group
+    values = np.array([3.0, 1.0, 3.0, np.nan, 2.0, 5.0])
+    groups = np.array([0, 0, 0, 0, 1, -1])
+    return values, groups
+
+
+def test_group_ranks_share_the_better_rank_on_ties(archive):
+    percentiles, ranks = card_metrics.group_ranks(*archive, 2)
+
+    assert ranks.tolist() == [1, 3, 1, card_metrics.MISSING_INT, 1, card_metrics.MISSING_INT]
+    # Ties count half below, half above
+    assert percentiles[:3] == pytest.approx([200 / 3, 50 / 3, 200 / 3])
+    assert percentiles[4] == 50.0
+    assert math.isnan(percentiles[3]) and math.isnan(percentiles[5])
+
+
+def test_group_ranks_of_nothing():
+    percentiles, ranks = card_metrics.group_ranks(np.array([np.nan]), np.array([0]), 1)
+
+    assert math.isnan(percentiles[0]) and ranks.tolist() == [card_metrics.MISSING_INT]
+
+
+def test_group_zscores(archive):
+    z = card_metrics.group_zscores(*archive, 2)
+
+    std = math.sqrt(8 / 9)
+    assert z[:3] == pytest.approx([(2 / 3) / std, (-4 / 3) / std, (2 / 3) / std])
+    assert z[4] == 0.0 # No spread within the group
+    assert math.isnan(z[3]) and math.isnan(z[5])
+
+
+def test_grade_scale_follows_the_pro_rating_grades():
+    assert card_metrics.GRADE_SCALE[0] == "F" and card_metrics.GRADE_SCALE[-1] == "A+"
@@ -0,0 +1,63 @@
+import pytest
+
+import augment_scryfall_data as augment
+import card_sources
+from card_sources import CsvSource, Source, load_source
+
+
+def write_csv(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def export(tmp_path):
+    return write_csv(tmp_path / "export.csv", "A,Card Name,B,C\na1,Bolt,b1,c1\na2,Shock,b2\n\n")
+
+
+def test_source_is_abstract():
+    with pytest.raises(TypeError):
+        Source("Base", lambda directory, set_code: None)
+
+
+@pytest.mark.parametrize("output_columns, columns, bolt, shock", [
+    (None, ["A", "B", "C"], ("a1", "b1", "c1"), ("a2", "b2", "")),
+    (["Name", "X_C", "X_A"], ["A", "C"], ("a1", "c1"), ("a2", "")),
+    (["Name", "X_B", "Other"], ["B"], ("b1",), ("b2",)),
+    (["Name"], [], (), ()),
+])
+def test_csv_source_loads_only_the_projected_columns(export, output_columns, columns, bolt, shock):
+    source = CsvSource("X", None, prefix="X_")
+
+    loaded = load_source(source, export, output_columns)
+
+    assert loaded.columns == columns
+    assert loaded.records == {"Bolt": bolt, "Shock": shock}
+    assert loaded.output_columns() == [f"X_{column}" for column in columns]
+
+
+def test_csv_source_without_a_name_column_loads_nothing(tmp_path):
+    path = write_csv(tmp_path / "export.csv", "A,B\na1,b1\n")
+
+    assert CsvSource("X", None).load(path, ["A"]) == {}
+
+
+def test_missing_sources_are_left_out_unless_always_listed():
+    aetherhub = augment.get_source("AetherHub")
+    lands = augment.get_source("17Lands")
+    assert aetherhub.always_listed and not lands.always_listed
+
+    loaded_sources = [load_source(aetherhub, None), load_source(lands, None)]
+    fieldnames = card_sources.output_fieldnames(["Name"], loaded_sources)
+
+    assert fieldnames == ["Name"] + [f"AH_{column}" for column in augment.AETHERHUB_COLUMNS] + ["In_AetherHub_List"]
+    rows = list(card_sources.iter_joined_rows([{"Name": "Bolt"}], loaded_sources, {}))
+    assert rows == [{"Name": "Bolt", "In_AetherHub_List": False}]
+
+
+def test_always_listed_sources_honour_the_projection():
+    aetherhub = augment.get_source("AetherHub")
+
+    loaded = load_source(aetherhub, None, ["Name", "AH_Pro_Rating"])
+
+    assert loaded.output_columns() == ["AH_Pro_Rating"]
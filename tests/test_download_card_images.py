@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+import pytest
+
+import download_card_images as images
+from fetch_cards_from_scryfall import CSV_FIELDNAMES, TokenBucket, create_session
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    PIL.new("RGB", (600, 838), (40, 120, 200)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def range_headers(stub):
+    return [headers.get("Range") for path, headers in stub.requests]
+
+
+def test_download_file_resumes_a_partial_download(scryfall_stub, tmp_path):
+    data = bytes(range(256)) * 64
+    scryfall_stub.files["/img/card.jpg"] = data
+    part_path = tmp_path / "card.part"
+    part_path.write_bytes(data[:1000])
+
+    with create_session(pool_size=1) as session:
+        result = images.download_file(session, TokenBucket(rate=1000), f"{scryfall_stub.base_url}/img/card.jpg", str(part_path))
+
+    assert result == data
+    assert range_headers(scryfall_stub) == ["bytes=1000-"]
+    assert scryfall_stub.statuses == [206]
+
+
+def test_download_file_restarts_when_the_range_is_ignored(scryfall_stub, tmp_path):
+    data = bytes(range(256)) * 64
+    scryfall_stub.files["/img/card.jpg"] = data
+    scryfall_stub.ranges = False
+    part_path = tmp_path / "card.part"
+    part_path.write_bytes(b"stale bytes")
+
+    with create_session(pool_size=1) as session:
+        result = images.download_file(session, TokenBucket(rate=1000), f"{scryfall_stub.base_url}/img/card.jpg", str(part_path))
+
+    assert result == data
+    assert scryfall_stub.statuses == [200]
+
+
+def test_download_set_images_resumes_then_skips_current_images(scryfall_stub, tmp_path):
+    data = png_bytes()
+    scryfall_stub.files["/img/vault.png"] = data
+    data_dir, images_dir = tmp_path / "data", tmp_path / "images"
+    (data_dir / "aaa").mkdir(parents=True)
+    with open(data_dir / "aaa" / "scryfall_export_aaa.csv", "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES)
+        writer.writeheader()
+        writer.writerow({"Name": "Lim-Dûl's Vault", "Image URL": f"{scryfall_stub.base_url}/img/vault.png"})
+    # Left behind by an interrupted run
+    (images_dir / "aaa").mkdir(parents=True)
+    (images_dir / "aaa" / "lim-dul-s-vault.part").write_bytes(data[:100])
+
+    with create_session(pool_size=1) as session:
+        report = images.download_set_images("aaa", session, TokenBucket(rate=1000), str(data_dir), str(images_dir), max_workers=1)
+        assert (report["downloaded"], report["skipped"], report["failed"]) == (1, 0, [])
+        assert range_headers(scryfall_stub) == ["bytes=100-"]
+        assert not (images_dir / "aaa" / "lim-dul-s-vault.part").exists()
+        with PIL.open(images_dir / "aaa" / "lim-dul-s-vault.webp") as image:
+            assert image.size == (images.DISPLAY_WIDTH, images.DISPLAY_HEIGHT)
+        manifest = json.loads((images_dir / "aaa" / images.MANIFEST_FILENAME).read_text(encoding="utf-8"))
+        assert manifest["cards"]["Lim-Dûl's Vault"]["front"]["file"] == "lim-dul-s-vault.webp"
+
+        report = images.download_set_images("aaa", session, TokenBucket(rate=1000), str(data_dir), str(images_dir), max_workers=1)
+    assert (report["downloaded"], report["skipped"]) == (0, 1)
+    assert len(scryfall_stub.requests) == 1
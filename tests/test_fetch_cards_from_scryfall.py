@@ -0,0 +1,178 @@
+import csv
+import json
+import time
+
+import pytest
+
+import fetch_cards_from_scryfall as fetcher
+from scryfall_cache import ResponseCache
+
+SET_CODES = ["aaa", "bbb", "ccc"]
+
+
+def card(name, rarity="common"):
+    return {"name": name, "rarity": rarity, "color_identity": ["G"], "mana_cost": "{G}", "type_line": "Creature", "oracle_text": ""}
+
+
+def two_pages(set_code):
+    """A set split over two search pages, with a basic land to be filtered out."""
+    return [
+        [card(f"{set_code.upper()} One"), card(f"{set_code.upper()} Two"), card("Forest")],
+        [card(f"{set_code.upper()} Three", "rare")],
+    ]
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    """Writes exports under tmp_path instead of public/assets/data."""
+    monkeypatch.setattr(fetcher, "get_set_output_dir", lambda set_code: str(tmp_path / set_code.lower()))
+    return tmp_path
+
+
+def exported_names(output_dir, set_code):
+    with open(output_dir / set_code / f"scryfall_export_{set_code}.csv", newline="", encoding="utf-8") as csvfile:
+        return [row["Name"] for row in csv.DictReader(csvfile)]
+
+
+def search_requests(stub):
+    return [headers for path, headers in stub.requests if path.startswith("/cards/search")]
+
+
+def export(stub, set_codes, **kwargs):
+    kwargs.setdefault("requests_per_second", 1000)
+    return fetcher.export_sets(set_codes, max_workers=len(set_codes), base_url=stub.base_url, **kwargs)
+
+
+def test_concurrent_export_follows_pages_and_shares_the_rate_limit(scryfall_stub, output_dir):
+    for set_code in SET_CODES:
+        scryfall_stub.sets[set_code] = two_pages(set_code)
+
+    started = time.monotonic()
+    failed = export(scryfall_stub, SET_CODES, requests_per_second=20)
+    elapsed = time.monotonic() - started
+
+    assert failed == []
+    for set_code in SET_CODES:
+        assert exported_names(output_dir, set_code) == [f"{set_code.upper()} One", f"{set_code.upper()} Two", f"{set_code.upper()} Three"]
+    assert len(search_requests(scryfall_stub)) == 6
+    # One bucket for all workers: after the first token, 5 more at 20 per second
+    assert elapsed >= 5 / 20 * 0.9
+
+
+def test_missing_set_fails_without_writing(scryfall_stub, output_dir):
+    scryfall_stub.sets["aaa"] = two_pages("aaa")
+
+    assert export(scryfall_stub, ["aaa", "zzz"]) == ["zzz"]
+    assert exported_names(output_dir, "aaa")
+    assert not (output_dir / "zzz" / "scryfall_export_zzz.csv").exists()
+
+
+def test_429_waits_for_retry_after_then_retries(scryfall_stub, output_dir):
+    scryfall_stub.sets["aaa"] = two_pages("aaa")
+    scryfall_stub.throttle = 1
+
+    started = time.monotonic()
+    assert export(scryfall_stub, ["aaa"]) == []
+    elapsed = time.monotonic() - started
+
+    assert scryfall_stub.statuses[:2] == [429, 200]
+    assert len(search_requests(scryfall_stub)) == 3
+    assert elapsed >= 0.9 # Retry-After: 1
+    assert len(exported_names(output_dir, "aaa")) == 3
+
+
+def test_fresh_cache_entries_are_served_without_requests(scryfall_stub, output_dir, tmp_path):
+    scryfall_stub.sets["aaa"] = two_pages("aaa")
+
+    with ResponseCache(str(tmp_path / "cache")) as cache:
+        assert export(scryfall_stub, ["aaa"], cache=cache) == []
+    first_names = exported_names(output_dir, "aaa")
+    assert len(scryfall_stub.requests) == 2
+
+    with ResponseCache(str(tmp_path / "cache")) as cache:
+        assert export(scryfall_stub, ["aaa"], cache=cache) == []
+    assert len(scryfall_stub.requests) == 2
+    assert exported_names(output_dir, "aaa") == first_names
+
+
+def test_stale_cache_entries_are_revalidated(scryfall_stub, output_dir, tmp_path):
+    scryfall_stub.sets["aaa"] = two_pages("aaa")
+
+    with ResponseCache(str(tmp_path / "cache"), ttl=0) as cache:
+        assert export(scryfall_stub, ["aaa"], cache=cache) == []
+        first_names = exported_names(output_dir, "aaa")
+        assert export(scryfall_stub, ["aaa"], cache=cache) == []
+
+    revalidations = search_requests(scryfall_stub)[2:]
+    assert [headers.get("If-None-Match") for headers in revalidations] == ['"aaa-1"', '"aaa-2"']
+    assert scryfall_stub.statuses[2:] == [304, 304]
+    assert exported_names(output_dir, "aaa") == first_names
+
+
+def test_offline_miss_fails_without_touching_the_network(scryfall_stub, output_dir, tmp_path):
+    scryfall_stub.sets["aaa"] = two_pages("aaa")
+
+    with ResponseCache(str(tmp_path / "cache"), offline=True) as cache:
+        assert export(scryfall_stub, ["aaa"], cache=cache) == ["aaa"]
+    assert scryfall_stub.requests == []
+    assert not (output_dir / "aaa" / "scryfall_export_aaa.csv").exists()
+
+
+def write_bulk(path, cards, text=None):
+    """A bulk-data dump: a JSON array with one card object per line, as Scryfall formats it."""
+    path.write_text(text if text is not None else "[\n" + ",\n".join(json.dumps(card) for card in cards) + "\n]\n", encoding="utf-8")
+    return str(path)
+
+
+def bulk_cards():
+    cards = []
+    for set_code in ["aaa", "bbb"]:
+        for name in ["One", "Two", "Forest", "Three"]:
+            cards.append(dict(card(f"{set_code.upper()} {name}" if name != "Forest" else name), set=set_code))
+    cards.append(dict(card("AAA One"), set="aaa")) # A reprint: only the first printing is kept
+    cards.append(dict(card('Quote " and [brackets], {braces}'), set="ccc"))
+    return cards
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 20])
+def test_iter_bulk_cards_across_chunk_boundaries(tmp_path, chunk_size):
+    cards = bulk_cards()
+    path = write_bulk(tmp_path / "bulk.json", cards)
+
+    assert list(fetcher.iter_bulk_cards(path, chunk_size=chunk_size)) == cards
+
+
+def test_iter_bulk_cards_rejects_a_non_array(tmp_path):
+    path = write_bulk(tmp_path / "bulk.json", None, text='{"object": "card"}')
+
+    with pytest.raises(ValueError):
+        list(fetcher.iter_bulk_cards(path))
+
+
+def test_bulk_export_writes_first_printings_without_basic_lands(tmp_path, output_dir):
+    path = write_bulk(tmp_path / "bulk.json", bulk_cards())
+
+    assert fetcher.export_sets_from_bulk(path, ["AAA", "bbb"]) == {"aaa": 3, "bbb": 3}
+    assert exported_names(output_dir, "aaa") == ["AAA One", "AAA Two", "AAA Three"]
+    assert not (output_dir / "ccc").exists()
+
+
+def test_truncated_bulk_dump_leaves_existing_exports_untouched(tmp_path, output_dir):
+    complete = write_bulk(tmp_path / "bulk.json", bulk_cards())
+    fetcher.export_sets_from_bulk(complete, ["aaa"])
+    before = (output_dir / "aaa" / "scryfall_export_aaa.csv").read_bytes()
+    text = (tmp_path / "bulk.json").read_text(encoding="utf-8")
+    truncated = write_bulk(tmp_path / "truncated.json", None, text=text[:len(text) * 2 // 3])
+
+    with pytest.raises(ValueError):
+        fetcher.export_sets_from_bulk(truncated, ["aaa", "bbb"])
+    assert (output_dir / "aaa" / "scryfall_export_aaa.csv").read_bytes() == before
+    assert sorted(path.name for path in (output_dir / "aaa").iterdir()) == ["scryfall_export_aaa.csv"]
+    assert not (output_dir / "bbb").exists()
+
+
+def test_bulk_export_of_an_unknown_set_writes_nothing(tmp_path, output_dir):
+    path = write_bulk(tmp_path / "bulk.json", bulk_cards())
+
+    assert fetcher.export_sets_from_bulk(path, ["aaa", "tpyo"]) == {"aaa": 3, "tpyo": 0}
+    assert not (output_dir / "tpyo").exists()
@@ -0,0 +1,96 @@
+import csv
+import os
+
+import pytest
+
+import augment_scryfall_data as augment
+from lands_history import UNDATED_SNAPSHOT_DATE, LandsHistory, snapshot_date
+
+FIELDS = ["Name", "Color", "GIH WR", "# GIH"]
+
+
+def write_export(directory, filename, rows):
+    path = os.path.join(directory, filename)
+    with open(path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+    return path
+
+
+def dated(directory, date, rows):
+    return write_export(directory, f"17lands-AAA-card-ratings-{date}.csv", rows)
+
+
+@pytest.fixture
+def lands():
+    return augment.get_source("17Lands")
+
+
+def test_reingesting_an_export_stores_nothing(tmp_path, lands):
+    path = dated(tmp_path, "2025-05-01", [["Bolt", "R", "55.0%", "100"]])
+    history = LandsHistory.open(str(tmp_path))
+
+    assert history.ingest(path, lands) == 1
+    assert history.ingest(path, lands) == 0
+    assert len(LandsHistory.open(str(tmp_path)).snapshots) == 1
+
+
+def test_unchanged_rows_are_not_stored_again(tmp_path, lands):
+    history = LandsHistory.open(str(tmp_path))
+    history.ingest(dated(tmp_path, "2025-05-01", [["Bolt", "R", "55.0%", "100"], ["Shock", "R", "50.0%", "80"]]), lands)
+
+    assert history.ingest(dated(tmp_path, "2025-05-08", [["Bolt", "R", "55.0%", "100"], ["Shock", "R", "51.0%", "90"]]), lands) == 1
+
+
+def test_as_of_returns_the_newest_snapshot_on_or_before_a_date(tmp_path, lands):
+    history = LandsHistory.open(str(tmp_path))
+    history.ingest(dated(tmp_path, "2025-05-01", [["Bolt", "R", "55.0%", "100"]]), lands)
+    history.ingest(dated(tmp_path, "2025-05-15", [["Bolt", "R", "57.0%", "300"]]), lands)
+
+    assert history.as_of("2025-04-30") == {}
+    assert history.as_of("2025-05-10")["Bolt"]["GIH WR"] == "55.0%"
+    assert history.as_of("2025-05-15")["Bolt"]["GIH WR"] == "57.0%"
+    assert history.latest() == LandsHistory.open(str(tmp_path)).latest()
+
+
+def test_an_older_export_ingested_late_does_not_change_newer_snapshots(tmp_path, lands):
+    history = LandsHistory.open(str(tmp_path))
+    history.ingest(dated(tmp_path, "2025-04-01", [["Bolt", "R", "50.0%", "100"]]), lands)
+    # Bolt as on 04-01, so only Shock is stored on 06-01
+    assert history.ingest(dated(tmp_path, "2025-06-01", [["Bolt", "R", "50.0%", "100"], ["Shock", "R", "48.0%", "20"]]), lands) == 1
+    # Taken in between; the 06-01 value has to be pinned before it is stored
+    assert history.ingest(dated(tmp_path, "2025-05-01", [["Bolt", "R", "52.0%", "150"]]), lands) == 2
+
+    for reopened in (history, LandsHistory.open(str(tmp_path))):
+        assert reopened.as_of("2025-04-15")["Bolt"]["GIH WR"] == "50.0%"
+        assert reopened.as_of("2025-05-15")["Bolt"]["GIH WR"] == "52.0%"
+        assert reopened.as_of("2025-06-01")["Bolt"]["GIH WR"] == "50.0%"
+        assert reopened.dates() == ["2025-04-01", "2025-05-01", "2025-06-01"]
+
+
+def test_delta_reports_numeric_and_text_changes(tmp_path, lands):
+    history = LandsHistory.open(str(tmp_path))
+    history.ingest(dated(tmp_path, "2025-05-01", [["Bolt", "R", "52.0%", "100"], ["Shock", "R", "50.0%", "80"]]), lands)
+    history.ingest(dated(tmp_path, "2025-05-15", [["Bolt", "RW", "53.5%", "100"], ["Shock", "R", "50.0%", "80"], ["Spark", "R", "49.0%", "10"]]), lands)
+
+    changes = history.delta("2025-05-01", "2025-05-15")
+
+    assert set(changes) == {"Bolt", "Spark"}
+    assert changes["Bolt"] == {
+        "Color": {"from": "R", "to": "RW", "change": None},
+        "GIH WR": {"from": "52.0%", "to": "53.5%", "change": 1.5},
+    }
+    assert changes["Spark"]["GIH WR"] == {"from": None, "to": "49.0%", "change": None}
+    assert history.delta("2025-05-01", "2025-05-15", fields=["# GIH"]) == {"Spark": {"# GIH": {"from": None, "to": "10", "change": None}}}
+
+
+def test_undated_exports_sort_before_dated_ones(tmp_path):
+    newest = dated(tmp_path, "2025-06-01", [["Bolt", "R", "55.0%", "100"]])
+    undated = write_export(tmp_path, "17Lands_export_aaa.csv", [["Bolt", "R", "40.0%", "10"]])
+    # A fresh checkout: the undated export looks newer than it is
+    os.utime(newest, (0, 0))
+
+    assert snapshot_date(undated) == UNDATED_SNAPSHOT_DATE
+    assert augment.find_lands_files(str(tmp_path), "aaa") == [undated, newest]
+    assert augment.find_lands_file(str(tmp_path), "aaa") == newest
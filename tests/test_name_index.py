@@ -0,0 +1,37 @@
+import card_sources
+from name_index import NameIndex
+
+RECORDS = {
+    "Vivi Ornitier": ("vivi",),
+    "Lim-Dûl's Vault": ("vault",),
+    "Cecil, Dark Knight": ("cecil",),
+}
+
+
+def test_exact_normalized_and_face_matches_join():
+    index = NameIndex(RECORDS)
+    assert index.lookup("Vivi Ornitier") == ("Vivi Ornitier", "exact")
+    assert index.lookup("LIM-DUL'S VAULT") == ("Lim-Dûl's Vault", "normalized")
+    assert index.lookup("Cecil, Dark Knight // Cecil, Redeemed Paladin") == ("Cecil, Dark Knight", "face")
+
+
+def test_similar_name_is_suggested_not_joined():
+    index = NameIndex(RECORDS)
+    assert index.lookup("A-Vivi Ornitier") == (None, None)
+    suggestion, similarity = index.suggest("A-Vivi Ornitier")
+    assert suggestion == "Vivi Ornitier"
+    assert similarity >= 0.8
+
+    join_report = card_sources.new_join_report()
+    assert card_sources.join_record(index, "A-Vivi Ornitier", join_report) is None
+    assert join_report["missing"] == ["A-Vivi Ornitier"]
+    assert join_report["suggestions"][0]["suggestion"] == "Vivi Ornitier"
+
+
+def test_confirmed_alias_joins():
+    index = NameIndex(RECORDS, aliases={"A-Vivi Ornitier": "Vivi Ornitier"})
+    assert index.lookup("A-Vivi Ornitier") == ("Vivi Ornitier", "alias")
+
+
+def test_unrelated_name_has_no_suggestion():
+    assert NameIndex(RECORDS).suggest("Wastes") == (None, None)
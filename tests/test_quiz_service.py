@@ -0,0 +1,98 @@
+import asyncio
+import json
+import random
+import sqlite3
+
+import pytest
+
+import quiz_service
+from quiz_service import QuizError, QuizService, QuizSession
+
+CARDS = [
+    {"name": "Card One", "trueGrade": "B", "description": "", "gihWR": "55.0%", "image": ""},
+    {"name": "Card Two", "trueGrade": "C", "description": "", "gihWR": "52.0%", "image": ""},
+]
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = QuizService(str(tmp_path), str(tmp_path / "images"), str(tmp_path / "scores.sqlite"), seed=1)
+    service.sessions["s1"] = QuizSession("s1", "alice", "aaa", "shuffle", CARDS, {}, random.Random(1))
+    yield service
+    service.scores.close()
+
+
+@pytest.mark.parametrize("body", [
+    {"grade": ["A"]},
+    {"grade": {"grade": "A"}},
+    {"grade": 3},
+    {"grade": "Z"},
+])
+def test_answer_with_a_bad_grade_is_a_400(service, body):
+    asyncio.run(service.dispatch("POST", "/sessions/s1/next", b""))
+    with pytest.raises(QuizError) as raised:
+        asyncio.run(service.dispatch("POST", "/sessions/s1/answer", json.dumps(body).encode()))
+    assert raised.value.status == 400
+    # The dealt card is still waiting for a valid answer
+    status, result = asyncio.run(service.dispatch("POST", "/sessions/s1/answer", b'{"grade": "B"}'))
+    assert status == 200 and result["userGrade"] == "B"
+
+
+@pytest.mark.parametrize("body", [
+    {"user": "alice", "set": ["aaa"]},
+    {"user": "alice", "set": "aaa", "mode": ["weighted"]},
+    {"user": ["alice"], "set": "aaa"},
+])
+def test_start_session_with_bad_types_is_a_400(service, body):
+    with pytest.raises(QuizError) as raised:
+        asyncio.run(service.dispatch("POST", "/sessions", json.dumps(body).encode()))
+    assert raised.value.status == 400
+
+
+def test_maintain_survives_a_failing_flush(service, monkeypatch):
+    monkeypatch.setattr(quiz_service, "SCORE_FLUSH_SECONDS", 0.01)
+    record = service.scores.record
+    failures = []
+
+    def flaky_record(answers):
+        if not failures:
+            failures.append(len(answers))
+            raise sqlite3.OperationalError("database is locked")
+        record(answers)
+
+    monkeypatch.setattr(service.scores, "record", flaky_record)
+
+    async def run():
+        maintenance = asyncio.create_task(service.maintain())
+        service.next_card("s1")
+        service.answer("s1", "B")
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if failures and not service._pending_answers:
+                break
+        assert not maintenance.done()
+        maintenance.cancel()
+
+    asyncio.run(run())
+    assert failures == [1]
+    # Stored once the next pass retried it
+    assert sum(entry["attempts"] for entry in service.scores.grade_accuracy("alice").values()) == 1
+
+
+def test_set_cards_do_not_reveal_the_grades(service):
+    service._set_cards["aaa"] = CARDS
+
+    status, result = asyncio.run(service.dispatch("GET", "/sets/aaa/cards", b""))
+
+    assert status == 200
+    assert "trueGrade" not in result["fields"]
+    assert [sorted(card) for card in result["cards"]] == [sorted(result["fields"])] * len(CARDS)
+    assert CARDS[0]["trueGrade"] == "B" # The cached cards are not modified
+
+
+def test_weighted_rounds_deal_every_card_once():
+    weights = [1.0, 5.0, 0.5, 2.0]
+    sampler = quiz_service.WeightedSampler(lambda: weights, random.Random(3))
+
+    for _ in range(3):
+        assert sorted(sampler.draw() for _ in weights) == [0, 1, 2, 3]